@@ -0,0 +1,209 @@
+import heapq
+import math
+import zlib
+from array import array
+from collections import Counter
+from operator import itemgetter
+
+# 보고서별로 고를 수 있는 집계 방식. 모두 add / update / most_common 을 지원
+AGGREGATORS = ('exact', 'heap', 'spacesaving', 'countmin')
+
+
+class ExactCounter(Counter):
+    """기존 Counter 그대로 (정확, 메모리는 키 수에 비례)"""
+
+    def add(self, key, count=1):
+        self[key] += count
+
+
+class HeapTopK:
+    """키별 합계는 정확히 유지하고, 순위를 낼 때만 heapq.nlargest 로 상위 k 개를 고름
+
+    같은 키가 여러 번 들어오는 스트림(네트워크별 히트)에서도 결과는 exact 와 같다.
+    전체 정렬 대신 O(N log k) 선택이라 순위를 자주 뽑는 경우에 가볍지만, 메모리는 exact 처럼
+    키 수에 비례한다 (메모리를 줄이려면 spacesaving 이나 countmin).
+    """
+
+    def __init__(self, k=200):
+        self.k = k
+        self._counts = {}
+
+    def add(self, key, count=1):
+        counts = self._counts
+        counts[key] = counts.get(key, 0) + count
+
+    def update(self, other):
+        for key, count in _items(other):
+            self.add(key, count)
+
+    def most_common(self, n=None):
+        """상위 n 개 (기본 k 개). 동점은 먼저 들어온 키가 앞 (Counter.most_common 과 같음)"""
+        return heapq.nlargest(self.k if n is None else n, self._counts.items(),
+                              key=itemgetter(1))
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class SpaceSaving:
+    """Space-Saving (Metwally et al.): 카운터 k 개로 빈도 상위 항목 추적
+
+    각 추정값의 과대 추정 오차는 최대 N/k (N = 전체 합계). error_bound() 참고.
+    """
+
+    def __init__(self, k=1000):
+        self.k = k
+        self.total = 0
+        self._counts = {}
+        self._errors = {}
+        self._heap = []
+
+    def add(self, key, count=1):
+        self.total += count
+        counts = self._counts
+        if key in counts:
+            counts[key] += count
+        elif len(counts) < self.k:
+            counts[key] = count
+            self._errors[key] = 0
+        else:
+            # 가장 작은 카운터를 새 키에 넘겨줌 (지연 갱신된 힙에서 최소값 찾기)
+            heap = self._heap
+            while True:
+                if not heap:
+                    self._rebuild_heap()
+                    heap = self._heap
+                low, victim = heapq.heappop(heap)
+                if counts.get(victim) == low:
+                    break
+            del counts[victim]
+            del self._errors[victim]
+            counts[key] = low + count
+            self._errors[key] = low
+        heapq.heappush(self._heap, (counts[key], key))
+        if len(self._heap) > 4 * self.k:
+            self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self._heap = [(count, key) for key, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+    def update(self, other):
+        for key, count in _items(other):
+            self.add(key, count)
+
+    def error_bound(self):
+        return self.total / self.k if self.k else 0
+
+    def guaranteed(self, key):
+        """추정값에서 오차를 뺀 하한 (실제 값 >= 이 값)"""
+        return self._counts.get(key, 0) - self._errors.get(key, 0)
+
+    def most_common(self, n=None):
+        items = sorted(self._counts.items(), key=lambda item: item[1], reverse=True)
+        return items if n is None else items[:n]
+
+    def __len__(self):
+        return len(self._counts)
+
+
+class CountMinSketch:
+    """Count-Min sketch + 상위 k 후보 추적
+
+    폭 w = ceil(e / epsilon), 깊이 d = ceil(ln(1 / delta)): 추정값은 확률 1-delta 로
+    실제 값 + epsilon * N 이하. 해시는 crc32 기반이라 프로세스가 달라도 같은 설정이면 merge 가능.
+    """
+
+    def __init__(self, epsilon=0.0001, delta=0.001, k=200):
+        self.epsilon = epsilon
+        self.delta = delta
+        self.width = math.ceil(math.e / epsilon)
+        self.depth = math.ceil(math.log(1 / delta))
+        self.k = k
+        self.total = 0
+        self._rows = [array('Q', bytes(8 * self.width)) for _ in range(self.depth)]
+        self._top = {}
+        self._heap = []
+
+    def _indexes(self, key):
+        data = key.encode() if isinstance(key, str) else bytes(key)
+        h1 = zlib.crc32(data)
+        h2 = zlib.crc32(data, 0x9E3779B9) | 1
+        width = self.width
+        return [(h1 + i * h2) % width for i in range(self.depth)]
+
+    def add(self, key, count=1):
+        self.total += count
+        estimate = None
+        for row, i in zip(self._rows, self._indexes(key)):
+            value = row[i] + count
+            row[i] = value
+            if estimate is None or value < estimate:
+                estimate = value
+        self._track(key, estimate)
+
+    def _track(self, key, estimate):
+        top = self._top
+        heap = self._heap
+        if key in top or len(top) < self.k:
+            top[key] = estimate
+            heapq.heappush(heap, (estimate, key))
+            if len(heap) > 4 * self.k:
+                self._heap = [(value, k) for k, value in top.items()]
+                heapq.heapify(self._heap)
+            return
+        # 지연 갱신된 힙에서 현재 최소 후보 찾기
+        while heap[0][0] != top.get(heap[0][1]):
+            heapq.heappop(heap)
+        if estimate > heap[0][0]:
+            _, evicted = heapq.heapreplace(heap, (estimate, key))
+            del top[evicted]
+            top[key] = estimate
+
+    def estimate(self, key):
+        return min(row[i] for row, i in zip(self._rows, self._indexes(key)))
+
+    def update(self, other):
+        if isinstance(other, CountMinSketch):
+            if (other.width, other.depth) != (self.width, self.depth):
+                raise ValueError("CountMinSketch merge requires the same epsilon/delta")
+            for row, other_row in zip(self._rows, other._rows):
+                for i, value in enumerate(other_row):
+                    if value:
+                        row[i] += value
+            self.total += other.total
+            for key in list(self._top) + list(other._top):
+                self._track(key, self.estimate(key))
+            return
+        for key, count in _items(other):
+            self.add(key, count)
+
+    def error_bound(self):
+        return self.epsilon * self.total
+
+    def most_common(self, n=None):
+        items = sorted(((key, self.estimate(key)) for key in self._top),
+                       key=lambda item: item[1], reverse=True)
+        return items if n is None else items[:n]
+
+    def __len__(self):
+        return len(self._top)
+
+
+def _items(other):
+    if hasattr(other, 'items'):
+        return other.items()
+    return other.most_common()
+
+
+def make_aggregator(kind='exact', k=200, epsilon=0.0001, delta=0.001):
+    """kind: exact | heap | spacesaving | countmin"""
+    if kind == 'exact':
+        return ExactCounter()
+    if kind == 'heap':
+        return HeapTopK(k)
+    if kind == 'spacesaving':
+        return SpaceSaving(k)
+    if kind == 'countmin':
+        return CountMinSketch(epsilon, delta, k)
+    raise ValueError(f"Unknown aggregator: {kind}")
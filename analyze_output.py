@@ -1,69 +1,155 @@
+import argparse
 import os
-from collections import Counter
 import time
 
+import anomaly
+import bclass_filter
+import compressed_input
+import instrument
+import output_sink
+from aggregators import AGGREGATORS, make_aggregator
+from bclass_stats import aggregate_records, close_intervals, new_stats, write_stats
+from hyperloglog import NetworkCardinality
 
 
+def parse_output_lines(lines):
+    """output.txt 라인을 bclass_filter 와 같은 (ip, network) 레코드로 변환. 빈 줄은 (None, None)"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            yield None, None
+            continue
 
+        if 'Invalid line format' in line:
+            yield line, bclass_filter.INVALID
+        elif '-> NONE' in line:
+            yield line.split(' -> ')[0], None
+        else:
+            # B클래스 네트워크 정보 추출
+            ip, network = line.split('-> ')
+            yield ip.strip(), network.strip()
 
 
-def analyze_output():
-    input_file = os.path.join(os.getcwd(), 'output.txt')
-    stats_file = os.path.join(os.getcwd(), 'stats.txt')
-    
+def save_sketches(stats, sketch_file):
+    if sketch_file is not None and stats.get('bclass_unique') is not None:
+        stats['bclass_unique'].save(sketch_file)
+        print(f"Unique-IP sketches written to: {sketch_file}")
+
+
+def analyze_output(input_file=None, stats_file=None, networks=None, unique=None,
+                   sketch_file=None, anomalies=None, stages=instrument.NO_STAGES):
+    if input_file is None:
+        input_file = os.path.join(os.getcwd(), 'output.txt')
+    if stats_file is None:
+        stats_file = os.path.join(os.getcwd(), 'stats.txt')
+
+    print(f"Analyzing file: {input_file}")
+
+    try:
+        with compressed_input.open_input(input_file, 'r') as f, stages.stage('aggregate'):
+            lines = stages.timed('read', f)
+            stats = aggregate_records(stages.timed('parse', parse_output_lines(lines)),
+                                      new_stats(networks, unique, anomalies))
+            close_intervals(stats)
+
+        with stages.stage('write'):
+            write_stats(stats, stats_file)
+            save_sketches(stats, sketch_file)
+        stages.count('lines', stats['total_lines'])
+
+        print(f"\nAnalysis completed. Total {stats['total_lines']:,} lines analyzed.")
+        print(f"Statistics written to: {stats_file}")
+
+    except FileNotFoundError:
+        print(f"Error: {input_file} file not found")
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+
+
+def analyze_columnar(input_file, stats_file=None, networks=None, unique=None, sketch_file=None,
+                     anomalies=None, stages=instrument.NO_STAGES):
+    """columnar.py 로 만든 Parquet/Arrow 파일에서 열 스캔만으로 통계 계산 (문자열 파싱 없음)"""
+    import columnar
+
+    if stats_file is None:
+        stats_file = os.path.join(os.getcwd(), 'stats.txt')
+
+    print(f"Analyzing file: {input_file}")
+
+    try:
+        with stages.stage('scan'):
+            stats = columnar.columnar_stats(input_file, networks, unique, anomalies)
+
+        with stages.stage('write'):
+            write_stats(stats, stats_file)
+            save_sketches(stats, sketch_file)
+        stages.count('lines', stats['total_lines'])
+
+        print(f"\nAnalysis completed. Total {stats['total_lines']:,} lines analyzed.")
+        print(f"Statistics written to: {stats_file}")
+
+    except FileNotFoundError:
+        print(f"Error: {input_file} file not found")
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+
+
+def _classified_records(lines, stages, flush=None):
+    """iter_records 를 read / classify 단계로 나눠 잼 (파싱, 검증, 분류는 iter_records 안에서 한 번에)"""
+    return stages.timed('classify', bclass_filter.iter_records(stages.timed('read', lines)),
+                        between=flush)
+
+
+def analyze_hits(input_file=None, stats_file=None, output_file=None, workers=1,
+                 v6_prefix=bclass_filter.V6_PREFIX, networks=None, unique=None,
+                 sketch_file=None, anomalies=None, stages=instrument.NO_STAGES):
+    """ppom_bclass.txt 를 분류하면서 바로 집계 (output.txt 는 output_file 을 줄 때만 기록)
+
+    workers > 1 이면 parallel_filter 로 파일을 줄 단위 구간으로 나눠 여러 프로세스에서 처리
+    (anomalies 는 라인 순서대로 봐야 하므로 직렬 처리에서만 사용).
+    IPv6 주소는 v6_prefix 길이 네트워크로 집계
+    """
+    bclass_filter.configure_ipv6(v6_prefix)
+    if input_file is None:
+        input_file = os.path.join(os.getcwd(), 'ppom_bclass.txt')
+    if stats_file is None:
+        stats_file = os.path.join(os.getcwd(), 'stats.txt')
+
     print(f"Analyzing file: {input_file}")
-    
-    stats = {
-        'total_lines': 0,
-        'none_count': 0,
-        'bclass_count': 0,
-        'invalid_format': 0,
-        'bclass_networks': Counter()
-    }
-    
+
     try:
-        with open(input_file, 'r') as f:
-            for line in f:
-                stats['total_lines'] += 1
-                if stats['total_lines'] % 1000 == 0:
-                    print(f"Processing... {stats['total_lines']} lines analyzed")
-                
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if 'Invalid line format' in line:
-                    stats['invalid_format'] += 1
-                    continue
-                
-                if '-> NONE' in line:
-                    stats['none_count'] += 1
+        if workers > 1 and compressed_input.is_compressed(input_file):
+            # 압축 파일은 구간으로 나눌 수 없으므로 직렬 처리 (압축 해제는 별도 스레드에서 겹쳐 실행)
+            print("Compressed input: processing with 1 worker")
+            workers = 1
+        if workers > 1 and anomalies is None:
+            import parallel_filter
+            with stages.stage('parallel'):
+                _, stats = parallel_filter.run_parallel(input_file, workers, output_file,
+                                                        v6_prefix, networks, unique)
+        else:
+            stats = new_stats(networks, unique, anomalies)
+            with compressed_input.open_input(input_file, 'r') as f, stages.stage('aggregate'):
+                if output_file is None:
+                    aggregate_records(_classified_records(f, stages), stats)
                 else:
-                    # B클래스 네트워크 정보 추출
-                    network = line.split('-> ')[1].strip()
-                    stats['bclass_count'] += 1
-                    stats['bclass_networks'][network] += 1
-        
-        # 통계 일 작성
-        with open(stats_file, 'w') as f:
-            f.write("=== Analysis Results ===\n")
-            f.write(f"Total lines analyzed: {stats['total_lines']:,}\n")
-            f.write(f"Invalid format lines: {stats['invalid_format']:,}\n")
-            f.write(f"NONE results: {stats['none_count']:,}\n")
-            f.write(f"B-class networks found: {stats['bclass_count']:,}\n\n")
-            
-            f.write("=== Top B-class Networks ===\n")
-            for network, count in stats['bclass_networks'].most_common(200):
-                f.write(f"{network}: {count:,} occurrences\n")
-            
-            # 백분율 계산
-            f.write("\n=== Percentages ===\n")
-            total = stats['total_lines']
-            f.write(f"NONE results: {(stats['none_count']/total*100):.2f}%\n")
-            f.write(f"B-class networks: {(stats['bclass_count']/total*100):.2f}%\n")
+                    with open(output_file, 'w') as outfile, \
+                            output_sink.BatchWriter(outfile, stages=stages) as writer:
+                        aggregate_records(_classified_records(f, stages, writer.flush), stats,
+                                          sink=writer)
+                    if stages is not instrument.NO_STAGES:
+                        print(writer.summary())
+            close_intervals(stats)
+
+        with stages.stage('write'):
+            write_stats(stats, stats_file)
+            save_sketches(stats, sketch_file)
+        stages.count('lines', stats['total_lines'])
 
         print(f"\nAnalysis completed. Total {stats['total_lines']:,} lines analyzed.")
         print(f"Statistics written to: {stats_file}")
+        if output_file is not None:
+            print(f"Results written to: {output_file}")
 
     except FileNotFoundError:
         print(f"Error: {input_file} file not found")
@@ -72,4 +158,54 @@ def analyze_output():
 
 
 if __name__ == "__main__":
-    analyze_output() 
+    parser = argparse.ArgumentParser(description='B클래스 필터링 결과 분석')
+    parser.add_argument('--stream', metavar='HIT_FILE', nargs='?', const='ppom_bclass.txt',
+                        help='output.txt 없이 히트 로그를 바로 분류/집계')
+    parser.add_argument('--columnar', metavar='COLUMNAR_FILE',
+                        help='output.txt 대신 columnar.py 의 Parquet/Arrow 결과를 열 단위로 집계')
+    parser.add_argument('--output', metavar='OUTPUT_FILE',
+                        help='--stream 사용 시 output.txt 형식 결과도 함께 기록')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='--stream 사용 시 병렬 처리 프로세스 수')
+    parser.add_argument('--v6-prefix', type=int, default=bclass_filter.V6_PREFIX,
+                        help='IPv6 집계 프리픽스 길이 (예: 32, 48, 64)')
+    parser.add_argument('--aggregator', choices=AGGREGATORS, default='exact',
+                        help='네트워크 순위 집계 방식 (기본: 정확한 Counter)')
+    parser.add_argument('--top-k', type=int, default=1000,
+                        help='heap 이 고를 순위 수, spacesaving/countmin 이 유지할 후보 수')
+    parser.add_argument('--unique', action='store_true',
+                        help='네트워크별 고유 IP 수(HyperLogLog 추정) 열 추가')
+    parser.add_argument('--sketch-out', metavar='SKETCH_FILE',
+                        help='고유 IP 스케치 저장 (hyperloglog.py 로 여러 날짜 합집합). --unique 포함')
+    parser.add_argument('--anomalies', action='store_true',
+                        help='구간별 네트워크 카운트가 EWMA 기준값보다 급증한 네트워크 목록 추가')
+    parser.add_argument('--anomaly-interval', type=int, default=anomaly.INTERVAL_LINES,
+                        help='한 구간으로 묶을 라인 수')
+    parser.add_argument('--anomaly-threshold', type=float, default=anomaly.THRESHOLD,
+                        help='경보 점수 기준 (표준편차 배수)')
+    compressed_input.add_arguments(parser)
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    compressed_input.configure(args.decompress)
+    if args.anomalies and args.workers > 1:
+        parser.error('--anomalies needs lines in order; use --workers 1')
+
+    networks = make_aggregator(args.aggregator, k=args.top_k)
+    unique = NetworkCardinality() if args.unique or args.sketch_out else None
+    anomalies = None
+    if args.anomalies:
+        anomalies = anomaly.EwmaDetector(threshold=args.anomaly_threshold,
+                                         interval=args.anomaly_interval)
+    with instrument.profiling(args.profile, args.profile_out) as stages:
+        if args.columnar:
+            analyze_columnar(os.path.join(os.getcwd(), args.columnar), networks=networks,
+                             unique=unique, sketch_file=args.sketch_out, anomalies=anomalies,
+                             stages=stages)
+        elif args.stream:
+            analyze_hits(os.path.join(os.getcwd(), args.stream), output_file=args.output,
+                         workers=args.workers, v6_prefix=args.v6_prefix, networks=networks,
+                         unique=unique, sketch_file=args.sketch_out, anomalies=anomalies,
+                         stages=stages)
+        else:
+            analyze_output(networks=networks, unique=unique, sketch_file=args.sketch_out,
+                           anomalies=anomalies, stages=stages)
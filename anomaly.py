@@ -0,0 +1,109 @@
+import math
+from collections import Counter
+
+# 평활 계수: 기준값이 최근 약 2/alpha 구간을 반영
+ALPHA = 0.1
+# (관측값 - 기준값) / 표준편차 가 이 이상이면 경보
+THRESHOLD = 4.0
+# 이 구간 수 이상 관측된 네트워크만 판정 (처음 본 네트워크의 기준값이 안정될 때까지)
+WARMUP = 3
+# analyze_output 에서 한 구간으로 묶을 라인 수 (시간 정보가 없는 입력의 논리적 시계)
+INTERVAL_LINES = 1000
+# 이 구간 수 동안 안 나타난 네트워크는 기준값이 사실상 0 이므로 상태에서 제거
+IDLE_TTL = 60
+
+
+class EwmaDetector:
+    """네트워크별 구간 카운트를 EWMA 평균/분산 기준값과 비교해 급증한 네트워크를 찾음
+
+    add() 는 현재 구간 Counter 에 더하기만 하고 (이벤트당 O(1)), tick() 이 구간을 닫으면서
+    이번 구간에 나타난 네트워크만 갱신한다. 건너뛴 구간(0 관측)은 다음에 나타날 때 한꺼번에 반영하고,
+    IDLE_TTL 구간 넘게 조용한 네트워크는 지우므로 상태는 최근 활동 네트워크 수로 제한된다.
+    """
+
+    def __init__(self, alpha=ALPHA, threshold=THRESHOLD, min_count=5, warmup=WARMUP,
+                 idle_ttl=IDLE_TTL, interval=INTERVAL_LINES):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_count = min_count
+        self.warmup = warmup
+        self.idle_ttl = idle_ttl
+        self.interval = interval
+        self.ticks = 0
+        self._counts = Counter()
+        # network -> [평균, 분산, 마지막으로 갱신한 구간, 관측 구간 수]
+        self._state = {}
+        # network -> (점수, 카운트, 기준값, 구간) 중 점수가 가장 높았던 경보
+        self.alerts = {}
+
+    def add(self, network, count=1):
+        self._counts[network] += count
+
+    def _decay(self, state, idle):
+        """idle 개 구간 동안 0 이 관측된 것으로 평균/분산 갱신"""
+        keep = 1 - self.alpha
+        mean, var = state[0], state[1]
+        for _ in range(min(idle, self.idle_ttl)):
+            var = keep * (var + self.alpha * mean * mean)
+            mean *= keep
+        state[0] = mean
+        state[1] = var
+
+    def tick(self):
+        """현재 구간을 닫고 기준값을 갱신. 이번 구간의 경보 [(network, 점수, 카운트, 기준값)] 반환"""
+        alpha = self.alpha
+        tick = self.ticks
+        states = self._state
+        fired = []
+        for network, count in self._counts.items():
+            state = states.get(network)
+            if state is None:
+                states[network] = [float(count), 0.0, tick, 1]
+                continue
+            if tick - state[2] > 1:
+                self._decay(state, tick - state[2] - 1)
+                state[3] += tick - state[2] - 1
+            mean, var = state[0], state[1]
+
+            if state[3] >= self.warmup and count >= self.min_count:
+                # 분산이 아직 작을 때는 포아송 근사(평균)와 1 을 하한으로
+                score = (count - mean) / math.sqrt(max(var, mean, 1.0))
+                if score >= self.threshold:
+                    fired.append((network, score, count, mean))
+                    best = self.alerts.get(network)
+                    if best is None or score > best[0]:
+                        self.alerts[network] = (score, count, mean, tick)
+
+            diff = count - mean
+            incr = alpha * diff
+            state[0] = mean + incr
+            state[1] = (1 - alpha) * (var + diff * incr)
+            state[2] = tick
+            state[3] += 1
+
+        self._counts = Counter()
+        self.ticks = tick + 1
+        if self.ticks % self.idle_ttl == 0:
+            self._evict()
+        fired.sort(key=lambda alert: alert[1], reverse=True)
+        return fired
+
+    def observe(self, counts):
+        """구간 하나의 네트워크별 카운트(windowed 의 창 등)를 한 번에 반영하고 tick"""
+        for network, count in counts.items():
+            self._counts[network] += count
+        return self.tick()
+
+    def _evict(self):
+        horizon = self.ticks - self.idle_ttl
+        for network in [n for n, state in self._state.items() if state[2] < horizon]:
+            del self._state[network]
+
+    def __len__(self):
+        return len(self._state)
+
+    def ranked_alerts(self, n=None):
+        """네트워크별 최고 점수 경보를 점수 순으로 [(network, 점수, 카운트, 기준값, 구간)]"""
+        ranked = sorted(((network, *alert) for network, alert in self.alerts.items()),
+                        key=lambda alert: alert[1], reverse=True)
+        return ranked if n is None else ranked[:n]
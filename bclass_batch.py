@@ -0,0 +1,186 @@
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+import network_index
+from bclass_filter import B_CLASS_TOP_BITS, format_network16
+
+# 한 번에 읽어 벡터 연산할 바이트 수 (바이트당 int 배열이 생기므로 메모리 상한 역할)
+CHUNK_SIZE = 8 * 1024 * 1024
+
+UINT32_MAX = 0xFFFFFFFF
+
+_POW10 = 10 ** np.arange(19, dtype=np.int64)
+
+
+def parse_hit_buffer(data):
+    """'count ip' 라인들로 된 바이트를 (hits, addrs, valid) 배열로 변환
+
+    라인 하나당 원소 하나. IPv4 점 표기가 아니거나 형식이 틀린 라인(빈 줄, IPv6 포함)은
+    valid=False, hits/addrs=0 으로 채운다.
+    """
+    buf = np.frombuffer(data, dtype=np.uint8)
+    if len(buf) and buf[-1] != 10:
+        buf = np.concatenate((buf, np.array([10], dtype=np.uint8)))
+
+    is_nl = buf == 10
+    n_lines = int(np.count_nonzero(is_nl))
+    hits = np.zeros(n_lines, dtype=np.uint32)
+    addrs = np.zeros(n_lines, dtype=np.uint32)
+    valid = np.zeros(n_lines, dtype=bool)
+    if n_lines == 0:
+        return hits, addrs, valid
+
+    # 각 바이트가 속한 라인 번호
+    line_of = np.empty(len(buf), dtype=np.int64)
+    line_of[0] = 0
+    np.cumsum(is_nl[:-1], out=line_of[1:])
+
+    is_digit = (buf >= 48) & (buf <= 57)
+    is_dot = buf == 46
+    is_space = (buf == 32) | (buf == 9) | (buf == 13)
+    bad_byte = ~(is_digit | is_dot | is_space | is_nl)
+
+    # 숫자 토큰 경계
+    prev_digit = np.concatenate(([False], is_digit[:-1]))
+    next_digit = np.concatenate((is_digit[1:], [False]))
+    tok_start = np.flatnonzero(is_digit & ~prev_digit)
+    tok_end = np.flatnonzero(is_digit & ~next_digit)
+    tok_len = tok_end - tok_start + 1
+    tok_line = line_of[tok_start]
+
+    # 토큰 값: 자리값(10^k)을 곱해 토큰별로 합산 (19자리 이상은 어차피 무효 처리)
+    digit_pos = np.flatnonzero(is_digit)
+    power = np.minimum(np.repeat(tok_end, tok_len) - digit_pos, 18)
+    digit_val = (buf[digit_pos] - 48).astype(np.int64) * _POW10[power]
+    tok_val = np.add.reduceat(digit_val, np.cumsum(tok_len) - tok_len) if len(tok_len) else tok_len
+    leading_zero = (buf[tok_start] == 48) & (tok_len > 1)
+
+    tok_count = np.bincount(tok_line, minlength=n_lines)
+    dot_count = np.bincount(line_of[is_dot], minlength=n_lines)
+    bad_count = np.bincount(line_of[bad_byte], minlength=n_lines)
+    candidate = (tok_count == 5) & (dot_count == 3) & (bad_count == 0)
+
+    # 후보 라인의 첫 토큰 번호: hits, a, b, c, d 순서
+    first_tok = (np.cumsum(tok_count) - tok_count)[candidate]
+    lines = np.flatnonzero(candidate)
+
+    t_hits = first_tok
+    ok = (tok_len[t_hits] <= 10) & (tok_val[t_hits] <= UINT32_MAX)
+
+    addr = np.zeros(len(lines), dtype=np.int64)
+    for k in range(1, 5):
+        t = first_tok + k
+        ok &= (tok_len[t] <= 3) & (tok_val[t] <= 255) & ~leading_zero[t]
+        if k < 4:
+            # 옥텟 바로 뒤가 '.' 이고 그 다음 바이트에서 다음 옥텟이 시작해야 함
+            ok &= (buf[tok_end[t] + 1] == 46) & (tok_start[t + 1] == tok_end[t] + 2)
+        addr = (addr << 8) | np.minimum(tok_val[t], 255)
+
+    lines = lines[ok]
+    hits[lines] = tok_val[t_hits][ok]
+    addrs[lines] = addr[ok]
+    valid[lines] = True
+    return hits, addrs, valid
+
+
+def iter_hit_chunks(path, chunk_size=CHUNK_SIZE):
+    """파일을 라인 경계에 맞춘 chunk_size 단위로 읽어 parse_hit_buffer 결과를 생성"""
+    with open(path, 'rb') as f:
+        rest = b''
+        while True:
+            block = f.read(chunk_size)
+            if not block:
+                break
+            block = rest + block
+            cut = block.rfind(b'\n') + 1
+            if cut == 0:
+                rest = block
+                continue
+            rest = block[cut:]
+            yield parse_hit_buffer(block[:cut])
+        if rest:
+            yield parse_hit_buffer(rest)
+
+
+def load_hit_file(path, chunk_size=CHUNK_SIZE):
+    """w55_ip.txt 형식 파일 전체를 (hits, addrs, valid) uint32/bool 배열로 읽음"""
+    chunks = list(iter_hit_chunks(path, chunk_size))
+    if not chunks:
+        empty = np.zeros(0, dtype=np.uint32)
+        return empty, empty.copy(), np.zeros(0, dtype=bool)
+    hits, addrs, valid = zip(*chunks)
+    return np.concatenate(hits), np.concatenate(addrs), np.concatenate(valid)
+
+
+def network_bitmap(index):
+    """NetworkIndex 의 /16 비트맵을 numpy bool 배열로"""
+    return np.frombuffer(bytes(index.bitmap), dtype=np.uint8).astype(bool)
+
+
+def classify_batch(hits, addrs, valid, index=None, min_hits=0):
+    """배열 단위 분류. B클래스/임계값/ASN 구간 포함 여부 마스크와 /16 번호를 반환"""
+    net16 = addrs >> 16
+    b_class = valid & ((addrs >> 30) == B_CLASS_TOP_BITS)
+    selected = b_class & (hits >= min_hits)
+    if index is None:
+        matched = selected.copy()
+    else:
+        matched = selected & network_bitmap(index)[net16]
+    return {
+        'net16': net16,
+        'b_class': b_class,
+        'selected': selected,
+        'matched': matched,
+    }
+
+
+def network_totals(net16, hits, mask):
+    """mask 에 해당하는 행을 /16 65,536칸에 대해 (히트 합계, 행 수)로 집계"""
+    nets = net16[mask]
+    totals = np.bincount(nets, weights=hits[mask], minlength=network_index.NETWORK16_COUNT)
+    counts = np.bincount(nets, minlength=network_index.NETWORK16_COUNT)
+    return totals.astype(np.int64), counts
+
+
+def top_networks(totals, n=10):
+    """집계 배열에서 상위 n개 /16 을 Counter 로 (문자열 키는 상위 n개만 생성)"""
+    nonzero = np.flatnonzero(totals)
+    if len(nonzero) > n:
+        nonzero = nonzero[np.argpartition(totals[nonzero], -n)[-n:]]
+    return Counter({format_network16(int(net)): int(totals[net]) for net in nonzero})
+
+
+def batch_stats(path, min_hits=1000, index=None):
+    """test_top.print_b_class_ips 의 stats 와 같은 값을 배열 연산으로 계산"""
+    hits, addrs, valid = load_hit_file(path)
+    result = classify_batch(hits, addrs, valid, index, min_hits)
+    totals, _ = network_totals(result['net16'], hits, result['matched'])
+    return {
+        'total_lines': len(hits),
+        'matched_count': int(np.count_nonzero(result['matched'])),
+        'total_hits': int(hits[result['selected']].sum(dtype=np.int64)),
+        'networks': totals,
+    }
+
+
+if __name__ == "__main__":
+    input_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.getcwd(), 'w55_ip.txt')
+    min_hits = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    start = time.perf_counter()
+    index = network_index.load_network_index_cached()
+    stats = batch_stats(input_file, min_hits, index)
+    elapsed = time.perf_counter() - start
+
+    print(f"Total processed lines: {stats['total_lines']:,}")
+    print(f"Matched networks: {stats['matched_count']:,}")
+    print(f"Total hits: {stats['total_hits']:,}")
+    print("\nTop 10 Matched Networks by Hits:")
+    print("-" * 40)
+    for network, hit_count in top_networks(stats['networks'], 10).most_common(10):
+        print(f"{network}: {hit_count:,} hits")
+    print(f"\nElapsed: {elapsed:.3f}s ({stats['total_lines'] / elapsed:,.0f} lines/sec)")
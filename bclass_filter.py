@@ -0,0 +1,206 @@
+import json
+import os
+from collections import namedtuple
+
+from hit_reader import HitReader
+from instrument import NO_STAGES, PROGRESS_CHECK, Progress
+from ip_parse import format_network6, parse_ipv4, parse_ipv6
+from output_sink import BatchWriter
+from prefix_table import PrefixTable, b_class_rules, classify_addr, is_b_class_rules
+
+# B클래스: 첫 옥텟 128~191 == 상위 2비트가 '10'
+B_CLASS_TOP_BITS = 0b10
+
+# /16 네트워크 번호 -> "a.b.0.0/16" 문자열 캐시 (최대 65,536개)
+_NETWORK_STR = {}
+
+# IPv4 집계 규칙: 기본은 B클래스(128.0.0.0/2)를 /16 으로 집계. configure_ipv4 로 다른 CIDR 규칙 세트 지정
+V4_RULES = b_class_rules()
+# V4_RULES 가 기본 B클래스 규칙이면 테이블 조회 대신 상위 2비트 검사 + /16 문자열 캐시로 처리
+# (규칙이 상위 2비트만 보고 길이 16 으로 집계하므로 결과가 같음. bench_filter.py prefix 에서 전수 확인)
+V4_FAST_PATH = True
+
+# IPv6 집계 규칙: 기본은 모든 주소(::/0)를 /48 로 집계. configure_ipv6 로 변경
+V6_PREFIX = 48
+V6_RULES = PrefixTable()
+V6_RULES.insert('::/0', V6_PREFIX)
+
+# 형식이 틀린 라인의 network 값 (output.txt 의 'Warning: Invalid line format')
+INVALID = 'INVALID'
+
+
+def format_network16(net):
+    network = _NETWORK_STR.get(net)
+    if network is None:
+        network = f"{net >> 8}.{net & 0xFF}.0.0/16"
+        _NETWORK_STR[net] = network
+    return network
+
+
+def configure_ipv4(rules=None):
+    """IPv4 분류 규칙 테이블(prefix_table.PrefixTable, 값 = 집계 길이)을 지정. None 이면 기본 B클래스"""
+    global V4_RULES, V4_FAST_PATH
+    if rules is None:
+        rules = b_class_rules()
+    V4_RULES = rules
+    V4_FAST_PATH = is_b_class_rules(rules)
+
+
+def classify_ipv4(addr):
+    """V4_RULES 에 매칭되면 규칙의 집계 길이로 'a.b.0.0/16' 형식, 아니면 None"""
+    if V4_FAST_PATH:
+        return format_network16(addr >> 16) if (addr >> 30) == B_CLASS_TOP_BITS else None
+    return classify_addr(V4_RULES, addr)
+
+
+def configure_ipv6(prefix=V6_PREFIX, rules=None):
+    """IPv6 집계 프리픽스(/32, /48, /64 ...) 또는 규칙 테이블(값 = 집계 길이)을 지정"""
+    global V6_RULES
+    if rules is None:
+        rules = PrefixTable()
+        rules.insert('::/0', prefix)
+    V6_RULES = rules
+
+
+def classify_ipv6(ip):
+    """V6_RULES 에 매칭되면 규칙의 집계 길이로 '2001:db8::/48' 형식, 아니면 None"""
+    addr = parse_ipv6(ip)
+    if addr is None:
+        return None
+    length = V6_RULES.lookup6(addr)
+    if length is None:
+        return None
+    return format_network6(addr >> (128 - length), length)
+
+
+def classify_ip(ip):
+    """IPv4 면 V4_RULES(기본 B클래스 -> 'a.b.0.0/16'), IPv6 면 V6_RULES 집계 네트워크, 그 외(잘못된 IP 포함) None"""
+    addr = parse_ipv4(ip)
+    if addr is None:
+        return classify_ipv6(ip)
+    return classify_ipv4(addr)
+
+
+def classify_line(line):
+    """'count ip' 한 줄을 (ip, network) 레코드로 변환. 빈 줄이면 None
+
+    network 는 'a.b.0.0/16', B클래스가 아니면 None, 형식이 틀린 라인이면 INVALID
+    (이때 ip 자리에는 원본 라인이 들어감)
+    """
+    parts = line.split()
+    if not parts:
+        return None
+    if len(parts) != 2:
+        return line.strip(), INVALID
+
+    ip = parts[1]
+    return ip, classify_ip(ip)
+
+
+def format_record(record):
+    """(ip, network) 레코드를 output.txt 형식의 한 줄로"""
+    ip, network = record
+    if network is None:
+        return f"{ip} -> NONE\n"
+    if network is INVALID:
+        return f"Warning: Invalid line format: {ip}\n"
+    return f"{ip} -> {network}\n"
+
+
+def format_record_tsv(record):
+    """(ip, network) 레코드를 'ip<TAB>network' 한 줄로 (network 는 NONE / INVALID 포함)"""
+    ip, network = record
+    if network is INVALID:
+        # 원본 라인 안의 탭은 열 구분과 섞이지 않게 공백으로
+        line = ip.replace('\t', ' ')
+        return f"{line}\t{INVALID}\n"
+    return f"{ip}\t{network or 'NONE'}\n"
+
+
+def format_record_jsonl(record):
+    """(ip, network) 레코드를 JSON 한 줄로 (형식이 틀린 라인은 원본과 error)"""
+    ip, network = record
+    if network is INVALID:
+        return json.dumps({'line': ip, 'error': 'invalid line format'}) + "\n"
+    return json.dumps({'ip': ip, 'network': network}) + "\n"
+
+
+# 형식별 output.txt 라인 조각: IPv4 라인은 prefix + ip + (separator + 네트워크 + suffix | none_suffix)
+# 로 바로 만들고, 그 밖의 레코드(IPv6, 형식 오류)는 record 함수로
+RecordFormat = namedtuple('RecordFormat', ['prefix', 'separator', 'suffix', 'none_suffix', 'record'])
+RECORD_FORMATS = {
+    'text': RecordFormat('', ' -> ', '\n', ' -> NONE\n', format_record),
+    'tsv': RecordFormat('', '\t', '\n', '\tNONE\n', format_record_tsv),
+    'jsonl': RecordFormat('{"ip": "', '", "network": "', '"}\n', '", "network": null}\n',
+                          format_record_jsonl),
+}
+
+
+def iter_records(lines):
+    for line in lines:
+        record = classify_line(line)
+        if record is not None:
+            yield record
+
+
+def filter_file(input_file, output_file, progress_every=PROGRESS_CHECK, exclude=None,
+                stages=NO_STAGES, output_format='text', threaded_writer=False, columnar=None):
+    """input_file 을 한 번만 스트리밍하여 output_file 에 결과 기록. 처리한 라인 수 반환
+
+    hit_reader 로 bytes 상태에서 파싱하고, IPv4 가 아닌 라인(IPv6 포함)만 문자열로 디코딩해 처리.
+    exclude(ipset.IPSet 등 IPv4 정수 컨테이너)에 든 IP 의 라인은 결과에서 뺀다.
+    progress_every 라인마다 시계를 확인해 instrument.PROGRESS_INTERVAL 초 간격으로 진행 상황 출력 (0 이면 끔).
+    결과는 output_format(text | tsv | jsonl) 형식으로 output_sink.BatchWriter 에 모아 배치로 기록
+    (threaded_writer 면 기록 스레드에서). stages(instrument.StageTimer)를 주면 parse / classify / write
+    단계 시간을 따로 재고 쓰기 처리량을 출력한다.
+    columnar(columnar.ColumnarWriter)를 주면 같은 패스에서 열 형식 파일에도 기록한다 (exclude 도 같이 적용)
+    """
+    count = 0
+    progress = Progress() if progress_every else None
+    check = progress_every or PROGRESS_CHECK
+    fmt = RECORD_FORMATS[output_format]
+    prefix, separator, suffix, none_suffix, record = fmt
+    fast = V4_FAST_PATH
+    with HitReader(input_file) as reader, open(output_file, 'w') as outfile:
+        with BatchWriter(outfile, threaded=threaded_writer, stages=stages) as writer:
+            write = writer.write
+            with stages.stage('classify'):
+                for offset, hits, addr, ip in stages.timed('parse', reader.records()):
+                    count += 1
+                    if count % check == 0:
+                        writer.flush()
+                        if progress is not None:
+                            progress(count)
+                    if columnar is not None and (exclude is None or addr is None or addr not in exclude):
+                        columnar.add(reader, offset, hits, addr, ip)
+
+                    if addr is None:
+                        if ip is not None and b':' in ip:
+                            text = ip.decode('utf-8', 'replace')
+                            write(record((text, classify_ipv6(text))))
+                        else:
+                            line = reader.line_at(offset).decode('utf-8', 'replace')
+                            write(record(classify_line(line)))
+                    elif exclude is not None and addr in exclude:
+                        continue
+                    elif not fast:
+                        network = classify_ipv4(addr)
+                        if network is None:
+                            write(f"{prefix}{ip.decode()}{none_suffix}")
+                        else:
+                            write(f"{prefix}{ip.decode()}{separator}{network}{suffix}")
+                    elif (addr >> 30) == B_CLASS_TOP_BITS:
+                        write(f"{prefix}{ip.decode()}{separator}{format_network16(addr >> 16)}{suffix}")
+                    else:
+                        write(f"{prefix}{ip.decode()}{none_suffix}")
+    stages.count('lines', reader.line_count)
+    stages.count('parse errors', reader.error_count)
+    if stages is not NO_STAGES:
+        print(writer.summary())
+    return reader.line_count
+
+
+if __name__ == "__main__":
+    input_file = os.path.join(os.getcwd(), 'ppom_bclass.txt')
+    output_file = os.path.join(os.getcwd(), 'output.txt')
+    filter_file(input_file, output_file)
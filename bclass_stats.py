@@ -0,0 +1,129 @@
+import bclass_filter
+import instrument
+from aggregators import ExactCounter
+
+# analyze_output / parallel_filter / incremental / columnar 가 같이 쓰는 집계 상태와 stats.txt 기록
+# (CLI 스크립트를 import 하지 않도록 따로 둠)
+
+
+def new_stats(networks=None, unique=None, anomalies=None):
+    """networks: 네트워크별 집계기 (기본 정확 Counter, aggregators.make_aggregator 참고)
+    unique: 네트워크별 고유 IP 수를 추정할 hyperloglog.NetworkCardinality (None 이면 생략)
+    anomalies: interval 라인마다 네트워크별 카운트를 비교할 anomaly.EwmaDetector (None 이면 생략)
+    """
+    return {
+        'total_lines': 0,
+        'none_count': 0,
+        'bclass_count': 0,
+        'v6_count': 0,
+        'invalid_format': 0,
+        'bclass_networks': ExactCounter() if networks is None else networks,
+        'bclass_unique': unique,
+        'anomalies': anomalies
+    }
+
+
+def aggregate_records(records, stats=None, progress_every=instrument.PROGRESS_CHECK, sink=None):
+    """(ip, network) 레코드를 Counter 기반 통계에 누적. sink 가 있으면 output.txt 형식으로도 기록"""
+    if stats is None:
+        stats = new_stats()
+    progress = instrument.Progress('lines analyzed') if progress_every else None
+    count_network = stats['bclass_networks'].add
+    unique = stats['bclass_unique']
+    detector = stats.get('anomalies')
+
+    for ip, network in records:
+        # interval 라인마다 구간을 닫음 (마지막 구간은 다음 입력을 위해 열어 둠)
+        if detector is not None and stats['total_lines'] \
+                and stats['total_lines'] % detector.interval == 0:
+            detector.tick()
+        stats['total_lines'] += 1
+        if progress_every and stats['total_lines'] % progress_every == 0:
+            progress(stats['total_lines'])
+
+        if ip is None:
+            continue
+        if sink is not None:
+            sink.write(bclass_filter.format_record((ip, network)))
+
+        if network is None:
+            stats['none_count'] += 1
+        elif network is bclass_filter.INVALID:
+            stats['invalid_format'] += 1
+        else:
+            if ':' in network:
+                stats['v6_count'] += 1
+            else:
+                stats['bclass_count'] += 1
+            count_network(network)
+            if unique is not None:
+                unique.add(network, ip)
+            if detector is not None:
+                detector.add(network)
+
+    return stats
+
+
+def close_intervals(stats):
+    """입력 끝에서 마지막(부분) 구간을 닫아 점수를 매김. aggregate_records 는 다음 구간이
+    시작될 때만 tick() 하므로, 한 번 실행하고 끝나는 분석은 write_stats 전에 한 번 부른다
+    """
+    detector = stats.get('anomalies')
+    if detector is not None:
+        detector.tick()
+    return stats
+
+
+def merge_stats(stats, other):
+    """other 의 카운트를 stats 에 합침. Counter 는 순서대로 update 하므로 병합 순서가 결과 순서"""
+    for key in ('total_lines', 'none_count', 'bclass_count', 'v6_count', 'invalid_format'):
+        stats[key] += other[key]
+    stats['bclass_networks'].update(other['bclass_networks'])
+    if other.get('bclass_unique') is not None:
+        if stats.get('bclass_unique') is None:
+            stats['bclass_unique'] = type(other['bclass_unique'])()
+        stats['bclass_unique'].update(other['bclass_unique'])
+    return stats
+
+
+def write_stats(stats, stats_file):
+    # 통계 파일 작성
+    with open(stats_file, 'w') as f:
+        f.write("=== Analysis Results ===\n")
+        f.write(f"Total lines analyzed: {stats['total_lines']:,}\n")
+        f.write(f"Invalid format lines: {stats['invalid_format']:,}\n")
+        f.write(f"NONE results: {stats['none_count']:,}\n")
+        f.write(f"B-class networks found: {stats['bclass_count']:,}\n")
+        if stats['v6_count']:
+            f.write(f"IPv6 networks found: {stats['v6_count']:,}\n")
+        f.write("\n")
+
+        f.write("=== Top B-class Networks ===\n")
+        networks = stats['bclass_networks']
+        if hasattr(networks, 'error_bound'):
+            f.write(f"(approximate: {type(networks).__name__}, "
+                    f"error <= {networks.error_bound():,.0f})\n")
+        unique = stats.get('bclass_unique')
+        for network, count in networks.most_common(200):
+            if unique is None:
+                f.write(f"{network}: {count:,} occurrences\n")
+            else:
+                f.write(f"{network}: {count:,} occurrences, ~{unique.estimate(network):,} unique IPs\n")
+
+        detector = stats.get('anomalies')
+        if detector is not None:
+            f.write("\n=== Anomalous Networks ===\n")
+            f.write(f"(EWMA alpha {detector.alpha:g}, score >= {detector.threshold:g}, "
+                    f"{detector.interval:,} lines per interval)\n")
+            for network, score, count, mean, tick in detector.ranked_alerts(200):
+                f.write(f"{network}: score {score:.1f}, {count:,} in interval {tick:,} "
+                        f"(baseline {mean:.1f})\n")
+
+        # 백분율 계산
+        f.write("\n=== Percentages ===\n")
+        # 빈 입력이면 0.00%
+        total = stats['total_lines'] or 1
+        f.write(f"NONE results: {(stats['none_count']/total*100):.2f}%\n")
+        f.write(f"B-class networks: {(stats['bclass_count']/total*100):.2f}%\n")
+        if stats['v6_count']:
+            f.write(f"IPv6 networks: {(stats['v6_count']/total*100):.2f}%\n")
@@ -0,0 +1,833 @@
+import argparse
+import contextlib
+import filecmp
+import inspect
+import io
+import ipaddress
+import os
+import sys
+import tempfile
+import time
+
+import bclass_filter
+from aggregators import AGGREGATORS, make_aggregator
+from hit_reader import HitReader
+from ip_parse import format_ipv4, parse_ipv4
+
+
+def legacy_filter_b_class_ranges(input_file, output_file):
+    """기존 test_ppom_bclass.filter_b_class_ranges (2회 읽기 + ipaddress) 비교용 사본"""
+    def is_valid_ip(ip):
+        try:
+            ipaddress.ip_address(ip)
+            return True
+        except ValueError:
+            return False
+
+    def is_b_class(ip):
+        try:
+            first_octet = int(ip.split('.')[0])
+            return 128 <= first_octet <= 191
+        except:
+            return False
+
+    valid_ips = set()
+    with open(input_file, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            parts = ' '.join(line.split()).split()
+            if len(parts) != 2:
+                continue
+            ip = parts[1].strip()
+            if is_valid_ip(ip):
+                valid_ips.add(ip)
+
+    count = 0
+    with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
+        for line in infile:
+            count += 1
+            if count % 1000 == 0:
+                print(f"Processing... {count} lines completed")
+
+            line = line.strip()
+            if not line:
+                continue
+
+            parts = ' '.join(line.split()).split()
+            if len(parts) != 2:
+                outfile.write(f"Warning: Invalid line format: {line}\n")
+                continue
+
+            ip = parts[1].strip()
+
+            if not is_valid_ip(ip):
+                result = f"{ip} -> NONE\n"
+            elif ip not in valid_ips:
+                result = f"{ip} -> NONE\n"
+            elif is_b_class(ip):
+                network = f"{ip.rsplit('.', 2)[0]}.0.0/16"
+                result = f"{ip} -> {network}\n"
+            else:
+                result = f"{ip} -> NONE\n"
+            outfile.write(result)
+    return count
+
+
+def count_lines(path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+
+def run(name, func, input_file, output_file, lines, repeat):
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func(input_file, output_file)
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<14} {best:8.3f}s  {lines / best:>12,.0f} lines/sec")
+    return best
+
+
+def bench_filter(input_file='ppom_bclass.txt', repeat=3):
+    lines = count_lines(input_file)
+    print(f"Input: {input_file} ({lines:,} lines, best of {repeat})")
+    print("-" * 52)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_out = os.path.join(tmp, 'legacy_output.txt')
+        engine_out = os.path.join(tmp, 'engine_output.txt')
+
+        legacy = run('legacy', legacy_filter_b_class_ranges, input_file, legacy_out, lines, repeat)
+        engine = run('bclass_filter', bclass_filter.filter_file, input_file, engine_out, lines, repeat)
+
+        same = filecmp.cmp(legacy_out, engine_out, shallow=False)
+
+    print("-" * 52)
+    print(f"Speedup: {legacy / engine:.2f}x")
+    print(f"Output identical: {same}")
+
+
+def bench_prefix(input_file='ppom_bclass.txt', naive_sample=500):
+    """PrefixTable(16-8-8 stride) 조회 vs ipaddress.ip_network 선형 탐색"""
+    import network_index
+    import prefix_table
+
+    table = prefix_table.network_index_rules(network_index.load_network_index())
+    table.insert('128.0.0.0/2', 2)
+    networks = [ipaddress.ip_network(prefix_table.format_cidr(addr, length))
+                for addr, length in table.rules]
+
+    with open(input_file, 'r') as f:
+        addrs = [parse_ipv4(line.split()[-1]) for line in f if line.split()]
+    addrs = [addr for addr in addrs if addr is not None]
+    print(f"Rules: {len(table):,}, lookups: {len(addrs):,}")
+    print("-" * 52)
+
+    start = time.perf_counter()
+    table.compile()
+    print(f"{'compile':<14} {time.perf_counter() - start:8.3f}s")
+
+    lookup = table.lookup
+    start = time.perf_counter()
+    for addr in addrs:
+        lookup(addr)
+    elapsed = time.perf_counter() - start
+    print(f"{'lookup':<14} {elapsed:8.3f}s  {len(addrs) / elapsed:>12,.0f} lookups/sec")
+
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is not None:
+        batch = np.array(addrs, dtype=np.uint32)
+        start = time.perf_counter()
+        table.lookup_ids(batch)
+        elapsed = time.perf_counter() - start
+        print(f"{'lookup_ids':<14} {elapsed:8.3f}s  {len(addrs) / elapsed:>12,.0f} lookups/sec")
+
+    sample = addrs[:naive_sample]
+    start = time.perf_counter()
+    for addr in sample:
+        ip = ipaddress.ip_address(addr)
+        best = None
+        for network in networks:
+            if ip in network and (best is None or network.prefixlen > best.prefixlen):
+                best = network
+    elapsed = time.perf_counter() - start
+    print(f"{'naive scan':<14} {elapsed:8.3f}s  {len(sample) / elapsed:>12,.0f} lookups/sec"
+          f"  ({len(sample):,} sampled)")
+
+    mismatches = b_class_cross_check()
+    print(f"{'b-class check':<14} {'OK' if not mismatches else f'{len(mismatches):,} mismatches'}"
+          f"  (fast path vs b_class_rules(), all /16)")
+    for addr, fast, expected in mismatches[:10]:
+        print(f"  {format_ipv4(addr)}: fast path {fast!r}, table {expected!r}")
+    if mismatches:
+        sys.exit(1)
+
+
+def b_class_cross_check():
+    """bclass_filter 의 비트 검사 fast path 와 b_class_rules() 테이블 조회가 같은 결과인지 확인
+
+    65,536 개 /16 전부에 대해 첫 주소와 마지막 주소를 비교한다. 불일치 목록 반환
+    """
+    import prefix_table
+
+    table = prefix_table.b_class_rules()
+    mismatches = []
+    for high in range(1 << 16):
+        for addr in (high << 16, (high << 16) | 0xFFFF):
+            fast = (bclass_filter.format_network16(addr >> 16)
+                    if (addr >> 30) == bclass_filter.B_CLASS_TOP_BITS else None)
+            expected = prefix_table.classify_addr(table, addr)
+            if fast != expected:
+                mismatches.append((addr, fast, expected))
+    return mismatches
+
+
+def write_mixed_input(input_file, output_file, v6_ratio):
+    """input_file 의 IP 중 v6_ratio 비율을 IPv6 주소로 바꾼 파일 생성 (IPv4 로부터 결정적으로 만듦)"""
+    step = max(1, round(1 / v6_ratio)) if v6_ratio else 0
+    with open(input_file, 'r') as src, open(output_file, 'w') as dst:
+        for i, line in enumerate(src):
+            parts = line.split()
+            addr = parse_ipv4(parts[-1]) if len(parts) == 2 else None
+            if step and addr is not None and i % step == 0:
+                line = f"{parts[0]:>7} 2001:db8:{addr >> 16:x}:{addr & 0xFFFF:x}::{i & 0xFFFF:x}\n"
+            dst.write(line)
+
+
+def bench_mixed(input_file='ppom_bclass.txt', repeat=3):
+    """IPv4 전용 입력과 IPv4/IPv6 혼합 입력에서 bclass_filter.filter_file 처리량 비교"""
+    lines = count_lines(input_file)
+    print(f"Input: {input_file} ({lines:,} lines, best of {repeat})")
+    print("-" * 52)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, 'output.txt')
+        for ratio in (0, 0.1, 0.5):
+            mixed_file = os.path.join(tmp, f'mixed_{ratio}.txt')
+            write_mixed_input(input_file, mixed_file, ratio)
+            run(f'v6 {ratio:.0%}', bclass_filter.filter_file, mixed_file, output_file, lines, repeat)
+
+
+def scaled_hits(input_file, scale):
+    """(key, hits) 목록을 scale 배로 부풀림
+
+    각 /24 를 scale 개의 키로 복제하되 복제본마다 다른 줄의 히트 수를 붙여 (순환 이동)
+    복제본끼리 값이 같아지지 않게 한다.
+    """
+    keys = []
+    counts = []
+    with HitReader(input_file) as reader:
+        for hits, addr in reader:
+            keys.append(f"{addr >> 24}.{(addr >> 16) & 0xFF}.{(addr >> 8) & 0xFF}")
+            counts.append(hits)
+    n = len(keys)
+    stride = max(1, n // scale)
+    records = []
+    for replica in range(scale):
+        shift = replica * stride
+        shifted = counts[shift:] + counts[:shift]
+        records.extend(zip([f"{key}/{replica}" for key in keys], shifted))
+    return records
+
+
+def deep_size(obj, seen=None):
+    """컨테이너 안쪽까지 합친 대략적인 메모리 크기 (bytes)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__'):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def bench_topk(input_file='ppom_bclass.txt', scale=100, top=200):
+    """정확한 Counter 대비 heap / Space-Saving / Count-Min 의 메모리, 상위 top 재현율, 오차 비교"""
+    records = scaled_hits(input_file, scale)
+    print(f"Input: {input_file} x{scale} ({len(records):,} /24 records weighted by hits, top {top})")
+    print(f"{'aggregator':<12} {'time':>8} {'MiB':>8} {'keys':>10} {'recall':>7} {'max err':>8}")
+    print("-" * 58)
+
+    exact = None
+    for kind in AGGREGATORS:
+        aggregator = make_aggregator(kind, k=top if kind == 'heap' else 5 * top)
+        add = aggregator.add
+        start = time.perf_counter()
+        for key, hits in records:
+            add(key, hits)
+        elapsed = time.perf_counter() - start
+
+        result = aggregator.most_common(top)
+        if exact is None:
+            exact = dict(result)
+        recall = sum(key in exact for key, _ in result) / len(exact)
+        max_error = max((abs(count - exact[key]) / exact[key]
+                         for key, count in result if key in exact), default=0)
+        print(f"{kind:<12} {elapsed:7.2f}s {deep_size(aggregator) / 2**20:8.1f}"
+              f" {len(aggregator):>10,} {recall:7.1%} {max_error:8.2%}")
+
+
+def bench_columnar(input_file='ppom_bclass.txt', repeat=3):
+    """output.txt 문자열 파싱 집계 vs Parquet/Arrow 열 스캔 집계: 파일 크기와 분석 시간"""
+    import analyze_output
+    import columnar
+
+    print(f"Input: {input_file} (best of {repeat})")
+    print(f"{'format':<10} {'size':>12} {'analyze':>9}")
+    print("-" * 34)
+    with tempfile.TemporaryDirectory() as tmp:
+        text_file = os.path.join(tmp, 'output.txt')
+        bclass_filter.filter_file(input_file, text_file, progress_every=0)
+
+        def analyze_text():
+            with open(text_file) as f:
+                return analyze_output.aggregate_records(analyze_output.parse_output_lines(f),
+                                                        progress_every=0)
+
+        targets = [('text', text_file, analyze_text)]
+        for suffix in ('parquet', 'arrow'):
+            path = os.path.join(tmp, f'output.{suffix}')
+            columnar.write_columnar(input_file, path, progress_every=0)
+            targets.append((suffix, path, lambda path=path: columnar.columnar_stats(path)))
+
+        expected = None
+        for name, path, analyze in targets:
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                stats = analyze()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            top = stats['bclass_networks'].most_common(200)
+            if expected is None:
+                expected = top
+            note = "" if top == expected else "  (MISMATCH)"
+            print(f"{name:<10} {os.path.getsize(path):>12,} {best:8.3f}s{note}")
+
+
+def timed_events(input_file, rate=10000, jitter=2.0, start=1700000000.0):
+    """input_file 의 B클래스 히트를 초당 rate 개씩 도착하는 (timestamp, hits, /16) 이벤트로 (일부는 jitter 초 늦게)"""
+    import random
+
+    rng = random.Random(0)
+    events = []
+    with HitReader(input_file) as reader:
+        for i, (hits, addr) in enumerate(reader):
+            if (addr >> 30) != bclass_filter.B_CLASS_TOP_BITS:
+                continue
+            ts = start + i / rate
+            if rng.random() < 0.05:
+                ts -= rng.uniform(0, jitter)
+            events.append((ts, hits, addr >> 16))
+    return events
+
+
+def bench_window(input_file='ppom_bclass.txt', repeat=3):
+    """WindowedCounter 처리량: tumbling / sliding 창, 파싱 포함 여부별 events/sec"""
+    import windowed
+
+    events = timed_events(input_file) * 10
+    # 반복본이 이어지도록 시각을 밀어줌
+    span = events[len(events) // 10 - 1][0] - events[0][0] + 1
+    events = [(ts + span * (i * 10 // len(events)), hits, net)
+              for i, (ts, hits, net) in enumerate(events)]
+    lines = [f"{ts:.3f} {hits} {net >> 8}.{net & 0xFF}.1.1\n" for ts, hits, net in events]
+    print(f"Input: {input_file} ({len(events):,} timed B-class events, best of {repeat})")
+    print("-" * 60)
+
+    def aggregate(window, slide):
+        counter = windowed.WindowedCounter(window, slide, grace=5)
+        add = counter.add
+        for ts, hits, net in events:
+            add(ts, net, hits)
+        counter.flush()
+
+    def parse_and_aggregate(window, slide):
+        for _ in windowed.iter_windows(lines, window, slide, grace=5):
+            pass
+
+    for name, func, window, slide in (('tumbling 60s', aggregate, 60, 60),
+                                      ('sliding 1h/1m', aggregate, 3600, 60),
+                                      ('sliding 60s/10s', aggregate, 60, 10),
+                                      ('parse+tumbling', parse_and_aggregate, 60, 60)):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(window, slide)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:<16} {best:8.3f}s  {len(events) / best:>12,.0f} events/sec")
+
+
+def bench_ipset(input_file='ppom_bclass.txt', members=1000000):
+    """IP 목록 membership: 문자열 set vs Bloom + 정렬 uint32 배열(ipset.IPSet) 의 메모리와 조회 속도"""
+    import random
+    import tracemalloc
+
+    import numpy as np
+
+    import ipset
+
+    rng = random.Random(0)
+    with HitReader(input_file) as reader:
+        probe = [addr for _, addr in reader]
+    # 목록의 절반은 입력에 나오는 IP, 나머지는 무작위
+    listed = probe[::2] + [rng.getrandbits(32) for _ in range(max(0, members - len(probe[::2])))]
+    listed = listed[:members]
+    probe_text = [format_ipv4(addr) for addr in probe]
+    print(f"{len(listed):,} listed IPs, {len(probe):,} lookups from {input_file}")
+    print(f"{'structure':<18} {'bytes/IP':>9} {'total MiB':>10} {'lookups/sec':>13}")
+    print("-" * 54)
+
+    def report(name, size, lookups, elapsed):
+        print(f"{name:<18} {size / len(listed):9.1f} {size / 2**20:10.1f} {lookups / elapsed:13,.0f}")
+
+    listed_text = [format_ipv4(addr) for addr in listed]
+    tracemalloc.start()
+    strings = set(listed_text)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # set 이 가리키는 문자열 자체도 포함 (목록 파일에서 읽으면 set 만 남으므로)
+    size += sum(sys.getsizeof(text) for text in listed_text)
+    del listed_text
+    start = time.perf_counter()
+    expected = [text in strings for text in probe_text]
+    report('set of strings', size, len(probe), time.perf_counter() - start)
+    del strings
+
+    for rate in (0.01, 0.001):
+        ips = ipset.IPSet(np.array(listed, dtype=np.uint32), rate)
+        start = time.perf_counter()
+        found = [addr in ips for addr in probe]
+        report(f'IPSet p={rate:g}', ips.memory_bytes(), len(probe), time.perf_counter() - start)
+        assert found == expected
+
+    probe_array = np.array(probe, dtype=np.uint32)
+    start = time.perf_counter()
+    found = ips.contains_many(probe_array)
+    report('  contains_many', ips.memory_bytes(), len(probe), time.perf_counter() - start)
+    assert found.tolist() == expected
+
+
+# ipaddress 와 결과가 갈리기 쉬운 경계 사례 (선행 0, 공백, 부호, 비ASCII 숫자, 길이 초과 등)
+IPV4_EDGE_CASES = [
+    '', '.', '...', '0.0.0.0', '1.2.3.4', '255.255.255.255', '256.0.0.0', '1.2.3.256',
+    '01.2.3.4', '1.2.3.04', '00.0.0.0', '1.2.3.00', '0x1.2.3.4', '1e2.2.3.4', '1_0.2.3.4',
+    '+1.2.3.4', '-1.2.3.4', '1.2.3.-4', ' 1.2.3.4', '1.2.3.4 ', '1.2.3.4\n', '1 .2.3.4',
+    '1.2.3', '1.2.3.4.5', '1..2.3', '.1.2.3', '1.2.3.', '1.2.3.4/32', '::1', '::ffff:1.2.3.4',
+    '\u0661.2.3.4', '1.2.3.\u0664', '\uff11.2.3.4', '1.2.3.4\x00', '1.2\x00.3.4',
+    '999.999.999.999', '123.123.123.1234', '1.2.3.4444444444', '12345678901234567',
+    '192.168.000.1', '0.0.0.255', '10.0.0.1%eth0',
+]
+
+
+def _ipaddress_v4(text):
+    try:
+        return int(ipaddress.IPv4Address(text))
+    except ValueError:
+        return None
+
+
+def ipv4_cross_check(samples=200000, seed=0):
+    """parse_ipv4(str/bytes) 와 parse_ipv4_many 가 ipaddress.IPv4Address 와 같은 결과인지 확인
+
+    경계 사례와 '0123456789.' 로 만든 무작위 문자열(절반은 올바른 주소)을 비교한다. 불일치 목록 반환
+    """
+    import random
+
+    from ip_parse import format_ipv4, parse_ipv4_many
+
+    rng = random.Random(seed)
+    texts = list(IPV4_EDGE_CASES)
+    for i in range(samples):
+        if i % 2:
+            texts.append(format_ipv4(rng.getrandbits(32)))
+        else:
+            texts.append(''.join(rng.choice('0123456789.') for _ in range(rng.randint(1, 17))))
+
+    mismatches = []
+    expected = [_ipaddress_v4(text) for text in texts]
+    for text, want in zip(texts, expected):
+        got = parse_ipv4(text)
+        if got != want:
+            mismatches.append(('parse_ipv4', text, got, want))
+        try:
+            data = text.encode('ascii')
+        except UnicodeEncodeError:
+            continue
+        got = parse_ipv4(data)
+        if got != want:
+            mismatches.append(('parse_ipv4 bytes', text, got, want))
+
+    addrs, valid = parse_ipv4_many(texts)
+    for text, addr, ok, want in zip(texts, addrs.tolist(), valid.tolist(), expected):
+        # numpy 고정폭 문자열은 끝의 NUL 을 잃음 (parse_ipv4_many 설명 참고)
+        if (addr if ok else None) != want and not text.endswith('\x00'):
+            mismatches.append(('parse_ipv4_many', text, addr if ok else None, want))
+    return mismatches
+
+
+def bench_ipparse(input_file='ppom_bclass.txt', repeat=3):
+    """IPv4 검증: ipaddress 예외 방식 vs parse_ipv4(str/bytes) vs parse_ipv4_many, 잘못된 주소 비율별"""
+    from ip_parse import parse_ipv4_many
+
+    mismatches = ipv4_cross_check()
+    print(f"Cross-check against ipaddress: {len(mismatches)} mismatches")
+    for mismatch in mismatches[:10]:
+        print(f"  {mismatch}")
+    if mismatches:
+        sys.exit(1)
+
+    with open(input_file, 'r') as f:
+        valid_ips = [line.split()[-1] for line in f if line.split()]
+    invalid_ips = [f"{ip}.{i % 7}" if i % 3 == 0 else ip.replace('.', '..', 1) if i % 3 == 1
+                   else f"0{ip}" for i, ip in enumerate(valid_ips)]
+    print(f"{len(valid_ips):,} addresses from {input_file}, best of {repeat}")
+    print(f"{'method':<18} {'valid':>12} {'50% invalid':>12} {'invalid':>12}  (addresses/sec)")
+    print("-" * 60)
+
+    def legacy(ips):
+        for ip in ips:
+            try:
+                ipaddress.ip_address(ip)
+            except ValueError:
+                pass
+
+    def scalar(ips):
+        for ip in ips:
+            parse_ipv4(ip)
+
+    methods = [('ipaddress', legacy, str), ('parse_ipv4 str', scalar, str),
+               ('parse_ipv4 bytes', scalar, bytes), ('parse_ipv4_many', parse_ipv4_many, str),
+               ('  (bytes)', parse_ipv4_many, bytes)]
+    mixes = [valid_ips, [v if i % 2 else b for i, (v, b) in enumerate(zip(valid_ips, invalid_ips))],
+             invalid_ips]
+    for name, func, kind in methods:
+        rates = []
+        for ips in mixes:
+            if kind is bytes:
+                ips = [ip.encode() for ip in ips]
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                func(ips)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            rates.append(len(ips) / best)
+        print(f"{name:<18} " + " ".join(f"{rate:12,.0f}" for rate in rates))
+
+
+def write_replayed_stream(input_file, output_file, seed=0):
+    """input_file 의 각 IP 를 히트 수만큼 반복해 섞은 '1 ip' 스트림 생성 (정렬 안 된 원본 로그 재현). 줄 수 반환"""
+    import random
+
+    stream = []
+    with HitReader(input_file) as reader:
+        for hits, addr in reader:
+            stream.extend([addr] * hits)
+    random.Random(seed).shuffle(stream)
+    with open(output_file, 'w') as f:
+        f.writelines(f"      1 {format_ipv4(addr)}\n" for addr in stream)
+    return len(stream)
+
+
+def bench_cache(input_file='ppom_bclass.txt', repeat=3):
+    """test_top.print_b_class_ips 를 재생 스트림에 돌려 캐시 없음 / LRU / CLOCK 크기별 처리량과 적중률 비교"""
+    import shutil
+
+    import test_top
+
+    input_file = os.path.abspath(input_file)
+    csv_file = os.path.join(os.path.dirname(input_file), 'country_asn222.csv')
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        lines = write_replayed_stream(input_file, os.path.join(tmp, 'ppom_bclass.txt'))
+        shutil.copy(csv_file, tmp)
+        print(f"Replayed stream: {lines:,} lines from {input_file} (best of {repeat})")
+        print(f"{'cache':<14} {'time':>8} {'lines/sec':>12} {'hit rate':>9} {'evictions':>10}")
+        print("-" * 58)
+        os.chdir(tmp)
+        try:
+            expected = None
+            for kind, size in [('none', 0), ('lru', 1024), ('lru', 16384), ('lru', 65536),
+                               ('clock', 1024), ('clock', 16384), ('clock', 65536)]:
+                best = None
+                for _ in range(repeat):
+                    with contextlib.redirect_stdout(io.StringIO()) as out:
+                        start = time.perf_counter()
+                        test_top.print_b_class_ips(1, cache_size=size,
+                                                   cache_kind=kind if size else 'lru')
+                        elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                with open(os.path.join('output', 'test_top_result.txt')) as f:
+                    result = [line for line in f if not line.startswith('Classification cache')]
+                if expected is None:
+                    expected = result
+                summary = out.getvalue().rsplit('Classification cache: ', 1)
+                rate = evictions = ''
+                if len(summary) == 2:
+                    fields = summary[1].split(', ')
+                    evictions = fields[2].split()[0]
+                    rate = fields[3].split()[0]
+                note = "" if result == expected else "  (MISMATCH)"
+                label = f"{kind} {size:,}" if size else kind
+                print(f"{label:<14} {best:7.3f}s {lines / best:12,.0f} {rate:>9} {evictions:>10}{note}")
+        finally:
+            os.chdir(cwd)
+
+
+def bench_mergejoin(input_file='ppom_bclass.txt', repeat=3):
+    """IP 별 히트 합과 구간 매칭: dict 집계 + 비트맵 조회 / 메모리 정렬 merge join / 외부 정렬 merge join 비교"""
+    import merge_join
+    import network_index
+
+    index = network_index.load_network_index_cached(network_index.NETWORK_FILE)
+    with HitReader(input_file) as reader:
+        records = list(reader)
+    # 외부 정렬이 run 4개 이상으로 나뉘도록 (최소 run 크기는 BLOCK_RECORDS)
+    external_limit = max(merge_join.BLOCK_RECORDS, len(records) // 4) * merge_join.RECORD_BYTES
+
+    def bitmap_probe():
+        totals = {}
+        get = totals.get
+        for hits, addr in records:
+            totals[addr] = get(addr, 0) + hits
+        contains = index.contains_addr
+        return sorted((addr, hits, contains(addr)) for addr, hits in totals.items())
+
+    def sorted_join(memory_limit):
+        with merge_join.SortedHits(memory_limit) as keys:
+            keys.feed(records)
+            result = [(addr, hits, range_id is not None)
+                      for addr, hits, range_id in merge_join.merge_join(keys, index)]
+            runs = len(keys.runs)
+        return result, runs
+
+    print(f"Input: {input_file} ({len(records):,} IPv4 records, best of {repeat})")
+    print(f"{'method':<26} {'time':>8} {'records/sec':>12} {'runs':>5}")
+    print("-" * 56)
+    expected = None
+    for name, func in [('dict + bitmap probe', lambda: (bitmap_probe(), 0)),
+                       ('merge join (memory)', lambda: sorted_join(merge_join.MEMORY_LIMIT)),
+                       ('merge join (external)', lambda: sorted_join(external_limit))]:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result, runs = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        if expected is None:
+            expected = result
+        note = "" if result == expected else "  (MISMATCH)"
+        print(f"{name:<26} {best:7.3f}s {len(records) / best:12,.0f} {runs:>5}{note}")
+
+
+def bench_compressed(input_file='ppom_bclass.txt', repeat=3):
+    """압축하지 않은 입력 대비 gzip/bz2/xz/zstd 입력의 filter_file 처리량 (압축 해제 방식별)"""
+    import bz2
+    import gzip
+    import lzma
+    import shutil
+    import subprocess
+
+    import compressed_input
+
+    lines = count_lines(input_file)
+    with open(input_file, 'rb') as f:
+        data = f.read()
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = [('plain', input_file)]
+        for name, compress in [('gzip', gzip.compress), ('bz2', bz2.compress),
+                               ('xz', lzma.compress)]:
+            path = os.path.join(tmp, f'input.{name}')
+            with open(path, 'wb') as f:
+                f.write(compress(data))
+            inputs.append((name, path))
+        if compressed_input._zstd is not None or shutil.which('zstd'):
+            path = os.path.join(tmp, 'input.zst')
+            subprocess.run(['zstd', '-q', '-f', input_file, '-o', path], check=True)
+            inputs.append(('zstd', path))
+
+        expected = os.path.join(tmp, 'expected.txt')
+        output = os.path.join(tmp, 'output.txt')
+        bclass_filter.filter_file(input_file, expected, progress_every=0)
+        print(f"Input: {input_file} ({lines:,} lines, {len(data) / 2**20:,.1f} MiB, best of {repeat})")
+        print(f"{'format':<8} {'mode':<8} {'size MiB':>9} {'time':>8} {'lines/sec':>12} {'MiB/sec':>8}")
+        print("-" * 60)
+        for name, path in inputs:
+            modes = ['-'] if name == 'plain' else compressed_input.DECOMPRESS_MODES
+            for mode in modes:
+                if mode != '-':
+                    compressed_input.configure(mode)
+                best = None
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    bclass_filter.filter_file(path, output, progress_every=0)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                note = "" if filecmp.cmp(output, expected, shallow=False) else "  (MISMATCH)"
+                print(f"{name:<8} {mode:<8} {os.path.getsize(path) / 2**20:9.1f} {best:7.3f}s "
+                      f"{lines / best:12,.0f} {len(data) / 2**20 / best:8.1f}{note}")
+        compressed_input.configure()
+
+
+def bench_writer(input_file='ppom_bclass.txt', repeat=3):
+    """결과 쓰기만 따로: 라인별 write() 와 BatchWriter(동기/스레드) 처리량, 형식별 filter_file 의 write 단계"""
+    import instrument
+    import output_sink
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'output.txt')
+        bclass_filter.filter_file(input_file, output, progress_every=0)
+        with open(output) as f:
+            lines = f.readlines()
+        size = sum(map(len, lines)) / 2**20
+
+        def write_lines(write, flush):
+            # filter_file 과 같은 모양의 루프 (라인마다 write, PROGRESS_CHECK 라인마다 flush)
+            for count, line in enumerate(lines, 1):
+                write(line)
+                if count % instrument.PROGRESS_CHECK == 0:
+                    flush()
+
+        def per_line():
+            with open(output, 'w') as f:
+                write_lines(f.write, lambda: None)
+
+        def batched(threaded):
+            with open(output, 'w') as f, output_sink.BatchWriter(f, threaded=threaded) as writer:
+                write_lines(writer.write, writer.flush)
+
+        print(f"Write only: {len(lines):,} lines, {size:,.1f} MiB (best of {repeat})")
+        print(f"{'method':<22} {'time':>8} {'lines/sec':>12} {'MiB/sec':>8}")
+        print("-" * 54)
+        for name, func in [('per-line write', per_line),
+                           ('BatchWriter', lambda: batched(False)),
+                           ('BatchWriter thread', lambda: batched(True))]:
+            best = min(timed_call(func) for _ in range(repeat))
+            print(f"{name:<22} {best:7.3f}s {len(lines) / best:12,.0f} {size / best:8.1f}")
+
+        print("\nfilter_file by format (write = time in the write stage)")
+        print(f"{'format':<8} {'writer':<7} {'total':>8} {'write':>8} {'classify':>9} {'MiB':>6}")
+        print("-" * 52)
+        for output_format in output_sink.OUTPUT_FORMATS:
+            for threaded in (False, True):
+                best = None
+                for _ in range(repeat):
+                    stages = instrument.StageTimer()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        start = time.perf_counter()
+                        bclass_filter.filter_file(input_file, output, progress_every=0,
+                                                  stages=stages, output_format=output_format,
+                                                  threaded_writer=threaded)
+                        elapsed = time.perf_counter() - start
+                    if best is None or elapsed < best[0]:
+                        best = (elapsed, stages.seconds['write'], stages.seconds['classify'])
+                print(f"{output_format:<8} {'thread' if threaded else 'sync':<7} {best[0]:7.3f}s "
+                      f"{best[1]:7.3f}s {best[2]:8.3f}s {os.path.getsize(output) / 2**20:6.1f}")
+
+
+def timed_call(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+# 직렬/병렬 결과 비교에 덧붙이는 라인: UTF-8 이 아닌 바이트, 형식 오류, IPv6, 개행 없는 마지막 줄
+PARALLEL_EDGE_LINES = (
+    b"      3 150.1.2.3\n",
+    b"      2 150.1.2.\xa0\n",
+    b"      1 \xff\xfe.1.2.3\n",
+    b"      4 bad line\xa0 x\n",
+    b"      5 2001:db8::\xa0\n",
+    b"      6 2001:db8::1\n",
+    b"      7 10.0.0.1",
+)
+
+
+def bench_parallel(input_file='ppom_bclass.txt', workers=4):
+    """직렬 filter_file 과 parallel_filter 결과(output.txt, 라인 수)가 같은지 확인. 다르면 종료 코드 1"""
+    import parallel_filter
+
+    with tempfile.TemporaryDirectory() as tmp:
+        edge_input = os.path.join(tmp, 'edge_input.txt')
+        with open(input_file, 'rb') as src, open(edge_input, 'wb') as dst:
+            dst.write(src.read())
+            dst.writelines(PARALLEL_EDGE_LINES)
+        failed = False
+        for path in (input_file, edge_input):
+            serial_out = os.path.join(tmp, 'serial.txt')
+            parallel_out = os.path.join(tmp, 'parallel.txt')
+            start = time.perf_counter()
+            serial_lines = bclass_filter.filter_file(path, serial_out, progress_every=0)
+            serial = time.perf_counter() - start
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                parallel_lines = parallel_filter.filter_file_parallel(path, parallel_out, workers)
+            parallel = time.perf_counter() - start
+            same = (serial_lines == parallel_lines
+                    and filecmp.cmp(serial_out, parallel_out, shallow=False))
+            failed = failed or not same
+            print(f"{os.path.basename(path):<20} {serial_lines:>10,} lines  serial {serial:7.3f}s  "
+                  f"workers={workers} {parallel:7.3f}s  {'identical' if same else 'MISMATCH'}")
+    if failed:
+        sys.exit(1)
+
+
+BENCHMARKS = {
+    'filter': bench_filter,
+    'prefix': bench_prefix,
+    'mixed': bench_mixed,
+    'topk': bench_topk,
+    'columnar': bench_columnar,
+    'window': bench_window,
+    'ipset': bench_ipset,
+    'ipparse': bench_ipparse,
+    'cache': bench_cache,
+    'mergejoin': bench_mergejoin,
+    'compressed': bench_compressed,
+    'writer': bench_writer,
+    'parallel': bench_parallel,
+}
+
+
+# 벤치마크 함수의 숫자 인자. 지정한 것만 그 인자를 받는 벤치마크에 넘김
+NUMERIC_OPTIONS = ('repeat', 'naive_sample', 'scale', 'top', 'members', 'workers')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='bclass 처리 단계별 벤치마크')
+    parser.add_argument('benchmark', nargs='?', choices=BENCHMARKS, default='filter')
+    parser.add_argument('input_file', nargs='?', default='ppom_bclass.txt')
+    parser.add_argument('value', nargs='?', type=int,
+                        help='벤치마크의 두 번째 인자 (예: topk 의 scale, ipset 의 members)')
+    for option in NUMERIC_OPTIONS:
+        parser.add_argument(f"--{option.replace('_', '-')}", type=int)
+    args = parser.parse_args()
+
+    bench = BENCHMARKS[args.benchmark]
+    params = list(inspect.signature(bench).parameters)
+    kwargs = {'input_file': args.input_file}
+    if args.value is not None:
+        kwargs[params[1]] = args.value
+    for option in NUMERIC_OPTIONS:
+        value = getattr(args, option)
+        if value is None:
+            continue
+        if option not in params:
+            parser.error(f"{args.benchmark} does not take --{option.replace('_', '-')}")
+        kwargs[option] = value
+    bench(**kwargs)
@@ -0,0 +1,251 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import gen_hits
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_FILE = 'bench_results.jsonl'
+DEFAULT_SIZES = '10k,100k,1m'
+
+# (이름, 스크립트 인자, 필요한 선택 모듈). 앞 단계 결과(output.txt, output.parquet)를 쓰는 대상이 있으므로 순서대로 실행
+TARGETS = [
+    ('filter', ['test_ppom_bclass.py'], ()),
+    ('filter-workers', ['test_ppom_bclass.py', '--workers', '{workers}'], ()),
+    ('top', ['test_top.py'], ()),
+    ('analyze', ['analyze_output.py'], ()),
+    ('analyze-stream', ['analyze_output.py', '--stream'], ()),
+    ('analyze-unique', ['analyze_output.py', '--stream', '--unique'], ()),
+    ('batch', ['bclass_batch.py', 'ppom_bclass.txt'], ('numpy',)),
+    ('incremental', ['incremental.py', 'ppom_bclass.txt'], ()),
+    ('columnar-export', ['columnar.py', 'ppom_bclass.txt', 'output.parquet'], ('pyarrow',)),
+    ('analyze-columnar', ['analyze_output.py', '--columnar', 'output.parquet'], ('pyarrow',)),
+]
+
+
+def _available(module):
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+def git_commit():
+    """현재 커밋 해시 (작업 트리에 변경이 있으면 '-dirty'). git 이 없으면 None"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               cwd=SCRIPT_DIR, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-dirty" if dirty else commit
+
+
+# 자식 프로세스에서 대상 스크립트를 __main__ 으로 실행하고, 끝날 때 /proc/self/status 의 VmHWM(최대 RSS)을 기록.
+# fork 후 exec 한 자식의 ru_maxrss 에는 exec 전 부모 메모리가 섞이므로 리눅스에서는 이 값을 쓴다.
+_RUNNER = """
+import atexit, os, runpy, sys
+def _peak_rss(path=os.environ['BENCH_RSS_FILE']):
+    with open('/proc/self/status') as f:
+        peak = next(line.split()[1] for line in f if line.startswith('VmHWM:'))
+    with open(path, 'w') as f:
+        f.write(peak)
+atexit.register(_peak_rss)
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+runpy.run_path(sys.argv[0], run_name='__main__')
+"""
+
+
+def run_script(args, cwd):
+    """스크립트를 자식 프로세스로 한 번 실행. (경과 초, 최대 RSS KiB, 종료 코드)
+
+    최대 RSS 는 그 자식 하나의 값이다 (--workers 의 워커 프로세스는 포함되지 않음).
+    """
+    script = os.path.join(SCRIPT_DIR, args[0])
+    rss_file = os.path.join(cwd, '.bench_rss')
+    if os.path.exists('/proc/self/status'):
+        command = [sys.executable, '-c', _RUNNER, script] + args[1:]
+    else:
+        command = [sys.executable, script] + args[1:]
+    env = dict(os.environ, BENCH_RSS_FILE=rss_file)
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    error = proc.stderr.read().decode('utf-8', 'replace')
+    if resource is not None:
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # Linux 는 KiB, macOS 는 bytes
+        rss = usage.ru_maxrss // 1024 if sys.platform == 'darwin' else usage.ru_maxrss
+    else:
+        proc.wait()
+        elapsed = time.perf_counter() - start
+        rss = None
+    proc.stderr.close()
+    if os.path.exists(rss_file):
+        with open(rss_file) as f:
+            rss = int(f.read())
+        os.remove(rss_file)
+    if proc.returncode:
+        print(f"  {' '.join(args)} exited with {proc.returncode}: {error.strip()[-300:]}",
+              file=sys.stderr)
+    return elapsed, rss, proc.returncode
+
+
+def prepare_dir(path, input_file):
+    """대상 스크립트가 현재 디렉토리에서 찾는 파일들을 준비 (네트워크 스냅샷은 측정 전에 미리 생성)"""
+    os.makedirs(path, exist_ok=True)
+    shutil.copy(os.path.join(SCRIPT_DIR, 'country_asn222.csv'), path)
+    if input_file is None:
+        open(os.path.join(path, 'ppom_bclass.txt'), 'w').close()
+    else:
+        os.replace(input_file, os.path.join(path, 'ppom_bclass.txt'))
+    run_script(['network_index.py'], path)
+
+
+def selected_targets(names):
+    targets = []
+    for name, args, requires in TARGETS:
+        if names and name not in names:
+            continue
+        missing = [module for module in requires if not _available(module)]
+        if missing:
+            print(f"Skipping {name}: requires {', '.join(missing)}", file=sys.stderr)
+            continue
+        targets.append((name, args))
+    return targets
+
+
+def bench_size(lines, targets, workers, repeat, v6_ratio, malformed_ratio, seed, sort, tmp):
+    """합성 입력 하나(lines 줄)에 대해 대상별 결과 레코드 목록"""
+    run_dir = os.path.join(tmp, f'run_{lines}')
+    empty_dir = os.path.join(tmp, f'empty_{lines}')
+    input_file = os.path.join(tmp, 'input.txt')
+    start = time.perf_counter()
+    size = gen_hits.generate(input_file, lines, v6_ratio, malformed_ratio, seed, sort)
+    print(f"Generated {lines:,} lines ({size:,} bytes) in {time.perf_counter() - start:.1f}s")
+    prepare_dir(run_dir, input_file)
+    prepare_dir(empty_dir, None)
+
+    results = []
+    for name, args in targets:
+        args = [arg.format(workers=workers) for arg in args]
+        # 시작 시간: 같은 명령을 빈 입력으로 실행 (import + 테이블 로드 + 출력 파일 준비)
+        startup = min(run_script(args, empty_dir)[0] for _ in range(repeat))
+        best = None
+        peak = None
+        returncode = 0
+        for _ in range(repeat):
+            elapsed, rss, code = run_script(args, run_dir)
+            best = elapsed if best is None else min(best, elapsed)
+            if rss is not None:
+                peak = rss if peak is None else max(peak, rss)
+            returncode = returncode or code
+        results.append({
+            'target': name,
+            'args': args[1:],
+            'lines': lines,
+            'bytes': size,
+            'v6_ratio': v6_ratio,
+            'malformed_ratio': malformed_ratio,
+            'seed': seed,
+            'sorted': sort,
+            'repeat': repeat,
+            'seconds': round(best, 4),
+            'lines_per_sec': round(lines / best),
+            'startup_seconds': round(startup, 4),
+            'peak_rss_kb': peak,
+            'returncode': returncode,
+        })
+    shutil.rmtree(run_dir)
+    shutil.rmtree(empty_dir)
+    return results
+
+
+def _key(record):
+    return (record['target'], record['lines'], record['v6_ratio'], record['malformed_ratio'],
+            record.get('sorted', False))
+
+
+def load_baseline(path):
+    """결과 파일에서 조건(대상, 줄 수, 비율, 정렬)별 가장 최근 레코드"""
+    baseline = {}
+    with open(path, 'r') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                baseline[_key(record)] = record
+    return baseline
+
+
+def print_result(record, baseline=None):
+    rss = f"{record['peak_rss_kb'] / 1024:7.1f}" if record['peak_rss_kb'] is not None else '      -'
+    line = (f"{record['target']:<18} {record['lines']:>11,} {record['seconds']:8.3f}s "
+            f"{record['lines_per_sec']:>12,} {record['startup_seconds']:8.3f}s {rss}")
+    previous = baseline.get(_key(record)) if baseline else None
+    if previous:
+        change = record['lines_per_sec'] / previous['lines_per_sec'] - 1
+        line += f"  {change:+6.1%} vs {previous.get('commit') or '?'}"
+    if record['returncode']:
+        line += f"  (exit {record['returncode']})"
+    print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='합성 히트 로그로 필터/분석 스크립트 처리량, 최대 RSS, 시작 시간 측정')
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f'쉼표로 구분한 줄 수 (10k ~ 100m, 기본 {DEFAULT_SIZES})')
+    parser.add_argument('--targets', help='쉼표로 구분한 대상 이름: ' + ', '.join(t[0] for t in TARGETS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2,
+                        help='filter-workers 대상의 프로세스 수')
+    parser.add_argument('--repeat', type=int, default=1, help='대상별 반복 횟수 (최솟값 사용)')
+    parser.add_argument('--v6-ratio', type=float, default=0.0)
+    parser.add_argument('--malformed-ratio', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sorted', action='store_true',
+                        help='입력을 히트 수 내림차순 정렬 (ppom_bclass.txt 와 같은 순서, 메모리 사용)')
+    parser.add_argument('--output', default=RESULTS_FILE, help='결과를 JSON Lines 로 덧붙일 파일')
+    parser.add_argument('--baseline', help='비교할 이전 결과 파일 (같은 조건의 가장 최근 레코드 대비 변화율)')
+    parser.add_argument('--tmp-dir', help='합성 입력을 만들 디렉토리 (기본: 시스템 임시 디렉토리)')
+    args = parser.parse_args()
+
+    names = set(args.targets.split(',')) if args.targets else None
+    targets = selected_targets(names)
+    baseline = load_baseline(args.baseline) if args.baseline else None
+    common = {
+        'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'workers': args.workers,
+    }
+
+    print(f"{'target':<18} {'lines':>11} {'time':>9} {'lines/sec':>12} {'startup':>9} {'RSS MiB':>7}")
+    print("-" * 72)
+    with tempfile.TemporaryDirectory(dir=args.tmp_dir) as tmp, open(args.output, 'a') as out:
+        for lines in map(gen_hits.parse_size, args.sizes.split(',')):
+            records = bench_size(lines, targets, args.workers, args.repeat, args.v6_ratio,
+                                 args.malformed_ratio, args.seed, args.sorted, tmp)
+            for record in records:
+                record = {**common, **record}
+                print_result(record, baseline)
+                out.write(json.dumps(record) + "\n")
+            out.flush()
+    print(f"Results appended to {args.output}")
@@ -0,0 +1,109 @@
+from collections import OrderedDict
+
+# 기본 캐시 항목 수 (항목당 튜플 + 문자열 약 200바이트)
+CACHE_SIZE = 65536
+
+
+class LRUCache:
+    """최근에 가장 오래 안 쓴 항목부터 버리는 분류 결과 캐시 (OrderedDict, 조회/갱신 모두 O(1))
+
+    get() 이 None 이면 호출하는 쪽이 계산해서 put() 한다. 적중/실패/제거 횟수를 센다.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        if maxsize <= 0:
+            raise ValueError("cache size must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        data = self._data
+        data[key] = value
+        if len(data) > self.maxsize:
+            data.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def summary(self):
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (f"{type(self).__name__}({self.maxsize:,}): {self.hits:,} hits, "
+                f"{self.misses:,} misses, {self.evictions:,} evictions, {rate:.1%} hit rate")
+
+
+class ClockCache(LRUCache):
+    """CLOCK(second chance) 근사 LRU: 적중 시 참조 비트만 세우고, 교체할 때 바늘을 돌며
+    참조 비트가 꺼진 슬롯을 고른다. 적중 경로에서 순서를 바꾸지 않아 LRU 보다 가볍다.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        super().__init__(maxsize)
+        self._data = {}
+        self._keys = []
+        self._slots = {}
+        self._referenced = bytearray(maxsize)
+        self._hand = 0
+
+    def get(self, key):
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._referenced[self._slots[key]] = 1
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        if key in self._data:
+            self._data[key] = value
+            return
+        keys = self._keys
+        if len(keys) < self.maxsize:
+            self._slots[key] = len(keys)
+            keys.append(key)
+            self._data[key] = value
+            return
+
+        referenced = self._referenced
+        hand = self._hand
+        while referenced[hand]:
+            referenced[hand] = 0
+            hand = (hand + 1) % self.maxsize
+        old = keys[hand]
+        del self._data[old]
+        del self._slots[old]
+        self.evictions += 1
+
+        keys[hand] = key
+        self._slots[key] = hand
+        self._data[key] = value
+        self._hand = (hand + 1) % self.maxsize
+
+
+CACHES = {
+    'lru': LRUCache,
+    'clock': ClockCache,
+}
+
+
+def make_cache(kind='lru', maxsize=CACHE_SIZE):
+    """kind: lru | clock. maxsize 가 0 이면 캐시를 쓰지 않음 (None)"""
+    if not maxsize:
+        return None
+    if kind not in CACHES:
+        raise ValueError(f"Unknown cache: {kind}")
+    return CACHES[kind](maxsize)
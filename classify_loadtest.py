@@ -0,0 +1,107 @@
+import argparse
+import asyncio
+import os
+import time
+
+
+def load_ips(path, limit):
+    ips = []
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2:
+                ips.append(parts[1])
+                if len(ips) >= limit:
+                    break
+    return ips
+
+
+async def _open(host, port, unix_path):
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+
+async def _read_response(reader):
+    headers = {}
+    await reader.readline()
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if 'content-length' in headers:
+        return await reader.readexactly(int(headers['content-length']))
+
+    # chunked
+    body = []
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        if size == 0:
+            await reader.readline()
+            break
+        body.append(await reader.readexactly(size))
+        await reader.readline()
+    return b''.join(body)
+
+
+async def single_worker(ips, count, host, port, unix_path, latencies):
+    reader, writer = await _open(host, port, unix_path)
+    try:
+        for i in range(count):
+            ip = ips[i % len(ips)]
+            start = time.perf_counter()
+            writer.write(f"GET /classify?ip={ip} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+            await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run_single(ips, requests, connections, host, port, unix_path):
+    latencies = []
+    per_conn = requests // connections
+    start = time.perf_counter()
+    await asyncio.gather(*(single_worker(ips, per_conn, host, port, unix_path, latencies)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    done = len(latencies)
+    print(f"Single: {done:,} requests over {connections} connections in {elapsed:.2f}s "
+          f"({done / elapsed:,.0f} req/sec)")
+    print(f"  latency p50 {latencies[done // 2] * 1000:.2f}ms, "
+          f"p99 {latencies[int(done * 0.99)] * 1000:.2f}ms")
+
+
+async def run_bulk(ips, host, port, unix_path):
+    body = ('\n'.join(ips) + '\n').encode()
+    reader, writer = await _open(host, port, unix_path)
+    try:
+        start = time.perf_counter()
+        writer.write(f"POST /classify HTTP/1.1\r\nHost: localhost\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        result = await _read_response(reader)
+        elapsed = time.perf_counter() - start
+    finally:
+        writer.close()
+
+    lines = result.count(b'\n')
+    print(f"Bulk: {lines:,} IPs in {elapsed:.2f}s ({lines / elapsed:,.0f} IPs/sec)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='classify_server 부하 테스트')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8016)
+    parser.add_argument('--unix', metavar='PATH')
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--connections', type=int, default=16)
+    parser.add_argument('--input', default=os.path.join(os.getcwd(), 'ppom_bclass.txt'))
+    args = parser.parse_args()
+
+    ips = load_ips(args.input, 200000)
+    asyncio.run(run_single(ips, args.requests, args.connections, args.host, args.port, args.unix))
+    asyncio.run(run_bulk(ips, args.host, args.port, args.unix))
@@ -0,0 +1,237 @@
+import argparse
+import asyncio
+import os
+import signal
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import network_index
+from bclass_filter import classify_ipv4, classify_ipv6
+from ip_parse import parse_ipv4
+
+# 대량 요청 본문을 읽는 단위
+READ_SIZE = 64 * 1024
+
+
+class Classifier:
+    """네트워크 테이블과 B클래스 규칙을 한 번만 로드해 두고 IP 를 분류
+
+    테이블은 network_index.ReloadableIndex 로 들고 있어 서버를 내리지 않고 교체할 수 있다.
+    """
+
+    def __init__(self, networks):
+        self.networks = networks
+        self.requests = 0
+        self.classified = 0
+        self.reloads = 0
+        self.reload_errors = 0
+        self.last_reload = None
+        self.last_reload_error = None
+        self.started = time.time()
+
+    @property
+    def index(self):
+        return self.networks.current
+
+    def classify(self, ip, index=None):
+        """'ip -> a.b.0.0/16 MATCH|NONE', IPv6 면 'ip -> 2001:db8::/48', 그 외 'ip -> NONE'"""
+        if index is None:
+            index = self.networks.current
+        self.classified += 1
+        addr = parse_ipv4(ip)
+        if addr is None:
+            # IPv6 는 집계 네트워크만 (ASN 테이블은 IPv4 전용)
+            network = classify_ipv6(ip)
+            return f"{ip} -> {network or 'NONE'}\n"
+        network = classify_ipv4(addr)
+        if network is None:
+            return f"{ip} -> NONE\n"
+        status = "MATCH" if index.contains_addr(addr) else "NONE"
+        return f"{ip} -> {network} {status}\n"
+
+    def classify_lines(self, lines, index=None):
+        if index is None:
+            index = self.networks.current
+        classify = self.classify
+        return ''.join(classify(ip, index) for ip in (line.strip() for line in lines) if ip)
+
+    async def reload(self):
+        """새 인덱스는 스레드에서 만들고 참조만 교체. 진행 중인 대량 요청은 이전 인덱스로 끝남
+
+        (성공 여부, 메시지) 반환. 실패하면 기록만 하고 이전 인덱스로 계속 서비스한다.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            report = await loop.run_in_executor(None, self.networks.reload)
+        except (OSError, ValueError) as e:
+            self.reload_errors += 1
+            self.last_reload_error = str(e)
+            message = f"Reload failed, keeping {len(self.index):,} ranges: {e}"
+            print(message)
+            return False, message
+        self.reloads += 1
+        self.last_reload = report
+        message = network_index.format_reload_report(report)
+        print(message)
+        return True, message
+
+    def status(self):
+        text = (f"uptime: {time.time() - self.started:.0f}s\n"
+                f"requests: {self.requests}\n"
+                f"classified: {self.classified}\n"
+                f"ranges: {len(self.index)}\n"
+                f"reloads: {self.reloads}\n"
+                f"reload errors: {self.reload_errors}\n")
+        if self.last_reload is not None:
+            text += f"last reload: {network_index.format_reload_report(self.last_reload)}\n"
+        if self.last_reload_error is not None:
+            text += f"last reload error: {self.last_reload_error}\n"
+        return text
+
+
+def _response(status, body, content_type='text/plain; charset=utf-8'):
+    body = body.encode()
+    return (f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"\r\n").encode() + body
+
+
+async def _read_headers(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None, None, None
+    method, target, _ = request_line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return method, target, headers
+
+
+async def _stream_bulk(classifier, reader, writer, length):
+    """newline 구분 IP 본문을 READ_SIZE 단위로 읽으면서 chunked 응답으로 바로 돌려줌"""
+    writer.write(b"HTTP/1.1 200 OK\r\n"
+                 b"Content-Type: text/plain; charset=utf-8\r\n"
+                 b"Transfer-Encoding: chunked\r\n\r\n")
+    # 요청 시작 시점의 인덱스로 끝까지 처리 (중간에 reload 되어도 결과가 섞이지 않음)
+    index = classifier.index
+    rest = b''
+    remaining = length
+    while remaining > 0:
+        data = await reader.read(min(READ_SIZE, remaining))
+        if not data:
+            break
+        remaining -= len(data)
+        data = rest + data
+        cut = data.rfind(b'\n') + 1
+        rest = data[cut:]
+        if cut:
+            body = classifier.classify_lines(data[:cut].decode('utf-8', 'replace').split('\n'),
+                                             index).encode()
+            if body:
+                writer.write(f"{len(body):x}\r\n".encode() + body + b"\r\n")
+                await writer.drain()
+    if rest:
+        body = classifier.classify_lines([rest.decode('utf-8', 'replace')], index).encode()
+        if body:
+            writer.write(f"{len(body):x}\r\n".encode() + body + b"\r\n")
+    writer.write(b"0\r\n\r\n")
+    await writer.drain()
+
+
+async def handle_client(classifier, reader, writer):
+    """HTTP/1.1 keep-alive 연결 하나를 처리
+
+    GET  /classify?ip=1.2.3.4  단일 IP 분류
+    POST /classify             newline 구분 IP 목록 (결과를 스트리밍)
+    GET  /status               처리 통계
+    POST /reload               네트워크 테이블 다시 로드
+    """
+    try:
+        while True:
+            method, target, headers = await _read_headers(reader)
+            if method is None:
+                break
+            classifier.requests += 1
+            url = urlsplit(target)
+            length = int(headers.get('content-length', 0))
+
+            if url.path == '/classify' and method == 'GET':
+                ips = parse_qs(url.query).get('ip', [])
+                writer.write(_response('200 OK', classifier.classify_lines(ips)))
+            elif url.path == '/classify' and method == 'POST':
+                await _stream_bulk(classifier, reader, writer, length)
+                length = 0
+            elif url.path == '/reload' and method == 'POST':
+                ok, message = await classifier.reload()
+                status = '200 OK' if ok else '500 Internal Server Error'
+                writer.write(_response(status, message + '\n'))
+            elif url.path == '/status':
+                writer.write(_response('200 OK', classifier.status()))
+            else:
+                writer.write(_response('404 Not Found', 'not found\n'))
+
+            if length:
+                await reader.readexactly(length)
+            await writer.drain()
+            if headers.get('connection', '').lower() == 'close':
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def watch_networks(classifier, interval):
+    """interval 초마다 CSV 변경을 확인해 바뀌었으면 reload (실패해도 계속 감시)"""
+    while True:
+        await asyncio.sleep(interval)
+        if classifier.networks.changed():
+            await classifier.reload()
+
+
+async def serve(classifier, host='127.0.0.1', port=8016, unix_path=None, watch_interval=None):
+    def handler(reader, writer):
+        return handle_client(classifier, reader, writer)
+
+    loop = asyncio.get_running_loop()
+    try:
+        # kill -HUP 으로도 reload
+        loop.add_signal_handler(signal.SIGHUP, lambda: asyncio.ensure_future(classifier.reload()))
+    except (AttributeError, NotImplementedError):
+        pass
+    if watch_interval:
+        asyncio.ensure_future(watch_networks(classifier, watch_interval))
+
+    if unix_path:
+        server = await asyncio.start_unix_server(handler, path=unix_path)
+        print(f"Listening on unix:{unix_path}")
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        print(f"Listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='B클래스 IP 분류 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8016)
+    parser.add_argument('--unix', metavar='PATH', help='TCP 대신 Unix 소켓으로 대기')
+    parser.add_argument('--networks', default=os.path.join(os.getcwd(), network_index.NETWORK_FILE))
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help='CSV 변경을 주기적으로 확인해 자동 reload')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    classifier = Classifier(network_index.ReloadableIndex(args.networks))
+    print(f"Network table loaded in {time.perf_counter() - start:.3f}s ({len(classifier.index)} ranges)")
+
+    try:
+        asyncio.run(serve(classifier, args.host, args.port, args.unix, args.watch))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,295 @@
+import argparse
+import os
+import time
+
+import bclass_filter
+import network_index
+from bclass_stats import new_stats
+from instrument import PROGRESS_CHECK, Progress
+from hit_reader import HitReader
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    np = pa = pq = None
+
+# 한 row group(배치)에 담을 행 수
+ROW_GROUP_SIZE = 128 * 1024
+
+# status 열 값 (dictionary 인코딩된 enum)
+STATUS_NONE = 0
+STATUS_BCLASS = 1
+STATUS_IPV6 = 2
+STATUS_INVALID = 3
+STATUSES = ('NONE', 'BCLASS', 'IPV6', 'INVALID')
+
+STATS_COLUMNS = ['status', 'network', 'network6']
+
+# hits 열(uint32)에 담을 수 있는 최댓값. 범위 밖(음수 포함)이면 null
+HITS_MAX = 0xFFFFFFFF
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("columnar export requires pyarrow")
+
+
+def schema():
+    """hits/ip/network 는 정수 열, IPv4 가 아닌 행의 원문만 ip_text 에 보관
+
+    Arrow IPC 파일은 배치마다 dictionary 를 바꿀 수 없어 status 만 고정 dictionary 를 쓴다.
+    """
+    _require_pyarrow()
+    return pa.schema([
+        ('hits', pa.uint32()),
+        ('ip', pa.uint32()),
+        ('network', pa.uint16()),
+        ('status', pa.dictionary(pa.int8(), pa.string())),
+        ('range_id', pa.int32()),
+        ('network6', pa.string()),
+        ('ip_text', pa.string()),
+    ])
+
+
+def _open_writer(path, table_schema):
+    if path.endswith('.parquet'):
+        return pq.ParquetWriter(path, table_schema, compression='zstd')
+    # .arrow / .feather: Arrow IPC 파일 (mmap 으로 복사 없이 읽힘)
+    return pa.ipc.new_file(path, table_schema)
+
+
+def _make_batch(table_schema, columns):
+    hits, ips, networks, statuses, range_ids, networks6, texts = columns
+    status_dictionary = pa.array(STATUSES)
+    return pa.record_batch([
+        pa.array(hits, pa.uint32()),
+        pa.array(ips, pa.uint32()),
+        pa.array(networks, pa.uint16()),
+        pa.DictionaryArray.from_arrays(pa.array(statuses, pa.int8()), status_dictionary),
+        pa.array(range_ids, pa.int32()),
+        pa.array(networks6, pa.string()),
+        pa.array(texts, pa.string()),
+    ], schema=table_schema)
+
+
+class ColumnarWriter:
+    """분류 결과를 row_group_size 행씩 Parquet(.parquet) 또는 Arrow IPC(.arrow) 파일로 기록
+
+    add() 는 HitReader.records() 한 항목을 받으므로 bclass_filter.filter_file 이 output.txt 를 쓰는
+    같은 패스에서 함께 채울 수 있다. index(NetworkIndex)를 주면 B클래스 행의 병합 구간 번호를
+    range_id 에 넣는다. with 블록이 예외로 끝나면 쓰다 만 파일은 지운다.
+    """
+
+    def __init__(self, output_path, index=None, row_group_size=ROW_GROUP_SIZE):
+        _require_pyarrow()
+        self.path = output_path
+        self.schema = schema()
+        self.row_group_size = row_group_size
+        self.rows = 0
+        self._find_range = index.find_range if index is not None else None
+        self._columns = [[] for _ in range(7)]
+        self._writer = _open_writer(output_path, self.schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is not None:
+            os.remove(self.path)
+
+    def add(self, reader, offset, hits, addr, ip):
+        network = network6 = text = range_id = None
+        if addr is not None:
+            if (addr >> 30) == bclass_filter.B_CLASS_TOP_BITS:
+                network = addr >> 16
+                status = STATUS_BCLASS
+                if self._find_range is not None:
+                    range_id = self._find_range(network)
+            else:
+                status = STATUS_NONE
+        elif ip is not None and b':' in ip:
+            text = ip.decode('utf-8', 'replace')
+            network6 = bclass_filter.classify_ipv6(text)
+            status = STATUS_NONE if network6 is None else STATUS_IPV6
+        else:
+            text, network = bclass_filter.classify_line(
+                reader.line_at(offset).decode('utf-8', 'replace'))
+            status = STATUS_INVALID if network is bclass_filter.INVALID else STATUS_NONE
+            network = None
+        if hits is not None and not 0 <= hits <= HITS_MAX:
+            # hit_reader 는 음수나 32비트를 넘는 수도 받음: uint32 열에 못 담으므로 null
+            hits = None
+
+        hits_col, ip_col, net_col, status_col, range_col, net6_col, text_col = self._columns
+        hits_col.append(hits)
+        ip_col.append(addr)
+        net_col.append(network)
+        status_col.append(status)
+        range_col.append(range_id)
+        net6_col.append(network6)
+        text_col.append(text)
+        self.rows += 1
+        if len(hits_col) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        self._writer.write_batch(_make_batch(self.schema, self._columns))
+        for column in self._columns:
+            column.clear()
+
+    def close(self):
+        if self._writer is None:
+            return
+        try:
+            if self._columns[0]:
+                self._flush()
+        finally:
+            self._writer.close()
+            self._writer = None
+
+
+def write_columnar(input_file, output_path, index=None, row_group_size=ROW_GROUP_SIZE,
+                   progress_every=PROGRESS_CHECK):
+    """input_file 을 분류해 Parquet(.parquet) 또는 Arrow IPC(.arrow) 파일로 기록. 행 수 반환
+
+    분류 규칙은 bclass_filter.filter_file 과 같다 (빈 줄 제외 한 행씩).
+    output.txt 도 필요하면 filter_file(columnar=ColumnarWriter(...)) 로 한 패스에 함께 기록
+    """
+    progress = Progress() if progress_every else None
+    with ColumnarWriter(output_path, index, row_group_size) as writer, \
+            HitReader(input_file) as reader:
+        add = writer.add
+        for offset, hits, addr, ip in reader.records():
+            add(reader, offset, hits, addr, ip)
+            if progress_every and writer.rows % progress_every == 0:
+                progress(writer.rows)
+    return writer.rows
+
+
+def read_columns(path, columns=None):
+    """Parquet/Arrow 파일에서 필요한 열만 읽어 pyarrow.Table 로"""
+    _require_pyarrow()
+    if path.endswith('.parquet'):
+        return pq.read_table(path, columns=columns)
+    table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    return table.select(columns) if columns is not None else table
+
+
+def _status_codes(column):
+    """dictionary 열을 STATUSES 번호 numpy 배열로 (청크마다 dictionary 순서가 달라도 됨)"""
+    parts = []
+    for chunk in column.chunks:
+        remap = np.array([STATUSES.index(value) for value in chunk.dictionary.to_pylist()],
+                         dtype=np.int8)
+        parts.append(remap[chunk.indices.to_numpy(zero_copy_only=False)])
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=np.int8)
+
+
+def _first_seen_counts(rows, keys):
+    """keys(행 rows 의 값)별 (첫 등장 행, 값, 개수)"""
+    if not len(rows):
+        return []
+    values, first, counts = np.unique(keys, return_index=True, return_counts=True)
+    return list(zip(rows[first].tolist(), values.tolist(), counts.tolist()))
+
+
+def _feed_detector(detector, total_rows, rows, keys, names):
+    """행 순서대로 interval 행마다 구간을 나눠 detector 에 넣음 (bclass_stats.aggregate_records 와 같은 구간)
+
+    마지막(부분) 구간도 닫으므로 결과는 aggregate_records + close_intervals 와 같다
+    """
+    if not total_rows:
+        return
+    order = np.argsort(rows, kind='stable')
+    rows = rows[order]
+    keys = keys[order]
+    interval = detector.interval
+    last = (total_rows - 1) // interval
+    bounds = np.searchsorted(rows, np.arange(1, last + 2) * interval)
+    start = 0
+    for i, end in enumerate(bounds.tolist()):
+        if end > start:
+            values, first, counts = np.unique(keys[start:end], return_index=True,
+                                              return_counts=True)
+            for j in np.argsort(first, kind='stable').tolist():
+                detector.add(names(values[j]), int(counts[j]))
+        detector.tick()
+        start = end
+
+
+def columnar_stats(path, networks=None, unique=None, anomalies=None):
+    """열 스캔만으로 bclass_stats.new_stats() 형식 통계 계산
+
+    네트워크는 첫 등장 순서대로 집계기에 넣으므로 Counter.most_common 순서가
+    output.txt 를 줄 단위로 집계한 결과와 같다.
+    """
+    columns = STATS_COLUMNS + (['ip', 'ip_text'] if unique is not None else [])
+    table = read_columns(path, columns)
+    codes = _status_codes(table.column('status'))
+
+    stats = new_stats(networks, unique, anomalies)
+    stats['total_lines'] = len(codes)
+    stats['none_count'] = int(np.count_nonzero(codes == STATUS_NONE))
+    stats['bclass_count'] = int(np.count_nonzero(codes == STATUS_BCLASS))
+    stats['v6_count'] = int(np.count_nonzero(codes == STATUS_IPV6))
+    stats['invalid_format'] = int(np.count_nonzero(codes == STATUS_INVALID))
+
+    rows4 = np.flatnonzero(codes == STATUS_BCLASS)
+    nets = table.column('network').combine_chunks().fill_null(0).to_numpy()[rows4]
+    entries = [(row, bclass_filter.format_network16(net), count)
+               for row, net, count in _first_seen_counts(rows4, nets)]
+
+    rows6 = np.flatnonzero(codes == STATUS_IPV6)
+    names = ids = None
+    if len(rows6):
+        encoded = table.column('network6').combine_chunks().dictionary_encode()
+        names = encoded.dictionary.to_pylist()
+        ids = encoded.indices.fill_null(0).to_numpy(zero_copy_only=False)[rows6]
+        entries += [(row, names[i], count) for row, i, count in _first_seen_counts(rows6, ids)]
+
+    entries.sort()
+    add = stats['bclass_networks'].add
+    for _, network, count in entries:
+        add(network, count)
+
+    if anomalies is not None:
+        # /16 번호는 그대로, IPv6 네트워크는 65536 + dictionary 번호를 키로
+        keys = nets.astype(np.int64)
+        if len(rows6):
+            keys = np.concatenate([keys, ids.astype(np.int64) + 65536])
+        _feed_detector(anomalies, len(codes), np.concatenate([rows4, rows6]), keys,
+                       lambda key: (bclass_filter.format_network16(key) if key < 65536
+                                    else names[key - 65536]))
+
+    if unique is not None:
+        ips = table.column('ip').combine_chunks().fill_null(0).to_numpy()
+        for net, addr in zip(nets.tolist(), ips[rows4].tolist()):
+            unique.add(bclass_filter.format_network16(net), addr)
+        if len(rows6):
+            texts = table.column('ip_text').combine_chunks().take(pa.array(rows6)).to_pylist()
+            for i, text in zip(ids.tolist(), texts):
+                unique.add(names[i], text)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='분류 결과를 Parquet/Arrow 파일로 내보내기')
+    parser.add_argument('input', nargs='?', default='ppom_bclass.txt')
+    parser.add_argument('output', nargs='?', default='output.parquet',
+                        help='.parquet 이면 Parquet, 그 외(.arrow 등)는 Arrow IPC 파일')
+    parser.add_argument('--row-group-size', type=int, default=ROW_GROUP_SIZE)
+    parser.add_argument('--v6-prefix', type=int, default=bclass_filter.V6_PREFIX)
+    args = parser.parse_args()
+
+    bclass_filter.configure_ipv6(args.v6_prefix)
+    try:
+        index = network_index.load_network_index_cached(network_index.NETWORK_FILE)
+    except FileNotFoundError:
+        index = None
+    start = time.perf_counter()
+    rows = write_columnar(args.input, args.output, index, args.row_group_size)
+    print(f"Wrote {rows:,} rows to {args.output} ({os.path.getsize(args.output):,} bytes) "
+          f"in {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,206 @@
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+
+try:
+    # Python 3.14+
+    from compression import zstd as _zstd
+except ImportError:
+    try:
+        import zstandard as _zstd
+    except ImportError:
+        _zstd = None
+
+# 압축 해제 스레드/프로세스에서 한 번에 읽는 크기
+CHUNK_BYTES = 1 << 20
+# 큐에 쌓아둘 수 있는 청크 수 (압축 해제가 앞서 나가도 메모리는 CHUNK_BYTES * QUEUE_CHUNKS 까지)
+QUEUE_CHUNKS = 8
+
+# thread: 파이썬 모듈로 별도 스레드에서 해제 (zlib/bz2/lzma/zstd 는 해제 중 GIL 을 놓음)
+# process: gzip -dc 같은 외부 명령의 파이프에서 읽음 (명령이 없으면 thread)
+# inline: 읽는 쪽 스레드에서 바로 해제 (파이프라인 없음)
+DECOMPRESS_MODES = ('thread', 'process', 'inline')
+DECOMPRESS = 'thread'
+
+
+def _open_zstd(path):
+    if _zstd is None:
+        raise RuntimeError("zstd input requires the zstandard module or the zstd command")
+    return _zstd.open(path, 'rb')
+
+
+# 형식 이름 -> (매직 바이트, 파이썬 모듈로 여는 함수, 외부 명령 후보)
+FORMATS = {
+    'gzip': (b'\x1f\x8b', gzip.open, (['pigz', '-dc'], ['gzip', '-dc'])),
+    'bz2': (b'BZh', bz2.open, (['lbzip2', '-dc'], ['bzip2', '-dc'])),
+    'xz': (b'\xfd7zXZ\x00', lzma.open, (['xz', '-dc', '-T0'],)),
+    'zstd': (b'\x28\xb5\x2f\xfd', _open_zstd, (['zstd', '-dc'],)),
+}
+_MAGIC_BYTES = max(len(magic) for magic, _, _ in FORMATS.values())
+
+
+def configure(decompress=DECOMPRESS):
+    """open_input 의 기본 압축 해제 방식 설정 (thread | process | inline)"""
+    global DECOMPRESS
+    if decompress not in DECOMPRESS_MODES:
+        raise ValueError(f"Unknown decompress mode: {decompress}")
+    DECOMPRESS = decompress
+
+
+def detect_format(path):
+    """파일 앞부분의 매직 바이트로 압축 형식 이름, 압축이 아니면 None (확장자는 보지 않음)"""
+    with open(path, 'rb') as f:
+        head = f.read(_MAGIC_BYTES)
+    for name, (magic, _, _) in FORMATS.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def is_compressed(path):
+    return detect_format(path) is not None
+
+
+def _command(name):
+    for command in FORMATS[name][2]:
+        if shutil.which(command[0]):
+            return command
+    return None
+
+
+class _ThreadedInput(io.RawIOBase):
+    """압축 해제 스트림을 별도 스레드에서 CHUNK_BYTES 씩 읽어 bounded queue 로 넘김
+
+    io.BufferedReader 로 감싸 쓰므로 readline/줄 반복은 C 구현 그대로이고,
+    파싱하는 동안 다음 청크의 압축 해제가 다른 스레드에서 진행된다.
+    """
+
+    def __init__(self, source, chunk=CHUNK_BYTES, depth=QUEUE_CHUNKS):
+        self._source = source
+        self._queue = queue.Queue(depth)
+        self._chunk = memoryview(b'')
+        self._error = None
+        self._eof = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._pump, args=(chunk,), daemon=True)
+        self._thread.start()
+
+    def _pump(self, size):
+        try:
+            read = self._source.read
+            while not self._stop.is_set():
+                data = read(size)
+                if not data:
+                    break
+                self._queue.put(data)
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._queue.put(None)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._chunk:
+            if self._eof:
+                return 0
+            data = self._queue.get()
+            if data is None:
+                self._eof = True
+                if self._error is not None:
+                    raise self._error
+                return 0
+            self._chunk = memoryview(data)
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+    def close(self):
+        if not self.closed:
+            # 끝까지 읽지 않고 닫는 경우: 큐를 비워 put 에서 막힌 스레드를 풀어줌
+            self._stop.set()
+            while self._thread.is_alive():
+                try:
+                    self._queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            self._source.close()
+        super().close()
+
+
+class _ProcessInput(io.RawIOBase):
+    """외부 압축 해제 명령(gzip -dc 등)의 stdout 파이프. 끝까지 읽으면 종료 코드를 확인
+
+    stderr 는 임시 파일로 받는다 (파이프면 stderr 가 파이프 버퍼를 채웠을 때 명령이 멈춰
+    stdout 을 기다리는 쪽과 교착될 수 있음). 실패했을 때만 읽어 오류 메시지에 넣는다.
+    """
+
+    def __init__(self, command, path):
+        self._command = command
+        self._eof = False
+        self._stderr = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(command + [path], stdout=subprocess.PIPE,
+                                      stderr=self._stderr)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self._proc.stdout.readinto(buffer)
+        if not n and not self._eof:
+            self._eof = True
+            returncode = self._proc.wait()
+            if returncode:
+                self._stderr.seek(0)
+                error = self._stderr.read().decode('utf-8', 'replace').strip()
+                raise OSError(f"{' '.join(self._command)} exited with {returncode}: {error}")
+        return n
+
+    def close(self):
+        if not self.closed:
+            if not self._eof:
+                # 끝까지 읽지 않고 닫음: 남은 출력은 필요 없으므로 종료
+                self._proc.kill()
+            self._proc.stdout.close()
+            self._proc.wait()
+            self._stderr.close()
+        super().close()
+
+
+def open_input(path, mode='rb', decompress=None):
+    """압축(gzip/bz2/xz/zstd) 여부를 매직 바이트로 보고 투명하게 여는 입력 파일
+
+    압축이 아니면 open(path, mode) 그대로. 압축이면 decompress(기본 DECOMPRESS) 방식으로
+    풀면서 CHUNK_BYTES 버퍼의 io.BufferedReader 로 읽고, 'b' 가 없는 mode 면 텍스트로 감싼다.
+    """
+    name = detect_format(path)
+    if name is None:
+        return open(path, mode)
+    decompress = decompress or DECOMPRESS
+    command = None
+    if decompress == 'process' or (name == 'zstd' and _zstd is None):
+        # zstd 모듈이 없으면 thread/inline 에서도 zstd 명령을 씀
+        command = _command(name)
+    if command is not None:
+        stream = io.BufferedReader(_ProcessInput(command, path), CHUNK_BYTES)
+    elif decompress == 'inline':
+        stream = FORMATS[name][1](path)
+    else:
+        stream = io.BufferedReader(_ThreadedInput(FORMATS[name][1](path)), CHUNK_BYTES)
+    if 'b' in mode:
+        return stream
+    return io.TextIOWrapper(stream)
+
+
+def add_arguments(parser):
+    parser.add_argument('--decompress', choices=DECOMPRESS_MODES, default=DECOMPRESS,
+                        help='압축 입력(.gz/.bz2/.xz/.zst) 해제 방식: thread (기본, 파싱과 겹쳐 실행), '
+                             'process (외부 명령 파이프), inline')
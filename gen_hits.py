@@ -0,0 +1,160 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 히트 수 Zipf 지수 (1/zeta(3) = 83% 가 1 히트. ppom_bclass.txt 는 약 87%)
+HITS_ZIPF = 3.0
+# /16 네트워크 Zipf 지수 (소수 네트워크에 히트가 몰림)
+NETWORK_ZIPF = 1.3
+# 한 번에 만들어 쓰는 줄 수
+CHUNK_LINES = 256 * 1024
+
+_OCTETS = [str(i) for i in range(256)]
+
+# 잘못된 줄 종류: hit_reader/bclass_filter 가 각각 다른 경로로 거르는 형태를 골고루
+MALFORMED = (
+    lambda hits, a, b, c, d: f"{hits:>7}",
+    lambda hits, a, b, c, d: f"{hits:>7} {a}.{b}.{c}",
+    lambda hits, a, b, c, d: f"{hits:>7} {a}.{b}.{c}.{d}.{a}",
+    lambda hits, a, b, c, d: f"{hits:>7} {a + 256}.{b}.{c}.{d}",
+    lambda hits, a, b, c, d: f"{hits:>7} {a}.{b}.{c}.0{d}",
+    lambda hits, a, b, c, d: f"{hits:>7} {a}.{b}.{c}.{d} extra",
+    lambda hits, a, b, c, d: f"x{hits} {a}.{b}.{c}.{d}",
+    lambda hits, a, b, c, d: f"{hits:>7} host-{a}-{b}.example.com",
+)
+
+
+def parse_size(text):
+    """'10k', '1.5m', '100M', '169220' 같은 줄 수 표기를 정수로"""
+    text = text.strip().lower().replace('_', '').replace(',', '')
+    scale = {'k': 10 ** 3, 'm': 10 ** 6, 'g': 10 ** 9}.get(text[-1:], 1)
+    if scale != 1:
+        text = text[:-1]
+    return int(float(text) * scale)
+
+
+class _NumpySource:
+    """numpy Generator 로 청크 단위 난수를 만듦"""
+
+    def __init__(self, seed, hits_zipf, network_zipf):
+        self.rng = np.random.default_rng(seed)
+        self.hits_zipf = hits_zipf
+        self.network_zipf = network_zipf
+        # Zipf 순위 -> /16 번호 (순위 1 이 항상 같은 네트워크가 되지 않도록 섞음)
+        self.networks = self.rng.permutation(65536).astype(np.uint32)
+
+    def chunk(self, n):
+        rng = self.rng
+        hits = np.minimum(rng.zipf(self.hits_zipf, n), 9999999)
+        ranks = (rng.zipf(self.network_zipf, n) - 1) % 65536
+        addrs = (self.networks[ranks] << np.uint32(16)) | rng.integers(0, 65536, n, dtype=np.uint32)
+        kinds = rng.random(n)
+        return hits.tolist(), addrs.tolist(), kinds.tolist(), rng.integers(0, 1 << 16, n).tolist()
+
+
+class _PythonSource:
+    """numpy 가 없을 때: paretovariate 로 Zipf 꼬리를 근사 (P(X >= k) = k^-(s-1))"""
+
+    def __init__(self, seed, hits_zipf, network_zipf):
+        self.rng = random.Random(seed)
+        self.hits_zipf = hits_zipf
+        self.network_zipf = network_zipf
+        self.networks = list(range(65536))
+        self.rng.shuffle(self.networks)
+
+    def chunk(self, n):
+        rng = self.rng
+        pareto = rng.paretovariate
+        hits = [min(int(pareto(self.hits_zipf - 1)), 9999999) for _ in range(n)]
+        networks = self.networks
+        addrs = [(networks[(int(pareto(self.network_zipf - 1)) - 1) % 65536] << 16)
+                 | rng.getrandbits(16) for _ in range(n)]
+        kinds = [rng.random() for _ in range(n)]
+        return hits, addrs, kinds, [rng.getrandbits(16) for _ in range(n)]
+
+
+def iter_hit_lines(lines, v6_ratio=0.0, malformed_ratio=0.0, seed=0, hits_zipf=HITS_ZIPF,
+                   network_zipf=NETWORK_ZIPF, chunk_lines=CHUNK_LINES):
+    """'  count ip' 형식 합성 히트 로그를 청크(줄 문자열 list) 단위로 yield
+
+    히트 수와 /16 네트워크는 Zipf 분포, IPv6 는 2001:db8:<n>::/48 들 중 하나,
+    잘못된 줄은 MALFORMED 의 여러 형태를 번갈아 쓴다. seed 가 같으면 같은 내용.
+    """
+    source = (_NumpySource if np is not None else _PythonSource)(seed, hits_zipf, network_zipf)
+    octets = _OCTETS
+    v6_limit = malformed_ratio + v6_ratio
+    remaining = lines
+    while remaining > 0:
+        n = min(chunk_lines, remaining)
+        remaining -= n
+        hits, addrs, kinds, extra = source.chunk(n)
+        out = []
+        append = out.append
+        for count, addr, kind, salt in zip(hits, addrs, kinds, extra):
+            if kind >= v6_limit:
+                append(f"{count:>7} {octets[addr >> 24]}.{octets[(addr >> 16) & 0xFF]}."
+                       f"{octets[(addr >> 8) & 0xFF]}.{octets[addr & 0xFF]}\n")
+            elif kind >= malformed_ratio:
+                append(f"{count:>7} 2001:db8:{addr >> 24:x}:{addr & 0xFFFF:x}::{salt:x}\n")
+            else:
+                make = MALFORMED[salt % len(MALFORMED)]
+                append(make(count, addr >> 24, (addr >> 16) & 0xFF, (addr >> 8) & 0xFF,
+                            addr & 0xFF) + "\n")
+        yield out
+
+
+def _hits_key(line):
+    count = line[:7].strip()
+    return int(count) if count.isdigit() else 0
+
+
+def generate(output_file, lines, v6_ratio=0.0, malformed_ratio=0.0, seed=0, sort=False,
+             hits_zipf=HITS_ZIPF, network_zipf=NETWORK_ZIPF):
+    """합성 히트 로그 파일 생성. 쓴 바이트 수 반환
+
+    sort=True 면 ppom_bclass.txt 처럼 히트 수 내림차순으로 정렬한다 (전체를 메모리에 올림).
+    기본은 청크마다 바로 써서 1억 줄도 청크 크기 만큼의 메모리로 만든다.
+    """
+    chunks = iter_hit_lines(lines, v6_ratio, malformed_ratio, seed, hits_zipf, network_zipf)
+    tmp_path = f"{output_file}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', buffering=1 << 20) as f:
+        if sort:
+            everything = [line for chunk in chunks for line in chunk]
+            everything.sort(key=_hits_key, reverse=True)
+            f.writelines(everything)
+        else:
+            for chunk in chunks:
+                f.writelines(chunk)
+    os.replace(tmp_path, output_file)
+    return os.path.getsize(output_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="합성 'count ip' 히트 로그 생성")
+    parser.add_argument('output', nargs='?', default='synthetic_hits.txt')
+    parser.add_argument('--lines', type=parse_size, default=parse_size('1m'),
+                        help='줄 수 (10k, 1m, 100m 같은 표기 가능)')
+    parser.add_argument('--v6-ratio', type=float, default=0.0, help='IPv6 줄 비율')
+    parser.add_argument('--malformed-ratio', type=float, default=0.0, help='잘못된 줄 비율')
+    parser.add_argument('--hits-zipf', type=float, default=HITS_ZIPF)
+    parser.add_argument('--network-zipf', type=float, default=NETWORK_ZIPF)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--sorted', action='store_true',
+                        help='히트 수 내림차순 정렬 (전체를 메모리에 올림)')
+    args = parser.parse_args()
+    if args.v6_ratio + args.malformed_ratio > 1:
+        parser.error('--v6-ratio + --malformed-ratio must be <= 1')
+
+    start = time.perf_counter()
+    size = generate(args.output, args.lines, args.v6_ratio, args.malformed_ratio, args.seed,
+                    args.sorted, args.hits_zipf, args.network_zipf)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.lines:,} lines ({size:,} bytes) to {args.output} in {elapsed:.1f}s",
+          file=sys.stderr)
@@ -0,0 +1,146 @@
+import mmap
+import os
+from collections import namedtuple
+
+import compressed_input
+from ip_parse import _OCTETS
+
+# 파싱 오류 기록: 파일 내 바이트 오프셋, 사유, 원본 라인(bytes)
+ParseError = namedtuple('ParseError', ['offset', 'reason', 'line'])
+
+# 보관할 오류 라인 수 상한 (전체 개수는 error_count 로 셈)
+MAX_ERRORS = 1000
+
+
+class HitReader:
+    """'  14473 45.43.11.72' 형식 파일을 mmap 으로 읽어 bytes 단위로 파싱
+
+    records() 는 빈 줄이 아닌 라인마다 (offset, hits, addr, ip) 를 생성한다.
+    hits 는 첫 컬럼이 정수가 아니면 None, addr 은 'count ip' 두 컬럼이 아니거나
+    IPv4 가 아니면 None, ip 는 두 번째 컬럼의 원본 bytes (두 컬럼이 아니면 None).
+    이런 라인은 errors 에 바이트 오프셋과 함께 기록된다. 단 ':' 가 든 주소는 IPv6 로 보고
+    오류로 세지 않는다 (IPv6 검증/분류는 bclass_filter.classify_ipv6 에서 한 번만).
+
+    gzip/bz2/xz/zstd 로 압축된 파일은 compressed_input 으로 풀면서 스트림으로 읽는다
+    (오프셋은 압축을 푼 내용 기준, line_at 은 마지막으로 생성한 라인만 가능).
+    """
+
+    def __init__(self, path, max_errors=MAX_ERRORS):
+        self.path = path
+        self.max_errors = max_errors
+        self.errors = []
+        self.error_count = 0
+        self.line_count = 0
+        self._file = None
+        self._mm = None
+        self._stream = None
+        self._line = b''
+
+    def open(self):
+        if compressed_input.is_compressed(self.path):
+            self._stream = compressed_input.open_input(self.path, 'rb')
+            return self
+        self._file = open(self.path, 'rb')
+        if os.fstat(self._file.fileno()).st_size:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _error(self, offset, reason, line):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(ParseError(offset, reason, line.rstrip(b'\r\n')))
+
+    def line_at(self, offset):
+        """offset 에서 시작하는 라인 (개행 제외 bytes)"""
+        if self._mm is None:
+            # 압축 스트림은 되돌아가 읽을 수 없으므로 마지막 라인
+            return self._line[:-1] if self._line.endswith(b'\n') else self._line
+        end = self._mm.find(b'\n', offset)
+        if end < 0:
+            end = len(self._mm)
+        return self._mm[offset:end]
+
+    def _lines(self):
+        if self._stream is not None:
+            return self._stream
+        if self._mm is None:
+            return ()
+        self._mm.seek(0)
+        return iter(self._mm.readline, b'')
+
+    def records(self):
+        lines = self._lines()
+        stream = self._stream is not None
+        get_octet = _OCTETS.get
+        offset = 0
+        line_count = 0
+        try:
+            for line in lines:
+                line_count += 1
+                if stream:
+                    self._line = line
+                start = offset
+                offset += len(line)
+
+                parts = line.split()
+                if not parts:
+                    continue
+
+                try:
+                    hits = int(parts[0])
+                except ValueError:
+                    hits = None
+                    self._error(start, 'invalid hit count', line)
+
+                # ip_parse.parse_ipv4 를 인라인으로 (라인당 함수 호출 1회 절약)
+                addr = None
+                if len(parts) != 2:
+                    ip = None
+                    self._error(start, 'invalid line format', line)
+                else:
+                    ip = parts[1]
+                    octets = ip.split(b'.')
+                    if len(octets) == 4:
+                        a = get_octet(octets[0])
+                        b = get_octet(octets[1])
+                        c = get_octet(octets[2])
+                        d = get_octet(octets[3])
+                        if a is not None and b is not None and c is not None and d is not None:
+                            addr = (a << 24) | (b << 16) | (c << 8) | d
+                    if addr is None and hits is not None and b':' not in ip:
+                        self._error(start, 'invalid IPv4 address', line)
+
+                yield start, hits, addr, ip
+        finally:
+            self.line_count = line_count
+
+    def __iter__(self):
+        """정상 라인만 (hits, addr) 로"""
+        for _, hits, addr, _ in self.records():
+            if hits is not None and addr is not None:
+                yield hits, addr
+
+    def report_errors(self, limit=10):
+        if not self.error_count:
+            return
+        print(f"Skipped {self.error_count:,} unparsable lines in {self.path}")
+        for error in self.errors[:limit]:
+            text = error.line.decode('utf-8', 'replace')
+            print(f"  byte {error.offset:,}: {error.reason}: {text}")
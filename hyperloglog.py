@@ -0,0 +1,233 @@
+import argparse
+import hashlib
+import math
+import os
+import struct
+from array import array
+
+from ip_parse import parse_ipv4, parse_ipv6
+
+# 2^PRECISION 개 레지스터, 표준 오차 약 1.04 / sqrt(2^PRECISION) (12 -> 1.6%)
+PRECISION = 12
+
+SKETCH_MAGIC = b'HLLN'
+SKETCH_VERSION = 1
+_FILE_HEADER = struct.Struct('<4sHI')
+_SKETCH_HEADER = struct.Struct('<BBH')
+_ENTRY_HEADER = struct.Struct('<HI')
+
+_MASK64 = (1 << 64) - 1
+
+
+def mix64(x):
+    """splitmix64 finalizer: 64비트 정수를 고르게 섞인 64비트 해시로"""
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def hash_ip(ip):
+    """IP(정수, 문자열, bytes)를 64비트 해시로. 같은 주소는 표기와 관계없이 같은 해시"""
+    if not isinstance(ip, int):
+        text = ip.decode('ascii', 'replace') if isinstance(ip, bytes) else ip
+        addr = parse_ipv4(text)
+        if addr is None:
+            addr = parse_ipv6(text)
+        if addr is None:
+            return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+        ip = addr
+    if ip >> 64:
+        # IPv6: 상위 64비트를 먼저 섞어 하위와 합침
+        ip = (ip & _MASK64) ^ mix64(ip >> 64)
+    return mix64(ip)
+
+
+class HyperLogLog:
+    """HyperLogLog 고유값 수 추정 (Flajolet et al.)
+
+    값이 적을 때는 {레지스터 번호: 값} dict(sparse)로 두다가 m/32 개를 넘으면 bytearray 로 바꾼다.
+    같은 precision 끼리는 레지스터 최댓값으로 merge 할 수 있다 (파일, 워커, 날짜별 합집합).
+    """
+
+    def __init__(self, precision=PRECISION):
+        if not 4 <= precision <= 16:
+            raise ValueError(f"precision must be 4..16, got {precision}")
+        self.precision = precision
+        self.m = 1 << precision
+        self._sparse = {}
+        self._dense = None
+
+    def add(self, ip):
+        self.add_hash(hash_ip(ip))
+
+    def add_hash(self, h):
+        p = self.precision
+        index = h >> (64 - p)
+        rest = h & ((1 << (64 - p)) - 1)
+        # 남은 비트에서 첫 1 비트 위치 (모두 0 이면 64-p+1)
+        self.add_rank(index, 64 - p - rest.bit_length() + 1)
+
+    def add_rank(self, index, rank):
+        dense = self._dense
+        if dense is not None:
+            if rank > dense[index]:
+                dense[index] = rank
+        elif rank > self._sparse.get(index, 0):
+            self._sparse[index] = rank
+            if len(self._sparse) > self.m // 32:
+                self._to_dense()
+
+    def _to_dense(self):
+        dense = bytearray(self.m)
+        for index, rank in self._sparse.items():
+            dense[index] = rank
+        self._dense = dense
+        self._sparse = {}
+
+    def update(self, other):
+        """other 와의 합집합으로 갱신"""
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog merge requires the same precision")
+        if other._dense is None:
+            for index, rank in other._sparse.items():
+                self.add_rank(index, rank)
+            return self
+        if self._dense is None:
+            self._to_dense()
+        self._dense = bytearray(map(max, self._dense, other._dense))
+        return self
+
+    def estimate(self):
+        m = self.m
+        if self._dense is None:
+            ranks = self._sparse.values()
+            zeros = m - len(self._sparse)
+            total = zeros + sum(2.0 ** -rank for rank in ranks)
+        else:
+            dense = self._dense
+            zeros = dense.count(0)
+            total = sum(dense.count(rank) * 2.0 ** -rank for rank in range(max(dense) + 1))
+
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / total
+        # 작은 범위는 linear counting 이 더 정확
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return estimate
+
+    def __len__(self):
+        return round(self.estimate())
+
+    def to_bytes(self):
+        """(precision, dense 여부, sparse 개수) 헤더 + sparse 면 번호/값 배열, dense 면 레지스터"""
+        if self._dense is not None:
+            return _SKETCH_HEADER.pack(self.precision, 1, 0) + bytes(self._dense)
+        indexes = array('H', sorted(self._sparse))
+        ranks = bytes(self._sparse[index] for index in indexes)
+        return _SKETCH_HEADER.pack(self.precision, 0, len(indexes)) + indexes.tobytes() + ranks
+
+    @classmethod
+    def from_bytes(cls, data):
+        precision, dense, count = _SKETCH_HEADER.unpack_from(data)
+        sketch = cls(precision)
+        body = memoryview(data)[_SKETCH_HEADER.size:]
+        if dense:
+            if len(body) != sketch.m:
+                raise ValueError("Corrupt HyperLogLog sketch")
+            sketch._dense = bytearray(body)
+            return sketch
+        if len(body) != 3 * count:
+            raise ValueError("Corrupt HyperLogLog sketch")
+        indexes = array('H')
+        indexes.frombytes(body[:2 * count])
+        sketch._sparse = dict(zip(indexes, body[2 * count:]))
+        return sketch
+
+
+class NetworkCardinality:
+    """네트워크별 HyperLogLog 모음: add(network, ip) 로 네트워크마다 고유 IP 수 추정"""
+
+    def __init__(self, precision=PRECISION):
+        self.precision = precision
+        self.sketches = {}
+
+    def add(self, network, ip):
+        sketch = self.sketches.get(network)
+        if sketch is None:
+            sketch = self.sketches[network] = HyperLogLog(self.precision)
+        sketch.add_hash(hash_ip(ip))
+
+    def update(self, other):
+        for network, sketch in other.sketches.items():
+            mine = self.sketches.get(network)
+            if mine is None:
+                mine = self.sketches[network] = HyperLogLog(sketch.precision)
+            mine.update(sketch)
+        return self
+
+    def estimate(self, network):
+        sketch = self.sketches.get(network)
+        return len(sketch) if sketch is not None else 0
+
+    def __len__(self):
+        return len(self.sketches)
+
+    def save(self, path):
+        """네트워크별 스케치를 바이너리 파일로 저장 (os.replace 로 원자적 교체)"""
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(_FILE_HEADER.pack(SKETCH_MAGIC, SKETCH_VERSION, len(self.sketches)))
+            for network, sketch in self.sketches.items():
+                name = network.encode()
+                blob = sketch.to_bytes()
+                f.write(_ENTRY_HEADER.pack(len(name), len(blob)))
+                f.write(name)
+                f.write(blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, version, count = _FILE_HEADER.unpack_from(data)
+        if magic != SKETCH_MAGIC or version != SKETCH_VERSION:
+            raise ValueError(f"Not a HyperLogLog sketch file: {path}")
+        result = cls()
+        pos = _FILE_HEADER.size
+        for _ in range(count):
+            name_len, blob_len = _ENTRY_HEADER.unpack_from(data, pos)
+            pos += _ENTRY_HEADER.size
+            network = data[pos:pos + name_len].decode()
+            pos += name_len
+            sketch = HyperLogLog.from_bytes(data[pos:pos + blob_len])
+            pos += blob_len
+            result.precision = sketch.precision
+            result.sketches[network] = sketch
+        return result
+
+
+def union_files(paths):
+    """여러 스케치 파일(일자별 등)을 로그 재처리 없이 합집합"""
+    result = None
+    for path in paths:
+        part = NetworkCardinality.load(path)
+        result = part if result is None else result.update(part)
+    return result if result is not None else NetworkCardinality()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='네트워크별 고유 IP HyperLogLog 스케치 합치기/조회')
+    parser.add_argument('sketches', nargs='+', help='analyze_output.py --sketch-out 으로 만든 파일')
+    parser.add_argument('--output', help='합친 스케치를 저장할 파일')
+    parser.add_argument('--top', type=int, default=20, help='고유 IP 수 상위 N 개 출력')
+    args = parser.parse_args()
+
+    merged = union_files(args.sketches)
+    if args.output:
+        merged.save(args.output)
+        print(f"Merged {len(args.sketches)} files ({len(merged):,} networks) into {args.output}")
+    ranked = sorted(((len(sketch), network) for network, sketch in merged.sketches.items()),
+                    reverse=True)
+    for unique, network in ranked[:args.top]:
+        print(f"{network}: ~{unique:,} unique IPs")
@@ -0,0 +1,169 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import bclass_filter
+from aggregators import ExactCounter
+from bclass_stats import merge_stats, new_stats, write_stats
+from parallel_filter import process_bytes
+
+CHECKPOINT_VERSION = 1
+
+# 한 번에 읽어 처리할 바이트 수 (추가된 부분이 커도 메모리는 이만큼만 사용)
+BLOCK_SIZE = 16 * 1024 * 1024
+
+# 회전(같은 inode 재사용 포함) 감지용으로 해시하는 파일 앞부분 크기
+HEAD_SIZE = 4096
+
+
+def _head_hash(path, length):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read(min(length, HEAD_SIZE))).hexdigest()
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except FileNotFoundError:
+        return None
+    except ValueError:
+        print(f"Warning: ignoring unreadable checkpoint {path}")
+        return None
+    if checkpoint.get('version') != CHECKPOINT_VERSION:
+        return None
+
+    stats = checkpoint['stats']
+    # JSON 에는 [network, count] 목록으로 저장해 Counter 삽입 순서를 유지
+    stats['bclass_networks'] = ExactCounter(dict(stats['bclass_networks']))
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    data = dict(checkpoint)
+    stats = dict(data['stats'])
+    stats['bclass_networks'] = list(stats['bclass_networks'].items())
+    data['stats'] = stats
+
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def resume_offset(checkpoint, input_file, st):
+    """체크포인트를 이어서 쓸 수 있으면 None, 처음부터 다시 읽어야 하면 그 이유를 반환"""
+    if checkpoint is None:
+        return "no checkpoint"
+    if checkpoint['path'] != os.path.abspath(input_file):
+        return "different input file"
+    if checkpoint['inode'] != st.st_ino or checkpoint['device'] != st.st_dev:
+        return "file rotated"
+    if st.st_size < checkpoint['offset']:
+        return "file truncated"
+    if checkpoint['head'] != _head_hash(input_file, checkpoint['offset']):
+        return "file replaced"
+    return None
+
+
+def _complete_lines_end(f, start, size):
+    """start 이후 마지막 개행 바로 다음 위치. 아직 쓰는 중인 마지막 줄은 다음 실행으로 미룸"""
+    pos = size
+    while pos > start:
+        block_start = max(start, pos - 64 * 1024)
+        f.seek(block_start)
+        block = f.read(pos - block_start)
+        cut = block.rfind(b'\n')
+        if cut >= 0:
+            return block_start + cut + 1
+        pos = block_start
+    return start
+
+
+def run_incremental(input_file, stats_file, checkpoint_file, v6_prefix=bclass_filter.V6_PREFIX,
+                    final=False):
+    """input_file 중 지난 실행 이후 추가된 부분만 분류해 저장된 집계에 합치고 stats 파일을 갱신
+
+    analyze_output.py 의 stats.txt 만 이어서 만든다. test_top.py 의 히트 수 기준 결과
+    (test_top_result.txt)는 체크포인트에 상태가 없으므로 전체 파일로 따로 실행해야 한다.
+
+    개행으로 끝나지 않은 마지막 줄은 아직 쓰는 중일 수 있어 체크포인트에 넣지 않는다.
+    final=True (로그가 닫힌 뒤 마지막 실행)면 그 줄도 stats 파일에는 포함하고, 체크포인트는
+    그 줄 앞에서 저장해 나중에 줄이 이어 쓰여도 두 번 세지 않는다.
+
+    처리한 바이트 수를 반환. 새로 추가된 라인이 없으면 0 (stats 파일이 있으면 건드리지 않음)
+    """
+    bclass_filter.configure_ipv6(v6_prefix)
+    st = os.stat(input_file)
+    checkpoint = load_checkpoint(checkpoint_file)
+
+    reason = resume_offset(checkpoint, input_file, st)
+    if checkpoint is not None and checkpoint.get('v6_prefix') != v6_prefix:
+        reason = "IPv6 prefix changed"
+    if reason is None:
+        start = checkpoint['offset']
+        stats = checkpoint['stats']
+    else:
+        print(f"Starting from byte 0 ({reason})")
+        start = 0
+        stats = new_stats()
+
+    with open(input_file, 'rb') as f:
+        end = _complete_lines_end(f, start, st.st_size)
+        tail_end = st.st_size if final else end
+        if tail_end == start and reason is None and os.path.exists(stats_file):
+            print(f"No new data in {input_file} (offset {start:,})")
+            return 0
+
+        pos = start
+        while pos < end:
+            f.seek(pos)
+            block = f.read(min(BLOCK_SIZE, end - pos))
+            # BLOCK_SIZE 보다 긴 줄이면 end 까지 한 번에
+            cut = (block.rfind(b'\n') + 1) or (end - pos)
+            _, part, _ = process_bytes(block[:cut], False, v6_prefix)
+            merge_stats(stats, part)
+            pos += cut
+            print(f"Processing... {pos - start:,} new bytes")
+
+        output_stats = stats
+        if tail_end > end:
+            f.seek(end)
+            _, part, _ = process_bytes(f.read(tail_end - end), False, v6_prefix)
+            # 체크포인트의 stats 는 그대로 두고 결과 파일용 사본에만 합침
+            output_stats = merge_stats(merge_stats(new_stats(), stats), part)
+            print(f"Included trailing partial line ({tail_end - end:,} bytes, not checkpointed)")
+
+    write_stats(output_stats, stats_file)
+    save_checkpoint(checkpoint_file, {
+        'version': CHECKPOINT_VERSION,
+        'path': os.path.abspath(input_file),
+        'inode': st.st_ino,
+        'device': st.st_dev,
+        'offset': end,
+        'head': _head_hash(input_file, end),
+        'v6_prefix': v6_prefix,
+        'updated': time.time(),
+        'stats': stats,
+    })
+    return tail_end - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='계속 늘어나는 히트 로그를 추가된 부분만 집계')
+    parser.add_argument('input', nargs='?', default='w55_ip.txt')
+    parser.add_argument('--stats', default='stats.txt')
+    parser.add_argument('--checkpoint', help='기본값: <input>.ckpt')
+    parser.add_argument('--v6-prefix', type=int, default=bclass_filter.V6_PREFIX)
+    parser.add_argument('--final', action='store_true',
+                        help='개행 없는 마지막 줄도 stats 에 포함 (로그 기록이 끝난 뒤 마지막 실행)')
+    args = parser.parse_args()
+
+    checkpoint_file = args.checkpoint or f"{args.input}.ckpt"
+    start = time.perf_counter()
+    processed = run_incremental(args.input, args.stats, checkpoint_file, args.v6_prefix,
+                                args.final)
+    print(f"Processed {processed:,} new bytes in {time.perf_counter() - start:.3f}s")
+    print(f"Statistics written to: {args.stats}")
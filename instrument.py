@@ -0,0 +1,255 @@
+import collections
+import contextlib
+import gc
+import signal
+import sys
+import time
+from itertools import islice
+
+# 진행 상황 출력 간격(초)
+PROGRESS_INTERVAL = 2.0
+# 이 라인 수마다 시계를 확인 (라인마다 time 호출을 하지 않도록)
+PROGRESS_CHECK = 4096
+# StageTimer.timed 가 한 번에 꺼내는 항목 수 (타이머 호출은 배치당 한 번)
+STAGE_BATCH = 4096
+# sample 모드 샘플링 간격(초, CPU 시간 기준)
+SAMPLE_INTERVAL = 0.001
+
+PROFILE_MODES = ('stages', 'alloc', 'cprofile', 'sample')
+
+
+class Progress:
+    """마지막 출력 후 interval 초가 지났을 때만 'Processing... N <label>' 출력
+
+    호출하는 쪽은 PROGRESS_CHECK 라인마다 progress(count) 를 부르고, 시간 확인은 여기서 한다.
+    """
+
+    def __init__(self, label='lines completed', interval=PROGRESS_INTERVAL):
+        self.label = label
+        self.interval = interval
+        self._start = time.perf_counter()
+        self._next = self._start + interval
+
+    def __call__(self, count):
+        now = time.perf_counter()
+        if now < self._next:
+            return
+        self._next = now + self.interval
+        print(f"Processing... {count:,} {self.label} "
+              f"({count / (now - self._start):,.0f} lines/sec)")
+
+
+class StageTimer:
+    """이름 붙은 단계별 시간과 카운터
+
+    단계는 중첩될 수 있고 각 단계의 시간은 안쪽 단계를 뺀 자기 시간이다. 예를 들어
+    stage('classify') 안에서 timed('parse', records) 로 레코드를 꺼내면 파싱 시간은 parse 로,
+    나머지 루프 본문 시간은 classify 로 잡힌다. 타이머는 배치/블록 단위로만 호출하므로
+    라인당 비용이 거의 없다.
+    """
+
+    def __init__(self, track_allocations=False):
+        self.seconds = collections.Counter()
+        self.items = collections.Counter()
+        self.counters = collections.Counter()
+        self.order = []
+        self.track_allocations = track_allocations
+        # [단계 이름, 시작 시각, 안쪽 단계 시간 합]
+        self._stack = []
+        self._start = time.perf_counter()
+        self._gc_start = [gen['collections'] for gen in gc.get_stats()]
+        if track_allocations:
+            # 프로파일러 모듈은 해당 모드에서만 import (모든 스크립트가 Progress 때문에 이 모듈을 씀)
+            import tracemalloc
+            tracemalloc.start()
+
+    def _enter(self, name):
+        if name not in self.seconds:
+            self.order.append(name)
+            self.seconds[name] = 0.0
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit(self):
+        name, start, inner = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        self.seconds[name] += elapsed - inner
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        self._enter(name)
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def timed(self, name, iterable, batch=STAGE_BATCH, between=None):
+        """iterable 에서 batch 개씩 꺼내는 시간을 name 단계로 잡으며 그대로 yield
+
+        between 을 주면 배치를 다 넘긴 뒤마다 호출 (output_sink.BatchWriter.flush 등)
+        """
+        iterator = iter(iterable)
+        while True:
+            self._enter(name)
+            try:
+                items = list(islice(iterator, batch))
+            finally:
+                self._exit()
+            if not items:
+                break
+            self.items[name] += len(items)
+            yield from items
+            if between is not None:
+                between()
+        if between is not None:
+            between()
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def report(self, lines=None):
+        """단계별 시간/비율, lines/sec, 할당/GC 요약 출력"""
+        wall = time.perf_counter() - self._start
+        if lines is None:
+            lines = self.counters.get('lines') or max(self.items.values(), default=0)
+        print("\n=== Stage Profile ===")
+        print(f"{'stage':<12} {'seconds':>9} {'share':>7} {'items':>12} {'items/sec':>12}")
+        rows = [(name, self.seconds[name], self.items.get(name)) for name in self.order]
+        rows.append(('(other)', max(wall - sum(self.seconds.values()), 0.0), None))
+        for name, seconds, items in rows:
+            rate = f"{items / seconds:12,.0f}" if items and seconds else f"{'':>12}"
+            items = f"{items:12,}" if items else f"{'':>12}"
+            print(f"{name:<12} {seconds:9.3f} {seconds / wall if wall else 0:7.1%} {items} {rate}")
+        print(f"{'total':<12} {wall:9.3f} {1:7.1%} {lines:12,} {lines / wall if wall else 0:12,.0f}")
+
+        for name, value in self.counters.items():
+            if name != 'lines':
+                print(f"{name}: {value:,}")
+        collections_now = [gen['collections'] for gen in gc.get_stats()]
+        print("GC collections (gen0/1/2): "
+              + "/".join(str(now - start) for now, start in zip(collections_now, self._gc_start)))
+        if self.track_allocations:
+            import tracemalloc
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Python allocations: peak {peak / 2**20:,.1f} MiB, "
+                  f"still allocated {current / 2**20:,.1f} MiB")
+
+
+class _NoStages:
+    """계측을 끈 경우: stage() 는 빈 context, timed() 는 iterable 을 그대로 돌려줌"""
+
+    _null = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._null
+
+    def timed(self, name, iterable, batch=STAGE_BATCH, between=None):
+        return iterable
+
+    def count(self, name, n=1):
+        pass
+
+
+NO_STAGES = _NoStages()
+
+
+class SamplingProfiler:
+    """SIGPROF 타이머로 CPU 시간 interval 마다 실행 중인 (파일, 줄, 함수) 를 셈
+
+    cProfile 처럼 모든 호출을 가로채지 않으므로 측정 대상의 속도가 거의 그대로다.
+    메인 스레드만 샘플링하고 setitimer 가 있는 플랫폼(리눅스/macOS)에서만 동작한다.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        if not hasattr(signal, 'setitimer'):
+            raise RuntimeError("sampling profiler requires signal.setitimer")
+        self.interval = interval
+        self.lines = collections.Counter()
+        self.functions = collections.Counter()
+        self.samples = 0
+        self._previous = None
+
+    def _sample(self, signum, frame):
+        self.samples += 1
+        if frame is None:
+            return
+        code = frame.f_code
+        self.lines[(code.co_filename, frame.f_lineno, code.co_name)] += 1
+        # 함수별로는 호출 스택 전체를 한 번씩 (누적 시간)
+        seen = set()
+        while frame is not None:
+            key = (frame.f_code.co_filename, frame.f_code.co_name)
+            if key not in seen:
+                seen.add(key)
+                self.functions[key] += 1
+            frame = frame.f_back
+
+    def start(self):
+        self._previous = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self):
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous or signal.SIG_DFL)
+
+    def report(self, limit=15):
+        total = self.samples or 1
+        print(f"\n=== Sampling Profile ({self.samples:,} samples, {self.interval * 1000:g}ms) ===")
+        print("Lines (self):")
+        for (filename, lineno, name), count in self.lines.most_common(limit):
+            print(f"  {count / total:6.1%}  {_short(filename)}:{lineno} {name}")
+        print("Functions (cumulative):")
+        for (filename, name), count in self.functions.most_common(limit):
+            print(f"  {count / total:6.1%}  {_short(filename)} {name}")
+
+
+def _short(filename):
+    return filename.rsplit('/', 1)[-1]
+
+
+def add_arguments(parser):
+    parser.add_argument('--profile', choices=PROFILE_MODES,
+                        help='stages: 단계별 시간 요약, alloc: stages + tracemalloc 할당량, '
+                             'cprofile: 함수별 cProfile, sample: SIGPROF 샘플링')
+    parser.add_argument('--profile-out', metavar='FILE',
+                        help='cprofile 모드 결과를 pstats 파일로 저장 (snakeviz 등으로 보기)')
+
+
+@contextlib.contextmanager
+def profiling(mode=None, output=None, limit=20):
+    """mode 에 맞는 프로파일러를 켜고 끝나면 요약 출력
+
+    stages/alloc 모드는 StageTimer 를, 그 외에는 NO_STAGES 를 yield 한다.
+    """
+    if mode in ('stages', 'alloc'):
+        stages = StageTimer(track_allocations=mode == 'alloc')
+        try:
+            yield stages
+        finally:
+            stages.report()
+    elif mode == 'cprofile':
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield NO_STAGES
+        finally:
+            profiler.disable()
+            if output:
+                profiler.dump_stats(output)
+                print(f"cProfile stats written to: {output}")
+            print("\n=== cProfile (cumulative) ===")
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(limit)
+    elif mode == 'sample':
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            yield NO_STAGES
+        finally:
+            profiler.stop()
+            profiler.report(limit)
+    else:
+        yield NO_STAGES
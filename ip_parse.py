@@ -0,0 +1,121 @@
+import ipaddress
+from functools import lru_cache
+
+# "0".."255", b"0".."b"255" -> int. 선행 0("01"), 공백, 부호, 비ASCII 숫자 등은 자동으로 걸러짐
+_OCTETS = {str(i): i for i in range(256)}
+_OCTETS.update({str(i).encode(): i for i in range(256)})
+
+IPV6_BITS = 128
+
+# 점 표기 IPv4 최대 길이 ("255.255.255.255")
+IPV4_MAX_LEN = 15
+
+
+def parse_ipv4(ip):
+    """점 표기 IPv4(str 또는 bytes)를 32비트 정수로 변환. 형식이 틀리면 None
+
+    옥텟은 정확히 "0".."255" 만 허용하므로 ipaddress.IPv4Address 와 같은 기준
+    (선행 0 거부)이고, 잘못된 입력에도 예외를 만들지 않는다.
+    """
+    parts = ip.split(b'.' if type(ip) is bytes else '.')
+    if len(parts) != 4:
+        return None
+    octets = _OCTETS
+    a = octets.get(parts[0])
+    b = octets.get(parts[1])
+    c = octets.get(parts[2])
+    d = octets.get(parts[3])
+    if a is None or b is None or c is None or d is None:
+        return None
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+def parse_ipv4_many(ips):
+    """IPv4 문자열 목록(str/bytes list 또는 numpy 'U'/'S' 배열)을 한꺼번에 (addrs, valid) 로
+
+    numpy 가 있으면 각 문자열을 고정폭 문자 행렬로 놓고 열 16개를 따라가며 옥텟을 계산한다
+    (문자열 수와 무관하게 Python 반복은 16회). 형식이 틀린 항목은 valid=False, addrs=0.
+    numpy 고정폭 문자열은 끝의 NUL 문자를 보존하지 않으므로 '1.2.3.4\\x00' 은 올바른 주소로 본다.
+    numpy 가 없으면 parse_ipv4 를 항목마다 호출해 (array('I'), bool list) 를 돌려준다.
+    numpy 는 여기서만 쓰므로 호출할 때 import (hit_reader 등 import 하는 스크립트의 시작 시간 절약)
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+    if np is None:
+        from array import array
+        parsed = [parse_ipv4(ip) for ip in ips]
+        return array('I', [addr or 0 for addr in parsed]), [addr is not None for addr in parsed]
+
+    width = IPV4_MAX_LEN + 1
+    if not isinstance(ips, np.ndarray):
+        ips = list(ips)
+        text = bool(ips) and isinstance(ips[0], str)
+        ips = np.array(ips, dtype=f'U{width}' if text else f'S{width}')
+    elif ips.dtype.kind not in 'US':
+        raise TypeError(f"expected str or bytes array, got {ips.dtype}")
+    elif ips.dtype.itemsize // (4 if ips.dtype.kind == 'U' else 1) < width:
+        ips = ips.astype(f'{ips.dtype.kind}{width}')
+
+    # (width, n) 문자 코드 행렬: 열 하나가 모든 문자열의 j 번째 문자.
+    # width 보다 긴 문자열은 잘려도 마지막 열이 0 이 아니므로 무효 처리됨
+    item = 4 if ips.dtype.kind == 'U' else 1
+    codes = np.ascontiguousarray(ips).view(np.uint32 if item == 4 else np.uint8)
+    columns = np.ascontiguousarray(codes.reshape(len(ips), -1)[:, :width].T).astype(np.int32)
+
+    n = len(ips)
+    ok = columns[IPV4_MAX_LEN] == 0
+    addrs = np.zeros(n, dtype=np.uint32)
+    octet = np.zeros(n, dtype=np.int32)
+    digits = np.zeros(n, dtype=np.int32)
+    dots = np.zeros(n, dtype=np.int32)
+    ended = np.zeros(n, dtype=bool)
+    for c in columns:
+        end = c == 0
+        is_dot = c == 46
+        is_digit = (c >= 48) & (c <= 57)
+        # 허용 문자는 숫자와 점뿐이고, 끝(0)난 뒤에 다시 문자가 나오면 무효
+        ok &= (end | is_dot | is_digit) & (end | ~ended)
+        # 두 번째 숫자가 올 때 첫 숫자가 0 이면 선행 0
+        ok &= ~(is_digit & (digits == 1) & (octet == 0))
+        # 점 또는 문자열 끝에서 옥텟 하나가 닫힘: 1~3자리, 255 이하
+        close = is_dot | (end & ~ended)
+        ok &= ~close | ((digits >= 1) & (digits <= 3) & (octet <= 255))
+        addrs = np.where(close, (addrs << np.uint32(8)) | octet.astype(np.uint32), addrs)
+        octet = np.where(is_digit, octet * 10 + (c - 48), np.where(close, 0, octet))
+        digits = np.where(is_digit, digits + 1, np.where(close, 0, digits))
+        dots += is_dot
+        ended |= end
+
+    ok &= dots == 3
+    addrs[~ok] = 0
+    return addrs, ok
+
+
+def format_ipv4(addr):
+    return f"{addr >> 24}.{(addr >> 16) & 0xFF}.{(addr >> 8) & 0xFF}.{addr & 0xFF}"
+
+
+def parse_ipv6(ip):
+    """IPv6 문자열을 128비트 정수로 변환. 형식이 틀리면 None
+
+    IPv6 는 표기 형태가 다양해서 ipaddress 로 파싱한다. ':' 가 없는 문자열은 바로 None 이므로
+    IPv4 위주 입력에서는 예외 비용이 생기지 않는다.
+    """
+    if ':' not in ip:
+        return None
+    try:
+        return int(ipaddress.IPv6Address(ip))
+    except ValueError:
+        return None
+
+
+def prefix_mask6(length):
+    return ((1 << IPV6_BITS) - 1) ^ ((1 << (IPV6_BITS - length)) - 1)
+
+
+@lru_cache(maxsize=65536)
+def format_network6(net, length):
+    """네트워크 번호(상위 length 비트)를 '2001:db8::/48' 형식으로"""
+    return f"{ipaddress.IPv6Address(net << (IPV6_BITS - length))}/{length}"
@@ -0,0 +1,213 @@
+import bisect
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from hyperloglog import mix64
+from ip_parse import parse_ipv4
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 기본 Bloom 오탐률
+FALSE_POSITIVE_RATE = 0.01
+
+# 스냅샷 헤더: magic, version, IP 수, 비트 수, 해시 수
+IPSET_MAGIC = b'IPST'
+IPSET_VERSION = 1
+_HEADER = struct.Struct('<4sHxxQQI4x')
+
+_MASK32 = 0xFFFFFFFF
+_MASK64 = (1 << 64) - 1
+
+
+def bloom_size(count, false_positive_rate=FALSE_POSITIVE_RATE):
+    """count 개를 false_positive_rate 로 담을 (비트 수, 해시 수)"""
+    count = max(count, 1)
+    bits = math.ceil(-count * math.log(false_positive_rate) / (math.log(2) ** 2))
+    hashes = max(1, round(bits / count * math.log(2)))
+    return bits, hashes
+
+
+class BloomFilter:
+    """32비트 IPv4 정수용 Bloom filter (bytearray 비트 배열, 항목당 약 1.2바이트 @ 1%)
+
+    해시는 splitmix64 한 번을 두 32비트 값으로 나눈 double hashing: i 번째 위치 = h1 + i*h2 (mod m)
+    """
+
+    def __init__(self, bits, hashes, data=None):
+        self.bits = bits
+        self.hashes = hashes
+        self.data = bytearray((bits + 7) // 8) if data is None else data
+
+    @classmethod
+    def for_capacity(cls, count, false_positive_rate=FALSE_POSITIVE_RATE):
+        return cls(*bloom_size(count, false_positive_rate))
+
+    def add(self, addr):
+        h = mix64(addr)
+        h1 = h & _MASK32
+        h2 = (h >> 32) | 1
+        bits = self.bits
+        data = self.data
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % bits
+            data[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, addr):
+        # mix64 인라인 (조회마다 함수 호출 1회 절약)
+        h = (addr + 0x9E3779B97F4A7C15) & _MASK64
+        h = ((h ^ (h >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        h = ((h ^ (h >> 27)) * 0x94D049BB133111EB) & _MASK64
+        h ^= h >> 31
+        h1 = h & _MASK32
+        h2 = (h >> 32) | 1
+        bits = self.bits
+        data = self.data
+        for i in range(self.hashes):
+            pos = (h1 + i * h2) % bits
+            if not data[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def _positions(self, addrs):
+        """numpy: 주소 배열의 (n, hashes) 비트 위치"""
+        x = np.asarray(addrs, dtype=np.uint64)
+        x = x + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        x = x ^ (x >> np.uint64(31))
+        h1 = x & np.uint64(_MASK32)
+        h2 = (x >> np.uint64(32)) | np.uint64(1)
+        i = np.arange(self.hashes, dtype=np.uint64)
+        return (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.bits)
+
+    def add_many(self, addrs):
+        if np is None:
+            for addr in addrs:
+                self.add(addr)
+            return
+        flags = np.unpackbits(np.frombuffer(self.data, dtype=np.uint8), bitorder='little')
+        for start in range(0, len(addrs), 1 << 20):
+            flags[self._positions(addrs[start:start + (1 << 20)]).ravel()] = 1
+        self.data[:] = np.packbits(flags, bitorder='little')[:len(self.data)].tobytes()
+
+    def contains_many(self, addrs):
+        """numpy uint32 배열 일괄 조회. bool 배열 반환"""
+        if np is None:
+            raise ImportError("contains_many requires numpy")
+        data = np.frombuffer(self.data, dtype=np.uint8)
+        pos = self._positions(addrs)
+        byte = data[(pos >> np.uint64(3)).astype(np.intp)]
+        return ((byte >> (pos & np.uint64(7)).astype(np.uint8)) & 1).all(axis=1)
+
+
+class IPSet:
+    """Bloom filter 로 먼저 거르고, 통과한 것만 정렬된 uint32 배열에서 이진 탐색으로 확인
+
+    정확한 목록은 IP 당 4바이트 (문자열 set 은 100바이트 이상). save() 한 스냅샷을 load() 하면
+    정렬 배열은 mmap 으로 두고 Bloom 통과 시에만 페이지를 읽는다.
+    """
+
+    def __init__(self, addrs, false_positive_rate=FALSE_POSITIVE_RATE):
+        if np is None:
+            addrs = sorted(set(addrs))
+            self.sorted = array('I', addrs)
+        else:
+            addrs = np.unique(np.asarray(addrs, dtype=np.uint32))
+            self.sorted = array('I')
+            self.sorted.frombytes(addrs.tobytes())
+        self.bloom = BloomFilter.for_capacity(len(self.sorted), false_positive_rate)
+        self.bloom.add_many(addrs)
+        self._mm = None
+
+    def __len__(self):
+        return len(self.sorted)
+
+    def __contains__(self, addr):
+        if addr not in self.bloom:
+            return False
+        ips = self.sorted
+        i = bisect.bisect_left(ips, addr)
+        return i < len(ips) and ips[i] == addr
+
+    def contains_many(self, addrs):
+        """numpy 일괄 조회: Bloom 통과분만 searchsorted 로 확인"""
+        addrs = np.asarray(addrs, dtype=np.uint32)
+        result = self.bloom.contains_many(addrs)
+        candidates = np.flatnonzero(result)
+        if len(candidates) and len(self.sorted):
+            ips = np.frombuffer(self.sorted, dtype=np.uint32)
+            i = np.minimum(np.searchsorted(ips, addrs[candidates]), len(ips) - 1)
+            result[candidates] = ips[i] == addrs[candidates]
+        else:
+            result[:] = False
+        return result
+
+    def memory_bytes(self):
+        return len(self.bloom.data) + len(self.sorted) * self.sorted.itemsize
+
+    def save(self, path):
+        """헤더 + Bloom 비트 + 정렬 IP 배열 (os.replace 로 원자적 교체)"""
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(IPSET_MAGIC, IPSET_VERSION, len(self.sorted), self.bloom.bits,
+                                 self.bloom.hashes))
+            f.write(self.bloom.data)
+            f.write(self.sorted.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, bits, hashes = _HEADER.unpack_from(mm)
+        bloom_len = (bits + 7) // 8
+        if magic != IPSET_MAGIC or version != IPSET_VERSION \
+                or len(mm) != _HEADER.size + bloom_len + 4 * count:
+            mm.close()
+            raise ValueError(f"Corrupt IP set snapshot: {path}")
+        ipset = cls.__new__(cls)
+        view = memoryview(mm)
+        bloom_end = _HEADER.size + bloom_len
+        ipset.bloom = BloomFilter(bits, hashes, bytearray(view[_HEADER.size:bloom_end]))
+        ipset.sorted = view[bloom_end:].cast('I')
+        ipset._mm = mm
+        return ipset
+
+
+def read_ip_list(path):
+    """한 줄에 IP 하나 (또는 'count ip') 인 파일의 IPv4 정수들. '#' 주석과 잘못된 줄은 건너뜀"""
+    addrs = array('I')
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.split('#', 1)[0].split()
+            if parts:
+                addr = parse_ipv4(parts[-1])
+                if addr is not None:
+                    addrs.append(addr)
+    return addrs
+
+
+def load_ip_set(path, false_positive_rate=FALSE_POSITIVE_RATE):
+    """.ipset 스냅샷이면 mmap 으로, 아니면 텍스트 목록으로 IPSet 생성"""
+    with open(path, 'rb') as f:
+        magic = f.read(len(IPSET_MAGIC))
+    if magic == IPSET_MAGIC:
+        return IPSet.load(path)
+    return IPSet(read_ip_list(path), false_positive_rate)
+
+
+if __name__ == "__main__":
+    # python ipset.py LIST.txt OUT.ipset [false_positive_rate]
+    source, target = sys.argv[1:3]
+    rate = float(sys.argv[3]) if len(sys.argv) > 3 else FALSE_POSITIVE_RATE
+    ipset = IPSet(read_ip_list(source), rate)
+    ipset.save(target)
+    print(f"{len(ipset):,} IPs -> {target} ({os.path.getsize(target):,} bytes, "
+          f"{ipset.bloom.hashes} hashes, target false positive rate {rate:g})")
@@ -0,0 +1,235 @@
+import argparse
+import heapq
+import os
+import sys
+import tempfile
+import time
+from array import array
+
+import network_index
+from bclass_filter import B_CLASS_TOP_BITS, format_network16
+from hit_reader import HitReader
+from ip_parse import format_ipv4
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 정렬에 쓸 메모리 한도 기본값
+MEMORY_LIMIT = 256 * 2**20
+# 정렬 중 레코드 하나가 차지하는 대략적인 바이트
+# (numpy: array('Q') 8 + 정렬 사본 8, 순수 Python: int 객체 32 + list 슬롯 8 + array 8)
+RECORD_BYTES = 16 if np is not None else 48
+# run 파일을 읽거나 정렬 결과를 Python 정수로 풀 때의 블록 (레코드 수)
+BLOCK_RECORDS = 64 * 1024
+
+# 키 하위 32비트의 hits. hit_reader 는 음수나 더 큰 수도 받으므로 0..0xFFFFFFFF 로 잘라 넣음
+_HITS_MASK = 0xFFFFFFFF
+
+
+def _sort_keys(keys):
+    """array('Q') 를 정렬한 numpy 배열 또는 list 로"""
+    if np is not None:
+        return np.sort(np.frombuffer(keys, dtype=np.uint64))
+    return sorted(keys)
+
+
+def _iter_blocks(data, block=BLOCK_RECORDS):
+    """정렬 결과를 block 개씩 Python 정수로 풀어 yield (numpy 배열 전체를 list 로 만들지 않음)"""
+    if np is not None and isinstance(data, np.ndarray):
+        for start in range(0, len(data), block):
+            yield from data[start:start + block].tolist()
+    else:
+        yield from data
+
+
+def _read_run(path, block):
+    with open(path, 'rb') as f:
+        while True:
+            keys = array('Q')
+            try:
+                keys.fromfile(f, block)
+            except EOFError:
+                # 마지막 블록은 block 보다 짧음 (읽은 만큼은 keys 에 들어 있음)
+                pass
+            if not keys:
+                return
+            yield from keys
+
+
+class SortedHits:
+    """(addr << 32 | hits) 키를 메모리 한도 안에서 주소 순으로 정렬
+
+    키가 한도(memory_limit / RECORD_BYTES 개) 안이면 메모리에서 한 번에 정렬하고,
+    넘치면 한도만큼씩 정렬해 run 파일로 내보낸 뒤 heapq.merge 로 합친다 (외부 정렬).
+    run 을 읽는 버퍼도 한도를 run 수로 나눠 잡으므로 입력이 RAM 보다 커도 메모리는 한도 근처로 유지된다.
+    """
+
+    def __init__(self, memory_limit=MEMORY_LIMIT, tmp_dir=None):
+        self.memory_limit = memory_limit
+        self.max_records = max(BLOCK_RECORDS, memory_limit // RECORD_BYTES)
+        self.tmp_dir = tmp_dir
+        self.records = 0
+        self.runs = []
+        self._keys = array('Q')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def feed(self, hit_records):
+        """(hits, addr) 들을 키로 추가 (hits 는 0..0xFFFFFFFF 로 자름)"""
+        keys = self._keys
+        append = keys.append
+        limit = self.max_records
+        for hits, addr in hit_records:
+            append((addr << 32) | min(max(hits, 0), _HITS_MASK))
+            if len(keys) >= limit:
+                self.records += len(keys)
+                self._spill()
+                keys = self._keys
+                append = keys.append
+        self.records += len(keys)
+
+    def _spill(self):
+        data = _sort_keys(self._keys)
+        fd, path = tempfile.mkstemp(suffix='.run', dir=self.tmp_dir)
+        with os.fdopen(fd, 'wb') as f:
+            if np is not None:
+                data.tofile(f)
+            else:
+                array('Q', data).tofile(f)
+        self.runs.append(path)
+        self._keys = array('Q')
+
+    @property
+    def strategy(self):
+        return 'external' if self.runs else 'memory'
+
+    def __iter__(self):
+        """주소 순(같은 주소는 hits 순) 키"""
+        if not self.runs:
+            yield from _iter_blocks(_sort_keys(self._keys))
+            return
+        if self._keys:
+            self._spill()
+        block = max(1024, self.memory_limit // (2 * 8 * len(self.runs)))
+        yield from heapq.merge(*[_read_run(path, block) for path in self.runs])
+
+    def close(self):
+        for path in self.runs:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self.runs = []
+
+
+def address_ranges(index):
+    """NetworkIndex 의 병합된 /16 구간을 주소 구간 (starts, ends) 로"""
+    return [start << 16 for start in index.starts], [(end << 16) | 0xFFFF for end in index.ends]
+
+
+def merge_join(sorted_keys, index):
+    """주소 순 키와 병합 구간을 한 번씩만 훑어 (addr, hits 합, range_id 또는 None) 를 주소 순으로 생성
+
+    정렬돼 있으므로 같은 IP 의 여러 줄은 이웃해 있어 여기서 합친다.
+    """
+    starts, ends = address_ranges(index)
+    count = len(starts)
+    i = 0
+    current = None
+    total = 0
+    current_range = None
+    for key in sorted_keys:
+        addr = key >> 32
+        if addr == current:
+            total += key & _HITS_MASK
+            continue
+        if current is not None:
+            yield current, total, current_range
+        while i < count and ends[i] < addr:
+            i += 1
+        current_range = i if i < count and starts[i] <= addr else None
+        current = addr
+        total = key & _HITS_MASK
+    if current is not None:
+        yield current, total, current_range
+
+
+def join_file(input_file, output_file, index, memory_limit=MEMORY_LIMIT, min_hits=0,
+              tmp_dir=None):
+    """input_file 의 IPv4 를 정렬 후 구간과 merge join 해 output_file 에 TSV 로 기록. 요약 dict 반환
+
+    한 줄: ip, hits 합, /16 네트워크, range_id (없으면 '-'), status
+    (B클래스 중 구간 안이면 MATCH, 밖이면 NONE, B클래스가 아니면 NOT_B)
+    """
+    summary = {'lines': 0, 'records': 0, 'unique_ips': 0, 'matched': 0, 'written': 0}
+    start = time.perf_counter()
+    with SortedHits(memory_limit, tmp_dir) as keys:
+        with HitReader(input_file) as reader:
+            keys.feed(reader)
+            summary['lines'] = reader.line_count
+            summary['errors'] = reader.error_count
+        summary['records'] = keys.records
+        summary['strategy'] = keys.strategy
+        summary['runs'] = len(keys.runs)
+        summary['read_seconds'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with open(output_file, 'w') as out:
+            write = out.write
+            out.write("ip\thits\tnetwork\trange_id\tstatus\n")
+            for addr, hits, range_id in merge_join(keys, index):
+                summary['unique_ips'] += 1
+                if (addr >> 30) != B_CLASS_TOP_BITS:
+                    status = 'NOT_B'
+                elif range_id is None:
+                    status = 'NONE'
+                else:
+                    status = 'MATCH'
+                    summary['matched'] += 1
+                if hits < min_hits:
+                    continue
+                write(f"{format_ipv4(addr)}\t{hits}\t{format_network16(addr >> 16)}\t"
+                      f"{'-' if range_id is None else range_id}\t{status}\n")
+                summary['written'] += 1
+        # 외부 정렬이면 run 수는 마지막 남은 키를 내보낸 뒤 확정됨
+        summary['runs'] = len(keys.runs)
+        summary['join_seconds'] = time.perf_counter() - start
+    return summary
+
+
+def describe_strategy(summary, memory_limit):
+    if summary['strategy'] == 'memory':
+        return (f"in-memory sort ({summary['records']:,} records within "
+                f"{memory_limit / 2**20:g} MiB)")
+    return (f"external sort ({summary['records']:,} records > {memory_limit / 2**20:g} MiB: "
+            f"{summary['runs']} sorted runs merged with heapq.merge)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='IP 를 주소 순으로 정렬한 뒤 country_asn222.csv 구간과 merge join')
+    parser.add_argument('input', nargs='?', default='ppom_bclass.txt')
+    parser.add_argument('output', nargs='?', default='merge_join.tsv')
+    parser.add_argument('--memory-mb', type=float, default=MEMORY_LIMIT / 2**20,
+                        help='정렬 메모리 한도 (넘으면 run 파일로 외부 정렬)')
+    parser.add_argument('--min-hits', type=int, default=0, help='IP 별 히트 합이 이보다 작으면 출력 생략')
+    parser.add_argument('--tmp-dir', help='run 파일을 둘 디렉토리 (기본: 시스템 임시 디렉토리)')
+    args = parser.parse_args()
+
+    memory_limit = int(args.memory_mb * 2**20)
+    try:
+        index = network_index.load_network_index_cached(network_index.NETWORK_FILE)
+    except FileNotFoundError:
+        print(f"Error: {network_index.NETWORK_FILE} file not found")
+        sys.exit(1)
+    summary = join_file(args.input, args.output, index, memory_limit, args.min_hits, args.tmp_dir)
+    print(f"Strategy: {describe_strategy(summary, memory_limit)}")
+    print(f"Total processed lines: {summary['lines']:,} ({summary['errors']:,} skipped)")
+    print(f"Unique IPs: {summary['unique_ips']:,}, matched B-class IPs: {summary['matched']:,}")
+    print(f"Read: {summary['read_seconds']:.3f}s, sort + merge join: {summary['join_seconds']:.3f}s")
+    print(f"Results written to: {args.output} ({summary['written']:,} rows)")
@@ -0,0 +1,283 @@
+import bisect
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+NETWORK_FILE = 'country_asn222.csv'
+SNAPSHOT_FILE = 'country_asn222.idx'
+
+# 스냅샷 헤더: magic, version, 구간 수, 원본 행 수, 원본 크기, 원본 mtime_ns, 원본 sha256, payload crc32
+SNAPSHOT_MAGIC = b'IPNX'
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct('<4sHxxIIQQ32sI')
+
+# /16 네트워크 개수 (a.b 두 옥텟)
+NETWORK16_COUNT = 1 << 16
+
+
+def parse_prefix16(prefix):
+    """'175.214.' 형태의 /16 접두사를 0..65535 정수로 변환. 형식이 틀리면 None"""
+    parts = prefix.strip().strip('.').split('.')
+    if len(parts) != 2:
+        return None
+    try:
+        a = int(parts[0])
+        b = int(parts[1])
+    except ValueError:
+        return None
+    if not (0 <= a <= 255 and 0 <= b <= 255):
+        return None
+    return (a << 8) | b
+
+
+def merge_ranges(ranges):
+    """(start, end) /16 구간 목록을 정렬하고 겹치거나 인접한 구간을 병합"""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start, end) for start, end in merged]
+
+
+def read_network_ranges(path=NETWORK_FILE, strict=False):
+    """country_asn222.csv 의 start,end 컬럼을 (start, end) /16 정수 구간으로 읽음
+
+    헤더(첫 줄)와 '#VALUE!' 같은 스프레드시트 오류 행은 항상 건너뛴다. strict 면 그 밖에
+    파싱되지 않는 행이나 개행 없이 끝나는 마지막 행(쓰는 중인 파일)이 있을 때 ValueError.
+    """
+    ranges = []
+    with open(path, 'r') as file:
+        for line_no, line in enumerate(file, 1):
+            if strict and not line.endswith('\n'):
+                raise ValueError(f"{path}:{line_no}: incomplete last line")
+            parts = line.strip().split(',')
+            start = end = None
+            if len(parts) >= 2:
+                start = parse_prefix16(parts[0])
+                end = parse_prefix16(parts[1])
+            # 헤더, '#VALUE!' 등은 건너뜀
+            if start is None or end is None:
+                if strict and line_no > 1 and line.strip() and not line.startswith('#'):
+                    raise ValueError(f"{path}:{line_no}: invalid range row: {line.strip()}")
+                continue
+            if end < start:
+                start, end = end, start
+            ranges.append((start, end))
+    return ranges
+
+
+class NetworkIndex:
+    """병합된 /16 구간 목록 + 65,536칸 비트맵. 조회는 정수 하나로 O(1)"""
+
+    def __init__(self, ranges=()):
+        ranges = list(ranges)
+        self.row_count = len(ranges)
+        merged = merge_ranges(ranges)
+        self.starts = [start for start, _ in merged]
+        self.ends = [end for _, end in merged]
+
+        self.bitmap = bytearray(NETWORK16_COUNT)
+        for start, end in merged:
+            self.bitmap[start:end + 1] = b'\x01' * (end - start + 1)
+
+    @classmethod
+    def from_arrays(cls, starts, ends, bitmap, row_count):
+        """이미 병합된 구간과 비트맵으로 생성 (스냅샷 로드용)"""
+        index = cls.__new__(cls)
+        index.row_count = row_count
+        index.starts = list(starts)
+        index.ends = list(ends)
+        index.bitmap = bitmap
+        return index
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __contains__(self, net):
+        return bool(self.bitmap[net])
+
+    def contains_addr(self, addr):
+        return bool(self.bitmap[addr >> 16])
+
+    def find_range(self, net):
+        """net 을 포함하는 병합 구간 번호. 없으면 None"""
+        i = bisect.bisect_right(self.starts, net) - 1
+        if i >= 0 and net <= self.ends[i]:
+            return i
+        return None
+
+    def network_count(self):
+        """포함된 /16 네트워크 수"""
+        return sum(end - start + 1 for start, end in zip(self.starts, self.ends))
+
+
+def load_network_index(path=NETWORK_FILE, strict=False):
+    return NetworkIndex(read_network_ranges(path, strict))
+
+
+def load_network_index_checked(path=NETWORK_FILE):
+    """교체용 인덱스: 파싱되지 않는 행이 있거나 구간이 하나도 없으면 ValueError (스냅샷도 갱신)"""
+    index = load_network_index(path, strict=True)
+    if not len(index):
+        raise ValueError(f"{path}: no network ranges")
+    try:
+        write_snapshot(index, os.path.splitext(path)[0] + '.idx', path)
+    except OSError as e:
+        print(f"Warning: could not write snapshot: {e}")
+    return index
+
+
+def _file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).digest()
+
+
+def write_snapshot(index, snapshot_path, source_path):
+    """NetworkIndex 를 바이너리 스냅샷으로 저장 (임시 파일에 쓴 뒤 교체)"""
+    st = os.stat(source_path)
+    count = len(index)
+    payload = (bytes(index.bitmap)
+               + struct.pack(f'<{count}I', *index.starts)
+               + struct.pack(f'<{count}I', *index.ends))
+    header = _HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, count, index.row_count,
+                          st.st_size, st.st_mtime_ns, _file_sha256(source_path),
+                          zlib.crc32(payload))
+
+    tmp_path = f"{snapshot_path}.tmp{os.getpid()}"
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(payload)
+    os.replace(tmp_path, snapshot_path)
+
+
+def build_snapshot(source_path=NETWORK_FILE, snapshot_path=SNAPSHOT_FILE):
+    index = load_network_index(source_path)
+    write_snapshot(index, snapshot_path, source_path)
+    return index
+
+
+def read_snapshot(snapshot_path):
+    """스냅샷을 mmap 으로 열어 (헤더 dict, NetworkIndex) 반환. 손상/버전 불일치 시 ValueError"""
+    with open(snapshot_path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(mm) < _HEADER.size:
+        raise ValueError(f"{snapshot_path}: truncated header")
+    (magic, version, count, row_count, size, mtime_ns, sha256,
+     crc) = _HEADER.unpack_from(mm, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        raise ValueError(f"{snapshot_path}: unsupported snapshot format")
+
+    payload = memoryview(mm)[_HEADER.size:]
+    if len(payload) != NETWORK16_COUNT + 8 * count or zlib.crc32(payload) != crc:
+        raise ValueError(f"{snapshot_path}: checksum mismatch")
+
+    starts = struct.unpack_from(f'<{count}I', payload, NETWORK16_COUNT)
+    ends = struct.unpack_from(f'<{count}I', payload, NETWORK16_COUNT + 4 * count)
+    # 비트맵은 mmap 을 그대로 참조 (복사 없음)
+    bitmap = payload[:NETWORK16_COUNT]
+    header = {'size': size, 'mtime_ns': mtime_ns, 'sha256': sha256}
+    return header, NetworkIndex.from_arrays(starts, ends, bitmap, row_count)
+
+
+def _snapshot_is_fresh(header, source_path):
+    st = os.stat(source_path)
+    if header['size'] != st.st_size:
+        return False
+    if header['mtime_ns'] == st.st_mtime_ns:
+        return True
+    # mtime 만 바뀐 경우(복사, touch)는 내용 해시로 확인
+    return header['sha256'] == _file_sha256(source_path)
+
+
+def load_network_index_cached(source_path=NETWORK_FILE, snapshot_path=None):
+    """스냅샷이 CSV 와 일치하면 스냅샷을, 아니면 CSV 를 읽고 스냅샷을 다시 만듦"""
+    if snapshot_path is None:
+        snapshot_path = os.path.splitext(source_path)[0] + '.idx'
+
+    try:
+        header, index = read_snapshot(snapshot_path)
+        if _snapshot_is_fresh(header, source_path):
+            return index
+    except FileNotFoundError:
+        pass
+    except ValueError as e:
+        print(f"Warning: rebuilding snapshot ({e})")
+
+    index = load_network_index(source_path)
+    try:
+        write_snapshot(index, snapshot_path, source_path)
+    except OSError as e:
+        print(f"Warning: could not write snapshot {snapshot_path}: {e}")
+    return index
+
+
+class ReloadableIndex:
+    """현재 NetworkIndex 참조를 들고 있다가 reload() 때 통째로 교체 (copy-on-write)
+
+    조회하는 쪽은 current 를 한 번 읽어 그 인덱스로 끝까지 처리하면 되고,
+    새 인덱스는 별도로 만든 뒤 참조만 바꾸므로 조회가 멈추지 않는다.
+    새 CSV 를 읽지 못하면(없음, 쓰는 중, 구간 없음) 예외를 내고 이전 인덱스를 그대로 둔다.
+    """
+
+    def __init__(self, source_path=NETWORK_FILE):
+        self.source_path = source_path
+        self.current = load_network_index_cached(source_path)
+        self._source_mtime = self._mtime()
+        # 마지막으로 실패한 CSV 의 mtime (파일이 다시 바뀔 때까지 changed() 가 False)
+        self._failed_mtime = self._source_mtime
+        self._reload_lock = threading.Lock()
+
+    def _mtime(self):
+        try:
+            return os.stat(self.source_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def changed(self):
+        mtime = self._mtime()
+        return mtime != self._source_mtime and mtime != self._failed_mtime
+
+    def reload(self):
+        """새 인덱스를 만들어 교체. 소요 시간과 이전/새 테이블 크기를 dict 로 반환"""
+        with self._reload_lock:
+            start = time.perf_counter()
+            mtime = self._mtime()
+            try:
+                new = load_network_index_checked(self.source_path)
+            except (OSError, ValueError):
+                self._failed_mtime = mtime
+                raise
+            old = self.current
+            self.current = new
+            self._source_mtime = mtime
+            return {
+                'seconds': time.perf_counter() - start,
+                'old_ranges': len(old),
+                'new_ranges': len(new),
+                'old_networks': old.network_count(),
+                'new_networks': new.network_count(),
+            }
+
+
+def format_reload_report(report):
+    return (f"Reloaded network table in {report['seconds'] * 1000:.1f}ms: "
+            f"ranges {report['old_ranges']:,} -> {report['new_ranges']:,}, "
+            f"/16 networks {report['old_networks']:,} -> {report['new_networks']:,}")
+
+
+if __name__ == "__main__":
+    # 실행하면 country_asn222.csv 로 스냅샷(country_asn222.idx)을 새로 만듦
+    index = build_snapshot(os.path.join(os.getcwd(), NETWORK_FILE),
+                           os.path.join(os.getcwd(), SNAPSHOT_FILE))
+    print(f"Snapshot written: {SNAPSHOT_FILE}")
+    print(f"Rows loaded: {index.row_count:,}")
+    print(f"Merged ranges: {len(index):,}")
+    print(f"/16 networks covered: {index.network_count():,}")
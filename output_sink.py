@@ -0,0 +1,114 @@
+import queue
+import threading
+import time
+
+from instrument import NO_STAGES
+
+# 결과 파일 형식: text (기존 output.txt / test_top_result.txt), tsv, jsonl
+OUTPUT_FORMATS = ('text', 'tsv', 'jsonl')
+# 이만큼 라인이 모이면 한 번에 기록 (output.txt 기준 약 400KB)
+BATCH_LINES = 16384
+# 기록 스레드 큐에 쌓아둘 수 있는 배치 수 (넘으면 분류 쪽이 기다림)
+QUEUE_BATCHES = 4
+
+
+class BatchWriter:
+    """write() 는 list 에 모으기만 하고 batch_lines 개가 차면 ''.join 한 덩어리로 기록
+
+    호출하는 쪽은 라인마다 write(), 몇천 라인마다 flush() 를 부른다 (flush 는 batch_lines 가
+    찼을 때만 실제로 기록). threaded=True 면 합친 덩어리를 bounded queue 로 기록 스레드에 넘겨
+    파일 쓰기를 분류와 겹쳐 실행한다. 기록한 바이트, 배치 수, 쓰기 시간을 따로 세므로
+    분류와 별개로 쓰기 처리량을 볼 수 있다 (stages 를 주면 'write' 단계로도 잡힘).
+    """
+
+    def __init__(self, file, batch_lines=BATCH_LINES, threaded=False, queue_batches=QUEUE_BATCHES,
+                 stages=NO_STAGES, name='write'):
+        self.file = file
+        self.batch_lines = batch_lines
+        self.stages = stages
+        self.name = name
+        self.lines = 0
+        self.bytes = 0
+        self.batches = 0
+        # 분류 스레드가 기록(또는 큐에 넣기)에 쓴 시간, 기록 스레드가 파일 쓰기에 쓴 시간
+        self.seconds = 0.0
+        self.thread_seconds = 0.0
+        self._pending = []
+        self.write = self._pending.append
+        self._error = None
+        self._queue = None
+        self._thread = None
+        if threaded:
+            self._queue = queue.Queue(queue_batches)
+            self._thread = threading.Thread(target=self._drain, daemon=True)
+            self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def writelines(self, lines):
+        self._pending.extend(lines)
+
+    def _drain(self):
+        write = self.file.write
+        while True:
+            text = self._queue.get()
+            if text is None:
+                return
+            if self._error is not None:
+                # 오류 뒤에는 버리기만 (분류 쪽이 다음 flush/close 에서 오류를 받음)
+                continue
+            start = time.perf_counter()
+            try:
+                write(text)
+            except BaseException as e:
+                self._error = e
+            self.thread_seconds += time.perf_counter() - start
+
+    def flush(self, force=False):
+        pending = self._pending
+        if not pending or (not force and len(pending) < self.batch_lines):
+            return
+        if self._error is not None:
+            raise self._error
+        with self.stages.stage(self.name):
+            start = time.perf_counter()
+            text = ''.join(pending)
+            self.lines += len(pending)
+            pending.clear()
+            if self._queue is not None:
+                self._queue.put(text)
+            else:
+                self.file.write(text)
+            self.seconds += time.perf_counter() - start
+        self.bytes += len(text)
+        self.batches += 1
+
+    def close(self):
+        """남은 라인 기록 후 기록 스레드 종료 (파일은 닫지 않음)"""
+        self.flush(force=True)
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            raise self._error
+
+    def summary(self):
+        mib = self.bytes / 2**20
+        busy = self.thread_seconds if self._queue is not None else self.seconds
+        text = (f"Output: {self.lines:,} lines, {mib:,.1f} MiB in {self.batches:,} batches, "
+                f"write {busy:.3f}s ({mib / busy if busy else 0:,.1f} MiB/sec)")
+        if self._queue is not None:
+            text += f", caller blocked {self.seconds:.3f}s"
+        return text
+
+
+def add_arguments(parser):
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='text',
+                        help='결과 파일 형식 (text: 기존 형식, tsv, jsonl)')
+    parser.add_argument('--writer-thread', action='store_true',
+                        help='결과 파일 쓰기를 별도 스레드에서 (bounded queue 로 배치 전달)')
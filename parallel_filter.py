@@ -0,0 +1,111 @@
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bclass_filter
+from bclass_stats import aggregate_records, merge_stats, new_stats
+from hyperloglog import NetworkCardinality
+
+# 워커당 나눌 청크 수 (청크가 작을수록 부하가 고르게 분산됨)
+CHUNKS_PER_WORKER = 4
+
+
+def split_ranges(path, parts):
+    """파일을 parts 개의 (start, end) 바이트 구간으로 나눔. 경계는 항상 줄 시작에 맞춤"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    parts = max(1, min(parts, size))
+
+    bounds = [0]
+    with open(path, 'rb') as f:
+        for i in range(1, parts):
+            pos = size * i // parts
+            if pos <= bounds[-1]:
+                continue
+            f.seek(pos - 1)
+            # pos-1 이 개행이면 pos 가 이미 줄 시작
+            f.readline()
+            pos = f.tell()
+            if pos >= size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def process_bytes(data, write_output=True, v6_prefix=bclass_filter.V6_PREFIX, unique=False):
+    """줄 단위로 끊긴 bytes 를 분류/집계. (라인 수, stats, output.txt 조각 또는 None) 반환"""
+    # 워커 프로세스는 부모의 configure_ipv6 설정을 물려받지 못할 수 있음 (spawn)
+    bclass_filter.configure_ipv6(v6_prefix)
+
+    line_count = data.count(b'\n')
+    if data and not data.endswith(b'\n'):
+        line_count += 1
+
+    sink = io.StringIO() if write_output else None
+    # 직렬 경로(filter_file)와 같이 UTF-8 이 아닌 바이트는 U+FFFD 로 바꿔 처리
+    records = bclass_filter.iter_records(io.StringIO(data.decode('utf-8', 'replace')))
+    stats = new_stats(unique=NetworkCardinality() if unique else None)
+    stats = aggregate_records(records, stats, progress_every=0, sink=sink)
+    return line_count, stats, sink.getvalue() if sink is not None else None
+
+
+def process_range(path, start, end, write_output=True, v6_prefix=bclass_filter.V6_PREFIX,
+                  unique=False):
+    """[start, end) 구간을 분류/집계. (라인 수, stats, output.txt 조각 또는 None) 반환"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return process_bytes(data, write_output, v6_prefix, unique)
+
+
+def _process_range(args):
+    return process_range(*args)
+
+
+def run_parallel(input_file, workers, output_file=None, v6_prefix=bclass_filter.V6_PREFIX,
+                 networks=None, unique=None):
+    """input_file 을 workers 개 프로세스로 분류. 청크 순서대로 병합하므로 결과는 직렬 실행과 동일
+
+    (총 라인 수, 병합된 stats) 반환. output_file 을 주면 output.txt 형식 결과도 순서대로 기록
+    """
+    ranges = split_ranges(input_file, workers * CHUNKS_PER_WORKER)
+    write_output = output_file is not None
+    tasks = [(input_file, start, end, write_output, v6_prefix, unique is not None)
+             for start, end in ranges]
+
+    total_lines = 0
+    stats = new_stats(networks, unique)
+    outfile = open(output_file, 'w') if write_output else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # map 은 제출 순서대로 결과를 돌려줌
+            for line_count, part, text in executor.map(_process_range, tasks):
+                total_lines += line_count
+                merge_stats(stats, part)
+                if outfile is not None:
+                    outfile.write(text)
+                print(f"Processing... {total_lines} lines completed")
+    finally:
+        if outfile is not None:
+            outfile.close()
+
+    return total_lines, stats
+
+
+def filter_file_parallel(input_file, output_file, workers, v6_prefix=bclass_filter.V6_PREFIX):
+    """bclass_filter.filter_file 의 병렬 버전. 처리한 라인 수 반환"""
+    total_lines, _ = run_parallel(input_file, workers, output_file, v6_prefix)
+    return total_lines
+
+
+if __name__ == "__main__":
+    input_file = os.path.join(os.getcwd(), 'ppom_bclass.txt')
+    for workers in (1, 2, 4, os.cpu_count() or 1):
+        start = time.perf_counter()
+        total_lines, _ = run_parallel(input_file, workers)
+        elapsed = time.perf_counter() - start
+        print(f"workers={workers}: {elapsed:.3f}s ({total_lines / elapsed:,.0f} lines/sec)")
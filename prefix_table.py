@@ -0,0 +1,240 @@
+from array import array
+import ipaddress
+
+from ip_parse import IPV6_BITS, format_ipv4, parse_ipv4
+
+# 16-8-8 다단 stride 테이블: 상위 16비트 -> 다음 8비트 -> 마지막 8비트
+# 엔트리 값: 0 = 매칭 없음, 양수 = 규칙 값 번호 + 1, 음수 = -(하위 블록 번호 + 1)
+L1_BITS = 16
+BLOCK_SIZE = 256
+
+
+def parse_cidr(cidr):
+    """'128.0.0.0/2' -> (네트워크 정수, 프리픽스 길이). 호스트 비트는 0 으로 맞춤"""
+    ip, _, length = cidr.partition('/')
+    addr = parse_ipv4(ip.strip())
+    length = int(length) if length else 32
+    if addr is None or not 0 <= length <= 32:
+        raise ValueError(f"Invalid CIDR: {cidr}")
+    return addr & prefix_mask(length), length
+
+
+def parse_cidr6(cidr):
+    """'2001:db8::/32' -> (네트워크 번호(상위 length 비트), 프리픽스 길이)"""
+    try:
+        network = ipaddress.IPv6Network(cidr.strip(), strict=False)
+    except ValueError:
+        raise ValueError(f"Invalid CIDR: {cidr}")
+    length = network.prefixlen
+    return int(network.network_address) >> (IPV6_BITS - length), length
+
+
+def prefix_mask(length):
+    return (0xFFFFFFFF << (32 - length)) & 0xFFFFFFFF
+
+
+def format_cidr(addr, length):
+    return f"{format_ipv4(addr & prefix_mask(length))}/{length}"
+
+
+class PrefixTable:
+    """임의 CIDR(IPv4 /0~/32, IPv6) 규칙의 longest-prefix-match 테이블
+
+    insert/delete 는 규칙 dict 만 바꾸고, 첫 조회 때 16-8-8 stride 테이블로 다시 컴파일한다
+    (controlled prefix expansion). 조회는 배열 인덱싱 1~3회.
+    IPv6 규칙('::' 표기)은 rules6 에 따로 두고, 프리픽스 길이별 dict 를 긴 길이부터 찾는다.
+    """
+
+    def __init__(self):
+        self.rules = {}
+        self.rules6 = {}
+        self._v6_levels = None
+        self._compiled = False
+        self._values = []
+        self._l1 = None
+        self._l2 = None
+        self._l3 = None
+
+    def __len__(self):
+        return len(self.rules) + len(self.rules6)
+
+    def insert(self, cidr, value):
+        if ':' in cidr:
+            self.rules6[parse_cidr6(cidr)] = value
+            self._v6_levels = None
+        else:
+            self.rules[parse_cidr(cidr)] = value
+            self._compiled = False
+
+    def delete(self, cidr):
+        if ':' in cidr:
+            del self.rules6[parse_cidr6(cidr)]
+            self._v6_levels = None
+        else:
+            del self.rules[parse_cidr(cidr)]
+            self._compiled = False
+
+    def _compile6(self):
+        levels = {}
+        for (net, length), value in self.rules6.items():
+            levels.setdefault(length, {})[net] = value
+        self._v6_levels = [(IPV6_BITS - length, levels[length])
+                           for length in sorted(levels, reverse=True)]
+
+    def lookup6(self, addr, default=None):
+        """128비트 정수 addr 에 가장 길게 매칭되는 IPv6 규칙의 값"""
+        if self._v6_levels is None:
+            self._compile6()
+        for shift, nets in self._v6_levels:
+            value = nets.get(addr >> shift, default)
+            if value is not default:
+                return value
+        return default
+
+    def compile(self):
+        values = []
+        value_ids = {}
+        l1 = array('i', bytes(4 << L1_BITS))
+        l2 = array('i')
+        l3 = array('i')
+
+        # 짧은 프리픽스부터 채우면 긴 프리픽스가 덮어써서 자연히 longest match 가 됨
+        for (addr, length), value in sorted(self.rules.items(), key=lambda item: item[0][1]):
+            key = id(value) if not isinstance(value, (int, str, tuple)) else value
+            if key not in value_ids:
+                value_ids[key] = len(values) + 1
+                values.append(value)
+            entry = value_ids[key]
+
+            if length <= 16:
+                start = addr >> 16
+                count = 1 << (16 - length)
+                l1[start:start + count] = array('i', [entry]) * count
+                continue
+
+            i1 = addr >> 16
+            if l1[i1] >= 0:
+                # 이 /16 아래에 처음 생기는 블록: 기존 값을 물려받음
+                l2.extend(array('i', [l1[i1]]) * BLOCK_SIZE)
+                l1[i1] = -(len(l2) // BLOCK_SIZE)
+            base2 = (-l1[i1] - 1) * BLOCK_SIZE
+
+            if length <= 24:
+                start = base2 + ((addr >> 8) & 0xFF)
+                count = 1 << (24 - length)
+                l2[start:start + count] = array('i', [entry]) * count
+                continue
+
+            i2 = base2 + ((addr >> 8) & 0xFF)
+            if l2[i2] >= 0:
+                l3.extend(array('i', [l2[i2]]) * BLOCK_SIZE)
+                l2[i2] = -(len(l3) // BLOCK_SIZE)
+            base3 = (-l2[i2] - 1) * BLOCK_SIZE
+            start = base3 + (addr & 0xFF)
+            count = 1 << (32 - length)
+            l3[start:start + count] = array('i', [entry]) * count
+
+        self._values = values
+        self._l1 = l1
+        self._l2 = l2
+        self._l3 = l3
+        self._compiled = True
+
+    def lookup(self, addr, default=None):
+        """addr(정수)에 가장 길게 매칭되는 규칙의 값"""
+        if not self._compiled:
+            self.compile()
+        entry = self._l1[addr >> 16]
+        if entry < 0:
+            entry = self._l2[(-entry - 1) * BLOCK_SIZE + ((addr >> 8) & 0xFF)]
+            if entry < 0:
+                entry = self._l3[(-entry - 1) * BLOCK_SIZE + (addr & 0xFF)]
+        if entry == 0:
+            return default
+        return self._values[entry - 1]
+
+    def lookup_ids(self, addrs):
+        """numpy uint32 배열 일괄 조회. 값 번호 배열 반환 (0 = 없음, n = values()[n-1])"""
+        # numpy 는 여기서만 쓰므로 호출할 때 import (bclass_filter 를 쓰는 스크립트의 시작 시간 절약)
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("lookup_ids requires numpy")
+        if not self._compiled:
+            self.compile()
+        addrs = np.asarray(addrs, dtype=np.uint32)
+        l1 = np.frombuffer(self._l1, dtype=np.int32)
+        entry = l1[addrs >> 16]
+
+        sub = np.flatnonzero(entry < 0)
+        if len(sub):
+            l2 = np.frombuffer(self._l2, dtype=np.int32)
+            block = (-entry[sub] - 1).astype(np.int64)
+            entry[sub] = l2[block * BLOCK_SIZE + ((addrs[sub] >> 8) & 0xFF)]
+
+            sub = sub[entry[sub] < 0]
+            if len(sub):
+                l3 = np.frombuffer(self._l3, dtype=np.int32)
+                block = (-entry[sub] - 1).astype(np.int64)
+                entry[sub] = l3[block * BLOCK_SIZE + (addrs[sub] & 0xFF)]
+        return entry
+
+    def values(self):
+        if not self._compiled:
+            self.compile()
+        return list(self._values)
+
+
+def b_class_rules():
+    """기존 B클래스 규칙(첫 옥텟 128~191 -> /16 집계)을 규칙 테이블로: 값은 집계 프리픽스 길이"""
+    table = PrefixTable()
+    table.insert('128.0.0.0/2', 16)
+    return table
+
+
+def is_b_class_rules(table):
+    """table 의 IPv4 규칙이 b_class_rules() 와 같은지 (bclass_filter 의 비트 검사 fast path 조건)"""
+    return table.rules == b_class_rules().rules
+
+
+def load_rules(path):
+    """'CIDR [집계 길이]' 한 줄에 하나인 IPv4 규칙 파일. 길이를 생략하면 CIDR 길이, '#' 뒤는 주석
+
+    예) 128.0.0.0/2 16   (기존 B클래스 규칙)
+        10.0.0.0/8 24
+    """
+    table = PrefixTable()
+    with open(path, 'r') as f:
+        for line_no, line in enumerate(f, 1):
+            parts = line.split('#', 1)[0].split()
+            if not parts:
+                continue
+            cidr = parts[0]
+            try:
+                if ':' in cidr or len(parts) > 2:
+                    raise ValueError(cidr)
+                _, length = parse_cidr(cidr)
+                value = int(parts[1]) if len(parts) == 2 else length
+                if not 0 <= value <= 32:
+                    raise ValueError(cidr)
+            except ValueError:
+                raise ValueError(f"{path}:{line_no}: invalid IPv4 rule: {line.strip()}")
+            table.insert(cidr, value)
+    return table
+
+
+def classify_addr(table, addr):
+    """규칙 값(집계 프리픽스 길이)에 따라 'a.b.0.0/16' 형식 네트워크, 매칭 없으면 None"""
+    length = table.lookup(addr)
+    if length is None:
+        return None
+    return format_cidr(addr, length)
+
+
+def network_index_rules(index, value=16):
+    """NetworkIndex 의 /16 구간들을 /16 CIDR 규칙으로 (value 는 각 규칙의 값)"""
+    table = PrefixTable()
+    for start, end in zip(index.starts, index.ends):
+        for net in range(start, end + 1):
+            table.insert(f"{format_ipv4(net << 16)}/16", value)
+    return table
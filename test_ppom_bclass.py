@@ -1,83 +1,65 @@
+import argparse
 import os
-import ipaddress
 
-def is_valid_ip(ip):
-    try:
-        ipaddress.ip_address(ip)
-        return True
-    except ValueError:
-        return False
-
-def is_b_class(ip):
-    try:
-        first_octet = int(ip.split('.')[0])
-        return 128 <= first_octet <= 191
-    except:
-        return False
+import bclass_filter
+import compressed_input
+import instrument
+import output_sink
+from prefix_table import load_rules
 
-def filter_b_class_ranges():
-    input_file = os.path.join(os.getcwd(), 'ppom_bclass.txt')
-    output_file = os.path.join(os.getcwd(), 'output.txt')
+def filter_b_class_ranges(input_file=None, output_file=None, workers=1,
+                          v6_prefix=bclass_filter.V6_PREFIX, columnar_file=None,
+                          exclude_file=None, stages=instrument.NO_STAGES, output_format='text',
+                          threaded_writer=False):
+    if input_file is None:
+        input_file = os.path.join(os.getcwd(), 'ppom_bclass.txt')
+    if output_file is None:
+        # tsv / jsonl 은 output.tsv / output.jsonl (analyze_output.py 는 text 형식 output.txt 를 읽음)
+        name = 'output.txt' if output_format == 'text' else f'output.{output_format}'
+        output_file = os.path.join(os.getcwd(), name)
     print(f"Processing file: {input_file}")
-    
-    # 유효한 IP 목록을 저장할 set
-    valid_ips = set()
-    
-    # 먼저 파일에서 유효한 IP 목록을 읽음
-    try:
-        with open(input_file, 'r') as file:
-            for line in file:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                parts = ' '.join(line.split()).split()
-                if len(parts) != 2:
-                    continue
-                
-                ip = parts[1].strip()
-                if is_valid_ip(ip):
-                    valid_ips.add(ip)
-    except Exception as e:
-        print(f"Error reading file: {str(e)}")
-        return
+    # IPv6 주소는 v6_prefix 길이 네트워크로 집계
+    bclass_filter.configure_ipv6(v6_prefix)
 
-    # 결과를 파일에 쓰기
+    # 한 번의 스트리밍 패스로 검증/분류/기록 (bclass_filter 엔진)
     try:
-        count = 0
-        with open(input_file, 'r') as infile, open(output_file, 'w') as outfile:
-            for line in infile:
-                count += 1
-                if count % 1000 == 0:
-                    print(f"Processing... {count} lines completed")
-                
-                line = line.strip()
-                if not line:
-                    continue
-                
-                parts = ' '.join(line.split()).split()
-                if len(parts) != 2:
-                    outfile.write(f"Warning: Invalid line format: {line}\n")
-                    continue
-                
-                count_val = parts[0].strip()
-                ip = parts[1].strip()
-                
-                result = ""
-                if not is_valid_ip(ip):
-                    result = f"{ip} -> NONE\n"
-                elif ip not in valid_ips:
-                    result = f"{ip} -> NONE\n"
-                elif is_b_class(ip):
-                    network = f"{ip.rsplit('.', 2)[0]}.0.0/16"
-                    result = f"{ip} -> {network}\n"
-                else:
-                    result = f"{ip} -> NONE\n"
-                
-                outfile.write(result)
+        exclude = None
+        if exclude_file is not None:
+            # 제외 목록: Bloom filter + 정렬 배열 (IP 당 약 5바이트, 문자열 set 대비 1/20 이하)
+            import ipset
+            exclude = ipset.load_ip_set(exclude_file)
+            print(f"Excluding {len(exclude):,} IPs listed in {exclude_file}")
+
+        if workers > 1 and compressed_input.is_compressed(input_file):
+            # 압축 파일은 구간으로 나눌 수 없으므로 직렬 처리 (압축 해제는 별도 스레드에서 겹쳐 실행)
+            print("Compressed input: processing with 1 worker")
+            workers = 1
+        if workers > 1:
+            # 줄 단위 구간으로 나눠 병렬 처리, 결과 순서는 직렬 실행과 같음 (필요할 때만 import)
+            import parallel_filter
+            with stages.stage('parallel'):
+                count = parallel_filter.filter_file_parallel(input_file, output_file, workers,
+                                                             v6_prefix)
+            stages.count('lines', count)
+        elif columnar_file is not None:
+            # 타입이 있는 열(hits, ip, network, status, range_id)로도 같은 패스에서 기록 (pyarrow 필요)
+            import columnar
+            import network_index
+            index = network_index.load_network_index_cached(network_index.NETWORK_FILE)
+            with columnar.ColumnarWriter(columnar_file, index) as writer:
+                count = bclass_filter.filter_file(input_file, output_file, exclude=exclude,
+                                                  stages=stages, output_format=output_format,
+                                                  threaded_writer=threaded_writer,
+                                                  columnar=writer)
+        else:
+            count = bclass_filter.filter_file(input_file, output_file, exclude=exclude,
+                                              stages=stages, output_format=output_format,
+                                              threaded_writer=threaded_writer)
 
         print(f"\nProcessing completed. Total {count} lines processed.")
         print(f"Results written to: {output_file}")
+        if columnar_file is not None:
+            print(f"Columnar results written to: {columnar_file}")
 
     except FileNotFoundError:
         print(f"Error: {input_file} file not found")
@@ -85,4 +67,36 @@ def filter_b_class_ranges():
         print(f"Error occurred: {str(e)}")
 
 if __name__ == "__main__":
-    filter_b_class_ranges()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='B클래스 IP 필터링')
+    parser.add_argument('--input', metavar='HIT_FILE',
+                        help='입력 히트 로그 (기본: ppom_bclass.txt, .gz/.bz2/.xz/.zst 도 가능)')
+    parser.add_argument('--workers', type=int, default=1, help='병렬 처리 프로세스 수')
+    parser.add_argument('--v6-prefix', type=int, default=bclass_filter.V6_PREFIX,
+                        help='IPv6 집계 프리픽스 길이 (예: 32, 48, 64)')
+    parser.add_argument('--v4-rules', metavar='RULE_FILE',
+                        help="IPv4 분류 규칙 파일 ('CIDR [집계 길이]' 한 줄에 하나, 기본: 128.0.0.0/2 16)")
+    parser.add_argument('--columnar', metavar='FILE',
+                        help='분류 결과를 Parquet(.parquet) 또는 Arrow(.arrow) 파일로도 기록')
+    parser.add_argument('--exclude', metavar='IP_LIST',
+                        help='결과에서 뺄 IP 목록 (한 줄에 하나, 또는 ipset.py 로 만든 .ipset)')
+    compressed_input.add_arguments(parser)
+    output_sink.add_arguments(parser)
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    compressed_input.configure(args.decompress)
+    if args.exclude and args.workers > 1:
+        parser.error('--exclude is only supported with --workers 1')
+    if args.format != 'text' and args.workers > 1:
+        parser.error('--format tsv/jsonl is only supported with --workers 1')
+    if args.columnar and args.workers > 1:
+        parser.error('--columnar is only supported with --workers 1')
+    if args.v4_rules:
+        # 병렬 워커와 columnar 는 기본 B클래스 규칙 고정
+        if args.workers > 1 or args.columnar:
+            parser.error('--v4-rules is only supported with --workers 1 and without --columnar')
+        bclass_filter.configure_ipv4(load_rules(args.v4_rules))
+    with instrument.profiling(args.profile, args.profile_out) as stages:
+        filter_b_class_ranges(args.input, workers=args.workers, v6_prefix=args.v6_prefix,
+                              columnar_file=args.columnar, exclude_file=args.exclude,
+                              stages=stages, output_format=args.format,
+                              threaded_writer=args.writer_thread)
\ No newline at end of file
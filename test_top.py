@@ -1,105 +1,146 @@
+import argparse
 import os
-from collections import Counter
-import ipaddress
 
-def is_valid_ip(ip):
-    try:
-        ipaddress.ip_address(ip)
-        return True
-    except ValueError:
-        return False
+import bclass_filter
+import compressed_input
+import instrument
+import network_index
+import output_sink
+from aggregators import AGGREGATORS, make_aggregator
+from bclass_filter import classify_ipv4
+from classify_cache import CACHES, make_cache
+from hit_reader import HitReader
+from hyperloglog import NetworkCardinality
+from prefix_table import load_rules
 
-def is_b_class(ip):
-    try:
-        first_octet = int(ip.split('.')[0])
-        return 128 <= first_octet <= 191
-    except:
-        return False
+# 형식별 결과 행 = head(hits) + tail(ip, network, status). tail 은 IP 별로 캐시됨
+ROW_FORMATS = {
+    'text': ("{:6d}  ".format, "{:15s}  {:16s}  {}\n".format),
+    'tsv': ("{}\t".format, "{}\t{}\t{}\n".format),
+    'jsonl': ('{{"hits": {}, '.format, '"ip": "{}", "network": "{}", "status": "{}"}}\n'.format),
+}
 
 def load_valid_networks():
-    valid_networks = set()
+    # start..end 구간 전체를 병합한 /16 인덱스 (network_index.NetworkIndex)
+    # CSV 가 바뀌지 않았으면 country_asn222.idx 스냅샷을 바로 mmap 으로 읽음
     try:
-        with open('country_asn222.csv', 'r') as file:
-            for line in file:
-                line = line.strip()
-                if not line:
-                    continue
-                parts = line.split(',')
-                if len(parts) >= 2:
-                    network = parts[0].strip('.')
-                    valid_networks.add(network)
+        return network_index.load_network_index_cached('country_asn222.csv')
     except FileNotFoundError:
         print("Error: country_asn222.csv file not found")
-    return valid_networks
+    return network_index.NetworkIndex()
 
-def print_b_class_ips(min_hits=1000):
-    input_file = os.path.join(os.getcwd(), 'ppom_bclass.txt')
+def print_b_class_ips(min_hits=1000, aggregator='exact', stages=instrument.NO_STAGES,
+                      cache_size=0, cache_kind='lru', input_file=None, output_format='text',
+                      threaded_writer=False, top_k=100):
+    if input_file is None:
+        input_file = os.path.join(os.getcwd(), 'ppom_bclass.txt')
     output_dir = os.path.join(os.getcwd(), 'output')
-    output_file = os.path.join(output_dir, 'test_top_result.txt')
+    # tsv / jsonl 은 결과 행만 기록하고 요약은 화면에 출력
+    text_output = output_format == 'text'
+    output_file = os.path.join(output_dir, 'test_top_result.txt' if text_output
+                               else f'test_top_result.{output_format}')
+    head, tail_format = ROW_FORMATS[output_format]
     
     # output 디렉토리가 없으면 생성
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
-    valid_networks = load_valid_networks()
+    with stages.stage('load'):
+        valid_networks = load_valid_networks()
     
     stats = {
         'total_lines': 0,
         'matched_count': 0,
         'total_hits': 0,
-        'networks': Counter()
+        # 네트워크별 히트 합계 (aggregators: exact | heap | spacesaving | countmin)
+        'networks': make_aggregator(aggregator, k=top_k),
+        # 네트워크별 고유 IP 수 (HyperLogLog, 다른 날짜 스케치와 합칠 수 있음)
+        'unique': NetworkCardinality(),
+        # IP(정수)별 분류 결과 캐시 (같은 IP 가 반복되는 정렬 안 된 스트림용, cache_size=0 이면 끔)
+        'cache': make_cache(cache_kind, cache_size)
     }
+    cache = stats['cache']
     
     try:
         with open(output_file, 'w') as outf:
-            outf.write(f"B-Class IPs with {min_hits}+ hits:\n")
-            outf.write("-" * 65 + "\n")
-            outf.write("Hits    IP              B-Class Network    Status\n")
-            outf.write("-" * 65 + "\n")
+            if text_output:
+                outf.write(f"B-Class IPs with {min_hits}+ hits:\n")
+                outf.write("-" * 65 + "\n")
+                outf.write("Hits    IP              B-Class Network    Status\n")
+                outf.write("-" * 65 + "\n")
+            elif output_format == 'tsv':
+                outf.write("hits\tip\tnetwork\tstatus\n")
             
-            with open(input_file, 'r') as file:
-                for line in file:
-                    stats['total_lines'] += 1
-                    if stats['total_lines'] % 1000 == 0:
-                        print(f"Processing... {stats['total_lines']:,} lines")
-                    
-                    line = line.strip()
-                    if not line:
-                        continue
-                    
-                    parts = ' '.join(line.split()).split()
-                    if len(parts) != 2:
-                        continue
-                    
-                    hits = int(parts[0])
-                    ip = parts[1].strip()
-                    
-                    if hits >= min_hits and is_valid_ip(ip) and is_b_class(ip):
-                        network = f"{ip.rsplit('.', 2)[0]}"
-                        network_str = f"{network}.0.0/16"
-                        status = "MATCH" if network in valid_networks else "NONE"
-                        
+            with HitReader(input_file) as reader, \
+                    output_sink.BatchWriter(outf, threaded=threaded_writer, stages=stages) as writer:
+                count = 0
+                progress = instrument.Progress('lines')
+                write = writer.write
+                with stages.stage('classify'):
+                    for _, hits, addr, ip in stages.timed('parse', reader.records()):
+                        count += 1
+                        if count % instrument.PROGRESS_CHECK == 0:
+                            writer.flush()
+                            progress(count)
+
+                        if hits is None or addr is None or hits < min_hits:
+                            continue
+
+                        # 기본 B클래스 규칙이면 비트 검사 fast path (--v4-rules 로 바꿀 수 있음)
+                        network_str = classify_ipv4(addr)
+                        if network_str is None:
+                            continue
+
+                        entry = cache.get(addr) if cache is not None else None
+                        if entry is None:
+                            status = "MATCH" if valid_networks.contains_addr(addr) else "NONE"
+                            tail = tail_format(ip.decode(), network_str, status)
+                            if status == "MATCH":
+                                stats['unique'].add(network_str, addr)
+                            if cache is not None:
+                                cache.put(addr, (status, tail))
+                        else:
+                            # 이미 본 IP: HyperLogLog 는 같은 값을 다시 넣어도 그대로이므로 생략
+                            status, tail = entry
+
                         if status == "MATCH":
                             stats['matched_count'] += 1
-                            stats['networks'][network_str] += hits
-                        
-                        result_line = f"{hits:6d}  {ip:15s}  {network_str:16s}  {status}\n"
-                        outf.write(result_line)
+                            stats['networks'].add(network_str, hits)
+
+                        write(head(hits) + tail)
                         stats['total_hits'] += hits
 
-            outf.write("-" * 65 + "\n")
-            outf.write(f"\nSummary:\n")
-            outf.write(f"Total processed lines: {stats['total_lines']:,}\n")
-            outf.write(f"Matched networks: {stats['matched_count']:,}\n")
-            outf.write(f"Total hits: {stats['total_hits']:,}\n")
+                stats['total_lines'] = reader.line_count
+                stages.count('lines', reader.line_count)
+                stages.count('matched', stats['matched_count'])
+                reader.report_errors()
+
+            summary = []
+            if text_output:
+                summary.append("-" * 65 + "\n")
+            summary.append(f"\nSummary:\n")
+            summary.append(f"Total processed lines: {stats['total_lines']:,}\n")
+            summary.append(f"Matched networks: {stats['matched_count']:,}\n")
+            summary.append(f"Total hits: {stats['total_hits']:,}\n")
+            if cache is not None:
+                summary.append(f"Classification cache: {cache.summary()}\n")
             
             if stats['networks']:
-                outf.write("\nTop 10 Matched Networks by Hits:\n")
-                outf.write("-" * 40 + "\n")
+                summary.append("\nTop 10 Matched Networks by Hits:\n")
+                summary.append("-" * 40 + "\n")
                 for network, hit_count in stats['networks'].most_common(10):
-                    outf.write(f"{network}: {hit_count:,} hits\n")
+                    summary.append(f"{network}: {hit_count:,} hits, "
+                                   f"~{stats['unique'].estimate(network):,} unique IPs\n")
+            if text_output:
+                outf.writelines(summary)
+            else:
+                print(''.join(summary), end='')
 
+        if stages is not instrument.NO_STAGES:
+            print(writer.summary())
         print(f"\nAnalysis completed. Results written to: {output_file}")
+        if cache is not None and text_output:
+            print(f"Classification cache: {cache.summary()}")
 
     except FileNotFoundError:
         print(f"Error: {input_file} file not found")
@@ -107,5 +148,29 @@ def print_b_class_ips(min_hits=1000):
         print(f"Error occurred: {str(e)}")
 
 if __name__ == "__main__":
-    print_b_class_ips(100)
+    parser = argparse.ArgumentParser(description='히트 수 기준 B클래스 IP 목록과 네트워크 순위')
+    parser.add_argument('min_hits', nargs='?', type=int, default=100)
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='IP 별 분류 결과 캐시 항목 수 (같은 IP 가 반복되는 스트림용, 0 이면 끔)')
+    parser.add_argument('--cache', choices=CACHES, default='lru', help='캐시 교체 방식')
+    parser.add_argument('--aggregator', choices=AGGREGATORS, default='exact',
+                        help='네트워크 순위 집계 방식 (기본: 정확한 Counter)')
+    parser.add_argument('--top-k', type=int, default=100,
+                        help='heap 이 고를 순위 수, spacesaving/countmin 이 유지할 후보 수')
+    parser.add_argument('--v4-rules', metavar='RULE_FILE',
+                        help="IPv4 분류 규칙 파일 ('CIDR [집계 길이]' 한 줄에 하나, 기본: 128.0.0.0/2 16)")
+    parser.add_argument('--input', metavar='HIT_FILE',
+                        help='입력 히트 로그 (기본: ppom_bclass.txt, .gz/.bz2/.xz/.zst 도 가능)')
+    compressed_input.add_arguments(parser)
+    output_sink.add_arguments(parser)
+    instrument.add_arguments(parser)
+    args = parser.parse_args()
+    compressed_input.configure(args.decompress)
+    if args.v4_rules:
+        bclass_filter.configure_ipv4(load_rules(args.v4_rules))
+    with instrument.profiling(args.profile, args.profile_out) as stages:
+        print_b_class_ips(args.min_hits, args.aggregator, stages=stages, cache_size=args.cache_size,
+                          cache_kind=args.cache, input_file=args.input,
+                          output_format=args.format, threaded_writer=args.writer_thread,
+                          top_k=args.top_k)
     
\ No newline at end of file
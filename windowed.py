@@ -0,0 +1,187 @@
+import argparse
+import math
+import sys
+import time
+from collections import Counter
+
+import anomaly
+from bclass_filter import B_CLASS_TOP_BITS, format_network16
+from ip_parse import parse_ipv4
+
+
+class WindowedCounter:
+    """시간 창(window)별 키 카운트. slide == window 면 tumbling, slide < window 면 sliding
+
+    이벤트는 slide 길이의 pane 별 Counter 에 쌓고, 창은 연속된 window/slide 개 pane 의 합이다.
+    pane Counter 들은 고정 크기 링 버퍼에 두므로 메모리는 (창 pane 수 + grace pane 수) 개로 제한된다.
+    watermark(지금까지 본 최대 시각 - grace)가 창 끝을 지나면 그 창을 닫아 반환하고,
+    grace 안에 들어온 늦은 이벤트는 아직 닫히지 않은 창에 반영한다. 그보다 늦으면 late_dropped 로 셈.
+    """
+
+    def __init__(self, window, slide=None, grace=0):
+        slide = window if slide is None else slide
+        if slide <= 0 or window <= 0 or window % slide:
+            raise ValueError("window must be a positive multiple of slide")
+        self.window = window
+        self.slide = slide
+        self.grace = grace
+        self.panes_per_window = int(window // slide)
+        self.size = self.panes_per_window + math.ceil(grace / slide) + 2
+        self._panes = [Counter() for _ in range(self.size)]
+        self._pane_ids = [None] * self.size
+        self._max_pane = None
+        self._current = None
+        self._next_window = None
+        # sliding: 마지막으로 닫은 창(pane _next_window-n .. _next_window-1)의 합계
+        self._rolling = Counter()
+        # 이 시각 이상의 이벤트가 오면 _next_window 창을 닫을 수 있음
+        self._close_at = math.inf
+        self.events = 0
+        self.late_dropped = 0
+
+    def add(self, ts, key, count=1):
+        """이벤트 하나 반영. 이번 이벤트로 닫힌 창들의 (시작, 끝, Counter) 목록 반환"""
+        self.events += 1
+        if ts < self._close_at and ts // self.slide == self._max_pane:
+            # 대부분의 이벤트: 가장 최근 pane 에 바로 누적
+            self._current[key] += count
+            return ()
+        return self._add_slow(ts, int(ts // self.slide), key, count)
+
+    def _add_slow(self, ts, pane, key, count):
+        if self._max_pane is None:
+            # 첫 이벤트보다 grace 만큼 이른 이벤트가 속할 창부터 시작
+            self._next_window = int((ts - self.grace) // self.slide)
+            self._max_pane = pane - 1
+            self._close_at = (self._next_window + 1) * self.slide + self.grace
+        if pane < self._next_window - self.panes_per_window + 1:
+            # 이미 닫힌 창에만 속하는 pane
+            self.late_dropped += 1
+            return ()
+
+        # 새 pane 을 링 버퍼에 넣기 전에 닫을 창부터 처리 (이 이벤트가 속한 창은 아직 안 닫힘)
+        closed = self._close_windows(ts - self.grace) if ts >= self._close_at else []
+        counter = self._pane(pane)
+        counter[key] += count
+        if pane < self._next_window and self.panes_per_window > 1:
+            # 이미 닫은 창의 합계에 들어간 pane: 다음 창들이 이어받도록 합계에도 반영
+            self._rolling[key] += count
+        if pane > self._max_pane:
+            self._max_pane = pane
+            self._current = counter
+        return closed
+
+    def _pane(self, pane):
+        slot = pane % self.size
+        if self._pane_ids[slot] != pane:
+            self._pane_ids[slot] = pane
+            self._panes[slot] = Counter()
+        return self._panes[slot]
+
+    def _close_windows(self, watermark):
+        """끝이 watermark 이하인 창을 순서대로 닫음. 데이터가 없는 구간의 빈 창은 건너뜀"""
+        closed = []
+        slide = self.slide
+        while (self._next_window + 1) * slide <= watermark:
+            if self._next_window - self.panes_per_window + 1 > self._max_pane:
+                # 남은 pane 이 모두 비어 있음: 닫을 수 없는 첫 창으로 바로 이동
+                self._next_window = max(self._next_window, int(watermark // slide))
+                if (self._next_window + 1) * slide <= watermark:
+                    self._next_window += 1
+                self._rolling = Counter()
+                break
+            window = self._emit(self._next_window)
+            if window[2]:
+                closed.append(window)
+            self._next_window += 1
+        self._close_at = (self._next_window + 1) * slide + self.grace
+        return closed
+
+    def _stored(self, pane):
+        slot = pane % self.size
+        return self._panes[slot] if self._pane_ids[slot] == pane else None
+
+    def _emit(self, last_pane):
+        first_pane = last_pane - self.panes_per_window + 1
+        if self.panes_per_window == 1:
+            counts = self._stored(last_pane) or Counter()
+        else:
+            # 직전 창 합계에 새 pane 을 더하고 빠지는 pane 을 뺌 (pane 수와 무관하게 창당 한 번씩)
+            rolling = self._rolling
+            entering = self._stored(last_pane)
+            leaving = self._stored(first_pane - 1)
+            if entering:
+                rolling.update(entering)
+            if leaving:
+                rolling.subtract(leaving)
+                for key in [key for key in leaving if rolling[key] <= 0]:
+                    del rolling[key]
+            counts = Counter(rolling)
+        return first_pane * self.slide, (last_pane + 1) * self.slide, counts
+
+    def flush(self):
+        """스트림 끝: 데이터가 남은 창을 모두 닫아 반환"""
+        if self._max_pane is None:
+            return []
+        return self._close_windows((self._max_pane + self.panes_per_window) * self.slide)
+
+
+def parse_timed_line(line):
+    """'timestamp count ip' 한 줄을 (timestamp, /16 번호, hits) 로. B클래스가 아니거나 형식이 틀리면 None"""
+    parts = line.split()
+    if len(parts) != 3:
+        return None
+    addr = parse_ipv4(parts[2])
+    if addr is None or (addr >> 30) != B_CLASS_TOP_BITS:
+        return None
+    try:
+        return float(parts[0]), addr >> 16, int(parts[1])
+    except ValueError:
+        return None
+
+
+def iter_windows(lines, window, slide=None, grace=0, counter=None):
+    """타임스탬프 히트 로그에서 닫히는 창마다 (시작, 끝, /16 번호별 히트 Counter) 를 순서대로 yield"""
+    if counter is None:
+        counter = WindowedCounter(window, slide, grace)
+    add = counter.add
+    for line in lines:
+        event = parse_timed_line(line)
+        if event is None:
+            continue
+        closed = add(*event)
+        if closed:
+            yield from closed
+    yield from counter.flush()
+
+
+def format_window(start, end, counts, top=5):
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start))
+    ranked = ", ".join(f"{format_network16(net)}: {hits:,}" for net, hits in counts.most_common(top))
+    return f"[{stamp} +{end - start:g}s] {sum(counts.values()):,} hits  {ranked}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='타임스탬프 히트 로그의 /16 네트워크별 시간 창 집계')
+    parser.add_argument('input', nargs='?', help="'timestamp count ip' 형식 (생략하면 stdin)")
+    parser.add_argument('--window', type=float, default=60, help='창 길이(초)')
+    parser.add_argument('--slide', type=float, help='창 이동 간격(초). 생략하면 tumbling')
+    parser.add_argument('--grace', type=float, default=0, help='늦은 이벤트 허용 시간(초)')
+    parser.add_argument('--top', type=int, default=5, help='창마다 출력할 상위 네트워크 수')
+    parser.add_argument('--alerts', action='store_true',
+                        help='창별 카운트가 EWMA 기준값보다 급증한 네트워크 표시')
+    parser.add_argument('--alert-threshold', type=float, default=anomaly.THRESHOLD)
+    args = parser.parse_args()
+
+    counter = WindowedCounter(args.window, args.slide, args.grace)
+    detector = anomaly.EwmaDetector(threshold=args.alert_threshold) if args.alerts else None
+    source = open(args.input, 'r') if args.input else sys.stdin
+    with source:
+        for start, end, counts in iter_windows(source, args.window, counter=counter):
+            print(format_window(start, end, counts, args.top))
+            if detector is not None:
+                for net, score, count, mean in detector.observe(counts):
+                    print(f"  ALERT {format_network16(net)}: score {score:.1f}, "
+                          f"{count:,} hits (baseline {mean:.1f})")
+    print(f"{counter.events:,} events, {counter.late_dropped:,} dropped as too late",
+          file=sys.stderr)